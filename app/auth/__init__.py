@@ -1,35 +1,245 @@
+import hashlib
 import os
+import time
 
 import httpx
 from fastapi import Request, HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from auth.signing_keys import (
+    InvalidSignedToken,
+    LocalVerificationUnavailable,
+    SigningKeySet,
+    verify_signed_token,
+)
+from internal.http_clients import HttpClientPool
+from utils.cache import ExpiringCache
 
 PORTAL_BACKEND_BASE_URL = os.environ["PORTAL_BACKEND_URL"].rstrip("/")
 VERIFICATION_URL = f"{PORTAL_BACKEND_BASE_URL}/auth/verify"
 
+# "portal" (default): every token is verified by the portal backend.
+# "local": signed launch tokens are verified against the portal's signing keys,
+# and the portal is only called when a token can't be checked locally.
+VERIFICATION_MODE = os.getenv("LAUNCH_TOKEN_VERIFICATION_MODE") or "portal"
+SIGNING_KEYS_URL = (
+    os.getenv("PORTAL_SIGNING_KEYS_URL")
+    or f"{PORTAL_BACKEND_BASE_URL}/.well-known/jwks.json"
+)
 
-def _verify_token_value(token: str) -> dict:
+# Portal calls share keep-alive connections and must fit in a tight latency budget:
+# each attempt gets at most PORTAL_CONNECT_TIMEOUT / PORTAL_READ_TIMEOUT, and
+# failed connections or 5xx answers are retried only while the budget allows.
+PORTAL_CONNECT_TIMEOUT = 1.0
+PORTAL_READ_TIMEOUT = 2.5
+PORTAL_LATENCY_BUDGET = 4.0
+PORTAL_MAX_ATTEMPTS = 2
+
+_portal_clients = HttpClientPool(
+    timeout=httpx.Timeout(PORTAL_READ_TIMEOUT, connect=PORTAL_CONNECT_TIMEOUT),
+    limits=httpx.Limits(
+        max_connections=20, max_keepalive_connections=10, keepalive_expiry=60
+    ),
+)
+
+# Verified tokens are cached per process so the launchToken redirect (and student
+# refreshes) don't hit the portal again. A verification is never trusted for longer
+# than the launch cookie carrying the token lives (REPORT_LAUNCH_COOKIE_MAX_AGE) or
+# the token's own expiry; rejections are only cached briefly.
+VERIFICATION_CACHE_MAX_SIZE = 4096
+REJECTED_TOKEN_CACHE_TTL = 30
+
+_verification_cache = ExpiringCache(maxsize=VERIFICATION_CACHE_MAX_SIZE)
+
+# Class-wide endpoints (e.g. the session export) require one of these roles in the
+# verification payload's `role` claim (top level, or under `data` like the launch
+# claims)
+ROLE_CLAIM = "role"
+STAFF_ROLES = ("teacher", "admin")
+
+
+def _fetch_signing_keys() -> dict:
+    response = _portal_clients.get_client().get(SIGNING_KEYS_URL)
+    response.raise_for_status()
+    return response.json()
+
+
+_signing_keys = SigningKeySet(fetch_keys=_fetch_signing_keys)
+
+
+def _invalid_token_exception(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _token_cache_key(token: str) -> str:
+    # Only a digest of the token is kept in memory
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _verification_ttl(payload: dict) -> float:
+    # Imported here: utils.report_launch imports this module
+    from utils.report_launch import REPORT_LAUNCH_COOKIE_MAX_AGE
+
+    ttl = REPORT_LAUNCH_COOKIE_MAX_AGE
+    expires_at = payload.get("exp") or payload.get("data", {}).get("exp")
+    if isinstance(expires_at, (int, float)):
+        ttl = min(ttl, expires_at - time.time())
+    return ttl
+
+
+def _attempt_timeout(deadline: float) -> httpx.Timeout:
+    remaining = max(deadline - time.monotonic(), 0.1)
+    return httpx.Timeout(
+        min(PORTAL_READ_TIMEOUT, remaining),
+        connect=min(PORTAL_CONNECT_TIMEOUT, remaining),
+    )
+
+
+def _should_retry(attempt: int, deadline: float) -> bool:
+    return attempt < PORTAL_MAX_ATTEMPTS and time.monotonic() < deadline
+
+
+def _portal_unavailable_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Token verification is temporarily unavailable",
+        headers={"Retry-After": "5"},
+    )
+
+
+def _request_verification(token: str) -> httpx.Response:
+    headers = {"Authorization": f"Bearer {token}"}
+    deadline = time.monotonic() + PORTAL_LATENCY_BUDGET
+    client = _portal_clients.get_client()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            response = client.get(
+                VERIFICATION_URL, headers=headers, timeout=_attempt_timeout(deadline)
+            )
+        except httpx.TransportError as e:
+            if _should_retry(attempt, deadline):
+                continue
+            print(f"Portal token verification failed: {e!r}")
+            raise _portal_unavailable_exception()
+        if response.status_code >= 500 and _should_retry(attempt, deadline):
+            continue
+        return response
+
+
+async def _request_verification_async(token: str) -> httpx.Response:
     headers = {"Authorization": f"Bearer {token}"}
-    response = httpx.get(VERIFICATION_URL, headers=headers, timeout=10)
+    deadline = time.monotonic() + PORTAL_LATENCY_BUDGET
+    client = _portal_clients.get_async_client()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            response = await client.get(
+                VERIFICATION_URL, headers=headers, timeout=_attempt_timeout(deadline)
+            )
+        except httpx.TransportError as e:
+            if _should_retry(attempt, deadline):
+                continue
+            print(f"Portal token verification failed: {e!r}")
+            raise _portal_unavailable_exception()
+        if response.status_code >= 500 and _should_retry(attempt, deadline):
+            continue
+        return response
 
+
+def _get_cached_verification(cache_key: str):
+    cached = _verification_cache.get(cache_key)
+    if cached is None:
+        return None
+    is_valid, value = cached
+    if is_valid:
+        return value
+    raise _invalid_token_exception(value)
+
+
+def _handle_verification_response(cache_key: str, response: httpx.Response) -> dict:
     if response.status_code != 200:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        # Only cache definitive rejections; portal outages must not lock users out
+        if 400 <= response.status_code < 500:
+            _verification_cache.set(
+                cache_key, (False, "Invalid token"), REJECTED_TOKEN_CACHE_TTL
+            )
+        raise _invalid_token_exception("Invalid token")
 
     json_response = response.json()
     if "id" not in json_response:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token payload",
-            headers={"WWW-Authenticate": "Bearer"},
+        _verification_cache.set(
+            cache_key, (False, "Invalid token payload"), REJECTED_TOKEN_CACHE_TTL
         )
+        raise _invalid_token_exception("Invalid token payload")
 
+    _verification_cache.set(
+        cache_key, (True, json_response), _verification_ttl(json_response)
+    )
     return json_response
 
 
-async def verify_token(request: Request) -> str:
+def _verify_token_locally(cache_key: str, token: str):
+    """
+    Returns the verified payload, or None when the portal has to decide.
+    The payload has the same shape as the portal's /auth/verify response.
+    """
+    try:
+        claims = verify_signed_token(token, _signing_keys)
+    except LocalVerificationUnavailable:
+        return None
+    except InvalidSignedToken:
+        _verification_cache.set(
+            cache_key, (False, "Invalid token"), REJECTED_TOKEN_CACHE_TTL
+        )
+        raise _invalid_token_exception("Invalid token")
+
+    payload = dict(claims)
+    if "id" not in payload and "sub" in payload:
+        payload["id"] = payload["sub"]
+    if "id" not in payload:
+        _verification_cache.set(
+            cache_key, (False, "Invalid token payload"), REJECTED_TOKEN_CACHE_TTL
+        )
+        raise _invalid_token_exception("Invalid token payload")
+
+    _verification_cache.set(cache_key, (True, payload), _verification_ttl(payload))
+    return payload
+
+
+def _verify_token_value(token: str) -> dict:
+    cache_key = _token_cache_key(token)
+    payload = _get_cached_verification(cache_key)
+    if payload is not None:
+        return payload
+    if VERIFICATION_MODE == "local":
+        payload = _verify_token_locally(cache_key, token)
+        if payload is not None:
+            return payload
+    return _handle_verification_response(cache_key, _request_verification(token))
+
+
+async def _verify_token_value_async(token: str) -> dict:
+    cache_key = _token_cache_key(token)
+    payload = _get_cached_verification(cache_key)
+    if payload is not None:
+        return payload
+    if VERIFICATION_MODE == "local":
+        # Key (re)fetches are blocking, so local verification runs in the threadpool
+        payload = await run_in_threadpool(_verify_token_locally, cache_key, token)
+        if payload is not None:
+            return payload
+    response = await _request_verification_async(token)
+    return _handle_verification_response(cache_key, response)
+
+
+def _bearer_token(request: Request) -> str:
     auth_header = request.headers.get("Authorization")
     bearer_prefix = "Bearer "
 
@@ -40,16 +250,31 @@ async def verify_token(request: Request) -> str:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    token = auth_header[len(bearer_prefix) :]
-    _verify_token_value(token)
+    return auth_header[len(bearer_prefix) :]
+
+
+async def verify_token(request: Request) -> str:
+    token = _bearer_token(request)
+    await _verify_token_value_async(token)
     return token
 
 
-def verify_launch_token(token: str, expected_audience: str = "report") -> dict:
-    if not token:
-        raise HTTPException(status_code=401, detail="Missing launch token")
+async def verify_staff_token(request: Request) -> dict:
+    """
+    Verifies the Bearer token and requires a teacher / admin role (STAFF_ROLES)
+    in its payload. Returns the verification payload.
+    """
+    payload = await _verify_token_value_async(_bearer_token(request))
+    role = payload.get(ROLE_CLAIM) or payload.get("data", {}).get(ROLE_CLAIM)
+    if role not in STAFF_ROLES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only teachers and admins can export session reports",
+        )
+    return payload
 
-    payload = _verify_token_value(token)
+
+def _check_launch_token_payload(payload: dict, expected_audience: str) -> dict:
     token_data = payload.get("data", {})
 
     if token_data.get("session_mode") != "launch":
@@ -60,3 +285,28 @@ def verify_launch_token(token: str, expected_audience: str = "report") -> dict:
         raise HTTPException(status_code=401, detail="Invalid launch token audience")
 
     return payload
+
+
+def verify_launch_token(token: str, expected_audience: str = "report") -> dict:
+    """
+    Verifies a launch token. Blocking; use from sync endpoints (which FastAPI
+    runs in its threadpool) only.
+    """
+    if not token:
+        raise HTTPException(status_code=401, detail="Missing launch token")
+
+    payload = _verify_token_value(token)
+    return _check_launch_token_payload(payload, expected_audience)
+
+
+async def verify_launch_token_async(
+    token: str, expected_audience: str = "report"
+) -> dict:
+    """
+    Verifies a launch token without blocking the event loop; use from async endpoints.
+    """
+    if not token:
+        raise HTTPException(status_code=401, detail="Missing launch token")
+
+    payload = await _verify_token_value_async(token)
+    return _check_launch_token_payload(payload, expected_audience)
@@ -0,0 +1,137 @@
+"""
+Local verification of signed (RS256 JWT) launch tokens against the portal's
+published signing keys (JWKS).
+"""
+import base64
+import json
+import threading
+import time
+
+import rsa
+
+# JWT alg -> hash name reported by rsa.verify
+SUPPORTED_ALGORITHMS = {"RS256": "SHA-256"}
+
+
+class LocalVerificationUnavailable(Exception):
+    """
+    The token can't be checked locally (no keys, unknown key id, unsupported
+    algorithm, not a JWT). Callers should fall back to the portal backend.
+    """
+
+
+class InvalidSignedToken(Exception):
+    """
+    The token was checked locally and is definitely invalid (bad signature, expired).
+    """
+
+
+def _b64url_decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _b64url_to_int(value: str) -> int:
+    return int.from_bytes(_b64url_decode(value), "big")
+
+
+def jwk_to_public_key(jwk: dict) -> rsa.PublicKey:
+    return rsa.PublicKey(_b64url_to_int(jwk["n"]), _b64url_to_int(jwk["e"]))
+
+
+class SigningKeySet:
+    """
+    Signing keys fetched once and cached per process. Keys are re-fetched when
+    they are older than `max_age`, or when a token names a key id we don't know
+    (key rotation) — at most once per `min_refresh_interval` so that garbage
+    tokens can't make us hammer the key endpoint.
+    """
+
+    def __init__(self, fetch_keys, max_age=60 * 60, min_refresh_interval=60) -> None:
+        """
+        params:
+            fetch_keys: Zero-argument callable returning a JWKS document ({"keys": [...]})
+            max_age: Seconds after which the cached keys are refreshed
+            min_refresh_interval: Minimum seconds between two key fetches
+        """
+        self.__fetch_keys = fetch_keys
+        self.__max_age = max_age
+        self.__min_refresh_interval = min_refresh_interval
+        self.__keys = {}
+        self.__fetched_at = None
+        self.__lock = threading.Lock()
+
+    def __refresh(self) -> None:
+        now = time.monotonic()
+        if (
+            self.__fetched_at is not None
+            and now - self.__fetched_at < self.__min_refresh_interval
+        ):
+            return
+        # Set before fetching so a failing key endpoint is also rate limited
+        self.__fetched_at = now
+        try:
+            jwks = self.__fetch_keys()
+        except Exception as e:
+            print(f"Could not fetch launch token signing keys: {e!r}")
+            return
+        self.__keys = {
+            jwk.get("kid"): jwk_to_public_key(jwk)
+            for jwk in jwks.get("keys", [])
+            if jwk.get("kty") == "RSA" and jwk.get("use", "sig") == "sig"
+        }
+
+    def get_key(self, kid):
+        """
+        Returns the public key for `kid`, or None if it's not (or no longer) published.
+        """
+        with self.__lock:
+            is_stale = (
+                self.__fetched_at is None
+                or time.monotonic() - self.__fetched_at >= self.__max_age
+            )
+            if is_stale or kid not in self.__keys:
+                self.__refresh()
+            return self.__keys.get(kid)
+
+
+def verify_signed_token(token: str, key_set: SigningKeySet, leeway: int = 30) -> dict:
+    """
+    Verifies the signature and time claims of an RS256 JWT and returns its claims.
+
+    Raises:
+        LocalVerificationUnavailable: If the token can't be checked locally.
+        InvalidSignedToken: If the token is invalid.
+    """
+    try:
+        encoded_header, encoded_claims, encoded_signature = token.split(".")
+        header = json.loads(_b64url_decode(encoded_header))
+        claims = json.loads(_b64url_decode(encoded_claims))
+        signature = _b64url_decode(encoded_signature)
+    except ValueError:
+        raise LocalVerificationUnavailable("Not a JWT")
+    if not isinstance(header, dict) or not isinstance(claims, dict):
+        raise LocalVerificationUnavailable("Not a JWT")
+
+    algorithm = header.get("alg")
+    if algorithm not in SUPPORTED_ALGORITHMS:
+        raise LocalVerificationUnavailable(f"Unsupported algorithm {algorithm}")
+
+    public_key = key_set.get_key(header.get("kid"))
+    if public_key is None:
+        raise LocalVerificationUnavailable(f"Unknown signing key {header.get('kid')}")
+
+    signing_input = f"{encoded_header}.{encoded_claims}".encode("ascii")
+    try:
+        hash_method = rsa.verify(signing_input, signature, public_key)
+    except rsa.VerificationError:
+        raise InvalidSignedToken("Invalid signature")
+    if hash_method != SUPPORTED_ALGORITHMS[algorithm]:
+        raise InvalidSignedToken("Signature algorithm mismatch")
+
+    now = time.time()
+    if isinstance(claims.get("exp"), (int, float)) and now > claims["exp"] + leeway:
+        raise InvalidSignedToken("Token expired")
+    if isinstance(claims.get("nbf"), (int, float)) and now < claims["nbf"] - leeway:
+        raise InvalidSignedToken("Token not yet valid")
+
+    return claims
@@ -1,51 +1,251 @@
-from google.cloud import bigquery
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional
+
+from utils.cache import ExpiringCache
+from utils.circuit_breaker import CircuitBreaker
+from utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from google.cloud import bigquery
+
+    from db.qualifications_db import QualificationsDB
+
+# Where v3 qualification data is read from first: "none" (BigQuery only) or
+# "dynamodb" (the student_qualifications table filled by qualification_sync.py)
+QUALIFICATION_STORE = os.getenv("QUALIFICATION_STORE") or "none"
+
+# Qualification rows are fetched for a whole test at once (every student of a test
+# views their v3 report within a few days) and kept per test_id for this long
+QUALIFICATION_CACHE_TTL = float(os.getenv("QUALIFICATION_CACHE_TTL") or 900)
+# Tests without rows yet (student_profile_al is computed some time after a test)
+# are asked again sooner
+QUALIFICATION_EMPTY_TEST_TTL = float(os.getenv("QUALIFICATION_EMPTY_TEST_TTL") or 60)
+QUALIFICATION_CACHE_MAX_TESTS = int(os.getenv("QUALIFICATION_CACHE_MAX_TESTS") or 50)
+
+# Latency budget of the qualification lookup in a v3 request: past it (or while the
+# circuit breaker is open) the report is rendered with the default qualification
+# data instead of waiting. A test's query keeps running in the background up to
+# BIGQUERY_QUERY_TIMEOUT and fills the cache for later requests. The breaker opens
+# when too many recent queries failed or took longer than
+# BIGQUERY_BREAKER_SLOW_CALL_SECONDS, and then BigQuery is skipped for
+# BIGQUERY_BREAKER_OPEN_SECONDS. That threshold is well above the request budget: a
+# query fetches a whole test's rows and routinely outlasts the budget on a cold
+# cache, which is what the background fill is for, not a sign BigQuery is down.
+BIGQUERY_DEADLINE_SECONDS = float(os.getenv("BIGQUERY_DEADLINE_SECONDS") or 3.0)
+BIGQUERY_QUERY_TIMEOUT = float(os.getenv("BIGQUERY_QUERY_TIMEOUT") or 60.0)
+BIGQUERY_BREAKER_FAILURE_RATE = float(os.getenv("BIGQUERY_BREAKER_FAILURE_RATE") or 0.5)
+BIGQUERY_BREAKER_SLOW_CALL_SECONDS = float(
+    os.getenv("BIGQUERY_BREAKER_SLOW_CALL_SECONDS") or 30.0
+)
+BIGQUERY_BREAKER_OPEN_SECONDS = float(
+    os.getenv("BIGQUERY_BREAKER_OPEN_SECONDS") or 60.0
+)
+
+_bigquery_breaker = CircuitBreaker(
+    failure_rate_threshold=BIGQUERY_BREAKER_FAILURE_RATE,
+    slow_call_seconds=BIGQUERY_BREAKER_SLOW_CALL_SECONDS,
+    open_seconds=BIGQUERY_BREAKER_OPEN_SECONDS,
+)
+metrics.register_gauge("bigquery.circuit_breaker", _bigquery_breaker.snapshot)
+
+# Runs per-test qualification queries, so a request can stop waiting at its deadline
+# without abandoning the query
+_query_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bigquery")
+
+QUALIFICATION_FIELDS = (
+    "qualification_status",
+    "marks_to_qualify",
+    "chapter_curriculum",
+    "dpp_recommendation",
+)
+
+
+def default_qualification_data():
+    """
+    Qualification data shown when a student has no row (or BigQuery fails)
+    """
+    return {
+        "qualification_status": "Qualified",
+        "marks_to_qualify": None,
+        "chapter_curriculum": "",
+        "dpp_recommendation": "",
+    }
+
+
+class BigQueryUnavailable(Exception):
+    """
+    Raised instead of querying BigQuery while its circuit breaker is open
+    """
 
 
 class BigQueryDB:
-    def __init__(self, client: bigquery.Client) -> None:
+    """
+    Qualification data for v3 reports from BigQuery's student_profile_al.
+
+    params:
+        client: The BigQuery client
+        qualifications_db: Optional synced copy of the rows in DynamoDB
+            (QUALIFICATION_STORE=dynamodb), read before BigQuery: students of a
+            synced test never reach BigQuery
+    """
+
+    def __init__(
+        self,
+        client: "bigquery.Client",
+        qualifications_db: Optional["QualificationsDB"] = None,
+    ) -> None:
         self.__client = client
+        self.__qualifications_db = qualifications_db
+        # {test_id: {user_id: qualification data}}
+        self.__qualifications = ExpiringCache(maxsize=QUALIFICATION_CACHE_MAX_TESTS)
+        # {test_id: Future} of the queries running, so concurrent first views of a
+        # test share a single query
+        self.__fetches = {}
+        self.__fetches_lock = threading.Lock()
 
-    def get_student_qualification_data(self, user_id, test_id):
+    def get_qualification_rows(self, test_ids=None, timeout=None):
+        """
+        Yields the `overall` rows of student_profile_al (test_id, user_id and
+        QUALIFICATION_FIELDS) of the given tests, or of every test, ordered by
+        test_id.
+        params:
+            test_ids: The test IDs (default: all tests)
+            timeout: Seconds to wait for the query to finish (default: no limit)
+        """
+        from google.cloud import bigquery
+
+        test_filter = ""
+        query_parameters = []
+        if test_ids is not None:
+            test_filter = "AND test_id IN UNNEST(@test_ids)"
+            query_parameters.append(
+                bigquery.ArrayQueryParameter("test_ids", "STRING", list(test_ids))
+            )
         query_string = f"""
         SELECT
-            qualification_status,
-            marks_to_qualify,
-            chapter_curriculum,
-            dpp_recommendation
+            test_id,
+            user_id,
+            {", ".join(QUALIFICATION_FIELDS)}
         FROM
             avantifellows.prod_af_db.student_profile_al
         WHERE
-            user_id = '{user_id}'
-            AND test_id = '{test_id}'
-            AND section = 'overall'
-        LIMIT 1
+            section = 'overall'
+            {test_filter}
+        ORDER BY
+            test_id
         """
+        job_config = bigquery.QueryJobConfig(query_parameters=query_parameters)
+        query_job = self.__client.query(query_string, job_config=job_config)
+        for row in query_job.result(timeout=timeout):
+            yield {
+                "test_id": row["test_id"],
+                "user_id": str(row["user_id"]),
+                **{field: row[field] for field in QUALIFICATION_FIELDS},
+            }
 
+    def __fetch_test_qualifications(self, test_id):
+        """
+        Queries (in a `_query_pool` thread) and caches {user_id: qualification
+        data} of every student of a test, reporting the outcome to the circuit
+        breaker.
+        """
+        start = time.monotonic()
+        metrics.increment("bigquery.queries")
         try:
-            query_job = self.__client.query(query_string)
-            results = list(query_job.result())
-
-            if results:
-                return {
-                    "qualification_status": results[0]["qualification_status"],
-                    "marks_to_qualify": results[0]["marks_to_qualify"],
-                    "chapter_curriculum": results[0]["chapter_curriculum"],
-                    "dpp_recommendation": results[0]["dpp_recommendation"],
-                }
-            else:
-                # Default fallback data if no results
-                return {
-                    "qualification_status": "Qualified",
-                    "marks_to_qualify": None,
-                    "chapter_curriculum": "",
-                    "dpp_recommendation": "",
-                }
+            qualifications = {}
+            rows = self.get_qualification_rows(
+                [test_id], timeout=BIGQUERY_QUERY_TIMEOUT
+            )
+            for row in rows:
+                # Same as the old per-student LIMIT 1: any one row per student
+                qualifications.setdefault(
+                    row["user_id"],
+                    {field: row[field] for field in QUALIFICATION_FIELDS},
+                )
+        except Exception:
+            metrics.increment("bigquery.query_failures")
+            _bigquery_breaker.record_failure(time.monotonic() - start)
+            with self.__fetches_lock:
+                self.__fetches.pop(test_id, None)
+            raise
+        _bigquery_breaker.record_success(time.monotonic() - start)
+
+        ttl = (
+            QUALIFICATION_CACHE_TTL if qualifications else QUALIFICATION_EMPTY_TEST_TTL
+        )
+        # Cached before the future is dropped, so no request starts a second query
+        self.__qualifications.set(test_id, qualifications, ttl)
+        with self.__fetches_lock:
+            self.__fetches.pop(test_id, None)
+        return qualifications
+
+    def __get_test_qualifications(self, test_id):
+        """
+        Returns the cached qualification data of a test, or waits up to
+        BIGQUERY_DEADLINE_SECONDS for its query (joining one already running).
+        Raises TimeoutError past the deadline, BigQueryUnavailable while the
+        circuit breaker is open, and whatever the query raised.
+        """
+        qualifications = self.__qualifications.get(test_id)
+        if qualifications is not None:
+            return qualifications
+
+        with self.__fetches_lock:
+            future = self.__fetches.get(test_id)
+            if future is None:
+                qualifications = self.__qualifications.get(test_id)
+                if qualifications is not None:
+                    return qualifications
+                if not _bigquery_breaker.allow_request():
+                    raise BigQueryUnavailable()
+                future = _query_pool.submit(self.__fetch_test_qualifications, test_id)
+                self.__fetches[test_id] = future
+        return future.result(timeout=BIGQUERY_DEADLINE_SECONDS)
+
+    def get_student_qualification_data(self, user_id, test_id):
+        """
+        Returns a student's qualification status, marks to qualify and revision
+        recommendations for a test (see `default_qualification_data` when there
+        are none). Tests synced to the qualifications store are read from it;
+        otherwise the first lookup for a test fetches the whole test's rows in
+        one query, and later students of the test are served from memory. The
+        defaults are served straight away once BIGQUERY_DEADLINE_SECONDS have
+        passed, or while BigQuery's circuit breaker is open.
+        params:
+            user_id: The user ID
+            test_id: The test ID
+        """
+        if self.__qualifications_db is not None:
+            try:
+                (
+                    synced,
+                    qualification_data,
+                ) = self.__qualifications_db.get_student_qualification(test_id, user_id)
+                if synced:
+                    return qualification_data or default_qualification_data()
+            except ValueError as e:
+                print(f"Qualification store error: {str(e)}")
+
+        try:
+            qualifications = self.__get_test_qualifications(test_id)
+        except TimeoutError:
+            metrics.increment("bigquery.degraded.timeout")
+            print(f"BigQuery lookup for {test_id} exceeded its deadline")
+            return default_qualification_data()
+        except BigQueryUnavailable:
+            metrics.increment("bigquery.degraded.circuit_open")
+            return default_qualification_data()
         except Exception as e:
+            metrics.increment("bigquery.degraded.error")
             print(f"BigQuery error: {str(e)}")
             # Default fallback data in case of error
-            return {
-                "qualification_status": "Qualified",
-                "marks_to_qualify": None,
-                "chapter_curriculum": "",
-                "dpp_recommendation": "",
-            }
+            return default_qualification_data()
+
+        qualification_data = qualifications.get(str(user_id))
+        if qualification_data is None:
+            # Default fallback data if no results
+            return default_qualification_data()
+        return dict(qualification_data)
@@ -0,0 +1,121 @@
+import math
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+from boto3.resources.base import ServiceResource
+from boto3.dynamodb.conditions import Key
+
+# Item written after all of a test's rows, under this user_id: a test without it
+# hasn't been (completely) synced, so its absent students can't be assumed absent
+SYNCED_MARKER = "#synced"
+
+
+def _to_dynamodb(value):
+    # DynamoDB has no float type, and Decimal can't hold NaN / infinity
+    if isinstance(value, float):
+        return Decimal(str(value)) if math.isfinite(value) else None
+    return value
+
+
+class QualificationsDB:
+    """
+    This class is used to interact with the student_qualifications DynamoDB table:
+    a copy of the `overall` rows of BigQuery's student_profile_al, keyed by
+    (test_id, user_id), written by `qualification_sync.py`.
+    """
+
+    def __init__(self, db: ServiceResource) -> None:
+        self.__db = db
+
+    def get_student_qualification(self, test_id, user_id):
+        """
+        Returns (synced, qualification data) for a student of a test: whether
+        the test has been synced, and the student's row (None if absent).
+        params:
+            test_id: The test ID
+            user_id: The user ID
+        """
+        keys = [
+            {"test_id": test_id, "user_id": str(user_id)},
+            {"test_id": test_id, "user_id": SYNCED_MARKER},
+        ]
+        request_items = {"student_qualifications": {"Keys": keys}}
+        items = []
+        try:
+            while request_items:
+                response = self.__db.batch_get_item(RequestItems=request_items)
+                items.extend(response["Responses"].get("student_qualifications", []))
+                request_items = response.get("UnprocessedKeys")
+        except ClientError as e:
+            raise ValueError(e.response["Error"]["Message"])
+
+        synced = False
+        qualification_data = None
+        for item in items:
+            if item["user_id"] == SYNCED_MARKER:
+                synced = True
+            else:
+                qualification_data = {
+                    key: value
+                    for key, value in item.items()
+                    if key not in ("test_id", "user_id", "synced_at")
+                }
+        return synced, qualification_data
+
+    def __get_user_ids(self, table, test_id):
+        """
+        Returns the user_ids stored for a test (including the synced marker),
+        following LastEvaluatedKey.
+        """
+        user_ids = set()
+        kwargs = {
+            "KeyConditionExpression": Key("test_id").eq(test_id),
+            "ProjectionExpression": "user_id",
+        }
+        while True:
+            response = table.query(**kwargs)
+            user_ids.update(item["user_id"] for item in response.get("Items", []))
+            lek = response.get("LastEvaluatedKey")
+            if not lek:
+                return user_ids
+            kwargs["ExclusiveStartKey"] = lek
+
+    def put_test_qualifications(self, test_id, rows):
+        """
+        Writes the qualification rows of a test (dicts with user_id and the
+        qualification fields) in batches, deletes the rows of students no longer
+        among them (from an earlier sync), then writes the test's synced marker.
+        Returns the number of rows written.
+        params:
+            test_id: The test ID
+            rows: Iterable of the test's rows
+        """
+        synced_at = datetime.now(timezone.utc).isoformat()
+        table = self.__db.Table("student_qualifications")
+        count = 0
+        written_user_ids = {SYNCED_MARKER}
+        # Deduplicates rows of the same student within a batch (a batch can't
+        # write one key twice)
+        with table.batch_writer(overwrite_by_pkeys=["test_id", "user_id"]) as batch:
+            for row in rows:
+                item = {key: _to_dynamodb(value) for key, value in row.items()}
+                item.update(
+                    test_id=test_id, user_id=str(row["user_id"]), synced_at=synced_at
+                )
+                batch.put_item(Item=item)
+                written_user_ids.add(item["user_id"])
+                count += 1
+        stale_user_ids = self.__get_user_ids(table, test_id) - written_user_ids
+        with table.batch_writer() as batch:
+            for user_id in stale_user_ids:
+                batch.delete_item(Key={"test_id": test_id, "user_id": user_id})
+        table.put_item(
+            Item={
+                "test_id": test_id,
+                "user_id": SYNCED_MARKER,
+                "synced_at": synced_at,
+                "row_count": count,
+            }
+        )
+        return count
@@ -1,6 +1,8 @@
 from datetime import datetime
-from bson import ObjectId
-from pymongo import MongoClient
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pymongo import MongoClient
 
 
 class QuizDB:
@@ -8,13 +10,15 @@ class QuizDB:
     Class to handle all the database operations related to quizzes (currently stored on Mongo Atlas)
     """
 
-    def __init__(self, db: MongoClient) -> None:
+    def __init__(self, db: "MongoClient") -> None:
         self.__db = db
 
     def __generate_objectid_for_time(self, time):
         """
         Generates a Mongo object ID for a given time
         """
+        from bson import ObjectId
+
         timeId = str(ObjectId.from_datetime(time))
         return timeId
 
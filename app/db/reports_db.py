@@ -1,6 +1,71 @@
+import os
+import time
+
 from botocore.exceptions import ClientError
 from boto3.resources.base import ServiceResource
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Attr, Key
+
+# Summary GSIs for the student report listing: keyed by user_id like the full
+# indexes, but with an INCLUDE projection of only the attributes the listing shows,
+# so listing reads cost a fraction of the capacity. Created by `generate_table`
+# (keep the attribute lists in sync with generate_table/student_quiz_reports.py).
+SUMMARY_INDEX = "user_id_summary_index"
+V1_SUMMARY_ATTRIBUTES = [
+    "session_id",
+    "user_id-section",
+    "test_name",
+    "percentile",
+    "rank",
+    "start_date",
+]
+V2_SUMMARY_ATTRIBUTES = [
+    "session_id",
+    "user_id",
+    "report_header",
+    "overall_performance",
+]
+# Alternate-identifier GSIs on student_quiz_reports_v2 (KEYS_ONLY, session_id +
+# the key attribute): {identifier attribute: (index name, index key attribute)}.
+# DynamoDB rejects any write whose index key is an empty string or not of the
+# declared type, and many items have apaar_id="" (or a missing / numeric id), so the
+# indexes are keyed on `lookup_student_id` / `lookup_apaar_id`: copies set only when
+# the id is a non-empty string (by the writer, or `generate_table backfill-alt-ids`).
+ALT_ID_INDEXES = {
+    "student_id": ("session_id_student_id_index", "lookup_student_id"),
+    "apaar_id": ("session_id_apaar_id_index", "lookup_apaar_id"),
+}
+# The report writers don't set the lookup attributes yet, so a freshly published
+# session is only in the alt-id indexes once it has been backfilled; until then an
+# index miss falls back to filtering the session's partition. Set to false once the
+# writers set them, to make a miss cost one query per index.
+ALT_ID_SCAN_FALLBACK = (os.getenv("ALT_ID_SCAN_FALLBACK") or "true").lower() == "true"
+
+# After an index turns out to be missing (or still backfilling), queries skip it
+# for this long before trying it again
+MISSING_INDEX_RETRY_SECONDS = 600
+
+
+def _query_pages(table, **kwargs):
+    """
+    Runs a query and yields the items of each response page, following
+    LastEvaluatedKey (a single query response stops at 1 MB). A page is only
+    requested once the previous one has been consumed.
+    """
+    while True:
+        response = table.query(**kwargs)
+        yield response.get("Items", [])
+        lek = response.get("LastEvaluatedKey")
+        if not lek:
+            return
+        kwargs["ExclusiveStartKey"] = lek
+
+
+def _query_all(table, **kwargs):
+    """
+    Runs a query and follows LastEvaluatedKey until every matching item has been
+    read.
+    """
+    return [item for page in _query_pages(table, **kwargs) for item in page]
 
 
 class ReportsDB:
@@ -10,6 +75,63 @@ class ReportsDB:
 
     def __init__(self, db: ServiceResource) -> None:
         self.__db = db
+        # {(table name, index name): when the index was found missing}
+        self.__missing_indexes = {}
+
+    def __query_index(self, table_name, index_name, **kwargs):
+        """
+        Queries a GSI that may not exist (or still be backfilling) yet, following
+        pagination. Returns None if the index isn't usable; it is then skipped for
+        MISSING_INDEX_RETRY_SECONDS.
+        """
+        missing_since = self.__missing_indexes.get((table_name, index_name))
+        if (
+            missing_since is not None
+            and time.monotonic() - missing_since <= MISSING_INDEX_RETRY_SECONDS
+        ):
+            return None
+        try:
+            items = _query_all(
+                self.__db.Table(table_name), IndexName=index_name, **kwargs
+            )
+        except ClientError as e:
+            # DynamoDB answers ValidationException for an unknown (or not yet
+            # ACTIVE) index; DynamoDB Local and moto answer ResourceNotFound
+            if e.response["Error"]["Code"] not in (
+                "ValidationException",
+                "ResourceNotFoundException",
+            ):
+                raise
+            print(
+                f"{index_name} not usable on {table_name}: "
+                f"{e.response['Error']['Message']}"
+            )
+            self.__missing_indexes[(table_name, index_name)] = time.monotonic()
+            return None
+        self.__missing_indexes.pop((table_name, index_name), None)
+        return items
+
+    def __query_summaries(self, table_name, full_index, attributes, user_id):
+        """
+        Queries the summary index of `table_name` for a user's reports, or, if the
+        table has none yet, `full_index` with a ProjectionExpression (which only
+        saves transfer: read capacity is charged on full items).
+        """
+        key_condition = Key("user_id").eq(user_id)
+        items = self.__query_index(
+            table_name, SUMMARY_INDEX, KeyConditionExpression=key_condition
+        )
+        if items is not None:
+            return items
+
+        names = {f"#a{i}": attribute for i, attribute in enumerate(attributes)}
+        return _query_all(
+            self.__db.Table(table_name),
+            IndexName=full_index,
+            KeyConditionExpression=key_condition,
+            ProjectionExpression=", ".join(names),
+            ExpressionAttributeNames=names,
+        )
 
     def get_all(self):
         table = self.__db.Table("student_quiz_reports")
@@ -33,34 +155,34 @@ class ReportsDB:
         except ClientError as e:
             raise ValueError(e.response["Error"]["Message"])
 
-    def get_student_reports(self, user_id):
+    def get_student_report_summaries(self, user_id):
         """
-        Returns all student reports for a given user ID.
+        Returns the listing fields (V1_SUMMARY_ATTRIBUTES) of every v1 report
+        section of a user.
         params:
             user_id: The user ID
         """
         try:
-            table = self.__db.Table("student_quiz_reports")
-            response = table.query(
-                IndexName="gsi_user_id",
-                KeyConditionExpression=Key("user_id").eq(user_id),
+            return self.__query_summaries(
+                "student_quiz_reports", "gsi_user_id", V1_SUMMARY_ATTRIBUTES, user_id
             )
-            return response["Items"]
         except ClientError:
             return []
 
-    def get_student_reports_v2(self, user_id):
+    def get_student_report_summaries_v2(self, user_id):
         """
-        Returns all student reports from the v2 table for a given user ID.
-        Uses the user_id_index GSI.
+        Returns the listing fields (V2_SUMMARY_ATTRIBUTES) of every v2 report of
+        a user.
+        params:
+            user_id: The user ID
         """
         try:
-            table = self.__db.Table("student_quiz_reports_v2")
-            response = table.query(
-                IndexName="user_id_index",
-                KeyConditionExpression=Key("user_id").eq(user_id),
+            return self.__query_summaries(
+                "student_quiz_reports_v2",
+                "user_id_index",
+                V2_SUMMARY_ATTRIBUTES,
+                user_id,
             )
-            return response["Items"]
         except ClientError:
             return []
 
@@ -82,12 +204,60 @@ class ReportsDB:
         except ClientError as e:
             raise ValueError(e.response["Error"]["Message"])
 
+    def get_session_quiz_report_pages_v2(self, session_id):
+        """
+        Yields the reports in the v2 table for a given session ID one query page
+        (up to 1 MB) at a time, so a whole class is never held in memory. Each
+        page is queried when the previous one has been consumed; iterate it with
+        `utils.concurrency.iterate_pages` from async code.
+        params:
+            session_id: The session ID
+        """
+        try:
+            table = self.__db.Table("student_quiz_reports_v2")
+            yield from _query_pages(
+                table, KeyConditionExpression=Key("session_id").eq(session_id)
+            )
+        except ClientError as e:
+            raise ValueError(e.response["Error"]["Message"])
+
+    def get_session_quiz_reports_v2_batch(self, session_id, limit, after=None):
+        """
+        Returns (reports, has_more): up to `limit` reports in the v2 table for a
+        given session ID, in user_id order, starting after user_id `after`, and
+        whether more reports follow.
+        params:
+            session_id: The session ID
+            limit: Maximum number of reports
+            after: The user_id of the last report of the previous batch
+        """
+        kwargs = {
+            "KeyConditionExpression": Key("session_id").eq(session_id),
+            # One more than asked for, to tell whether another batch follows
+            "Limit": limit + 1,
+        }
+        if after is not None:
+            kwargs["ExclusiveStartKey"] = {"session_id": session_id, "user_id": after}
+        reports = []
+        try:
+            table = self.__db.Table("student_quiz_reports_v2")
+            for page in _query_pages(table, **kwargs):
+                reports.extend(page)
+                if len(reports) > limit:
+                    break
+                # A page can stop at 1 MB before the limit
+                kwargs["Limit"] = limit + 1 - len(reports)
+        except ClientError as e:
+            raise ValueError(e.response["Error"]["Message"])
+        return reports[:limit], len(reports) > limit
+
     def get_student_quiz_report_v2_by_alt_id(self, identifier, session_id):
         """
-        Returns a student quiz report from the v2 table by querying the
-        session_id partition and filtering for matching student_id or apaar_id.
-        Empty apaar_id values are excluded from the apaar_id match since many
-        records have apaar_id="".
+        Returns a student quiz report from the v2 table whose student_id or
+        apaar_id (in that order of preference) is `identifier`, looked up through
+        the alt-id indexes (ALT_ID_INDEXES): one keyed query per index. Falls
+        back to filtering the session_id partition when an index is missing, or,
+        with ALT_ID_SCAN_FALLBACK, when the indexes have no match.
         params:
             identifier: The student_id or apaar_id to match (must be non-empty)
             session_id: The session ID
@@ -97,22 +267,44 @@ class ReportsDB:
         if not identifier:
             return None
         try:
-            table = self.__db.Table("student_quiz_reports_v2")
-            kwargs = dict(
-                KeyConditionExpression=Key("session_id").eq(session_id),
-                FilterExpression=(
-                    "student_id = :id OR (apaar_id = :id AND apaar_id <> :empty)"
-                ),
-                ExpressionAttributeValues={":id": identifier, ":empty": ""},
-            )
-            while True:
-                response = table.query(**kwargs)
-                items = response.get("Items", [])
-                if items:
-                    return items[0]
-                lek = response.get("LastEvaluatedKey")
-                if not lek:
-                    return None
-                kwargs["ExclusiveStartKey"] = lek
+            indexed = True
+            for index_name, key_attribute in ALT_ID_INDEXES.values():
+                items = self.__query_index(
+                    "student_quiz_reports_v2",
+                    index_name,
+                    KeyConditionExpression=Key("session_id").eq(session_id)
+                    & Key(key_attribute).eq(identifier),
+                )
+                if items is None:
+                    indexed = False
+                elif items:
+                    return self.get_student_quiz_report_v2(
+                        items[0]["user_id"], session_id
+                    )
+            if indexed and not ALT_ID_SCAN_FALLBACK:
+                return None
+            return self.__scan_session_for_alt_id(identifier, session_id)
         except ClientError as e:
             raise ValueError(e.response["Error"]["Message"])
+
+    def __scan_session_for_alt_id(self, identifier, session_id):
+        """
+        Queries the whole session_id partition of the v2 table, filtering for a
+        matching student_id or apaar_id (empty apaar_ids never match, since many
+        records have apaar_id=""). Stops at the first page with a match.
+        """
+        table = self.__db.Table("student_quiz_reports_v2")
+        kwargs = dict(
+            KeyConditionExpression=Key("session_id").eq(session_id),
+            FilterExpression=Attr("student_id").eq(identifier)
+            | (Attr("apaar_id").eq(identifier) & Attr("apaar_id").ne("")),
+        )
+        while True:
+            response = table.query(**kwargs)
+            items = response.get("Items", [])
+            if items:
+                return items[0]
+            lek = response.get("LastEvaluatedKey")
+            if not lek:
+                return None
+            kwargs["ExclusiveStartKey"] = lek
@@ -1,9 +1,7 @@
 from dotenv import load_dotenv
-from google.cloud import firestore
 import os
 import json
 import base64
-from google.cloud.firestore_v1.base_query import FieldFilter
 
 
 class SessionsDB:
@@ -13,6 +11,9 @@ class SessionsDB:
     """
 
     def __init__(self) -> None:
+        # Imported here so that only live session reports pay for the Firestore SDK
+        from google.cloud import firestore
+
         # Import the environment variables (not needed for prod as it will be in GH secrets)
         if "FIRESTORE_CREDENTIALS" not in os.environ:
             load_dotenv("../../.env.local")
@@ -26,6 +27,8 @@ class SessionsDB:
         """
         Returns a quiz session for a given session ID.
         """
+        from google.cloud.firestore_v1.base_query import FieldFilter
+
         # Create a query against the collection
         sessions_ref = self.__db.collection(self.__collection_name)
         query = sessions_ref.where(
@@ -0,0 +1,166 @@
+"""
+Content-addressed stores for generated report artifacts (e.g. PDFs).
+
+Keys are hex digests of the content that produced the artifact, so an entry never
+goes stale and can be shared by every Lambda container. Store failures are logged
+and treated as misses: a broken cache must never break report serving.
+"""
+import os
+import tempfile
+import threading
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0
+
+
+class DiskArtifactStore:
+    """
+    Least-recently-used store in a local directory (e.g. Lambda's /tmp), capped at
+    `max_bytes`. Reads touch the file's mtime; writes evict the oldest files.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.__directory = directory
+        self.__max_bytes = max_bytes
+        self.__lock = threading.Lock()
+        # {path: size}, loaded from the directory on first use
+        self.__sizes = None
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.__directory, *key.split("/"))
+
+    def __load_sizes(self) -> dict:
+        if self.__sizes is None:
+            self.__sizes = {}
+            for root, _, files in os.walk(self.__directory):
+                for file_name in files:
+                    path = os.path.join(root, file_name)
+                    self.__sizes[path] = os.path.getsize(path)
+        return self.__sizes
+
+    def __evict(self) -> None:
+        sizes = self.__load_sizes()
+        total = sum(sizes.values())
+        if total <= self.__max_bytes:
+            return
+        for path in sorted(sizes, key=_mtime):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= sizes.pop(path)
+            if total <= self.__max_bytes:
+                return
+
+    def get(self, key: str):
+        path = self.__path(key)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+            os.utime(path)
+            return content
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"Could not read artifact {key} from disk: {e!r}")
+            return None
+
+    def put(self, key: str, content: bytes, content_type: str) -> None:
+        if len(content) > self.__max_bytes:
+            return
+        path = self.__path(key)
+        temp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first so readers never see a partial artifact
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Could not write artifact {key} to disk: {e!r}")
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            return
+        with self.__lock:
+            self.__load_sizes()[path] = len(content)
+            self.__evict()
+
+
+class S3ArtifactStore:
+    """
+    Store in an S3 bucket (or any S3-compatible server via `endpoint_url`, e.g. a
+    local MinIO or moto server during development).
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url=None) -> None:
+        self.__bucket = bucket
+        self.__prefix = prefix
+        self.__endpoint_url = endpoint_url
+        self.__lock = threading.Lock()
+        self.__client = None
+
+    def __get_client(self):
+        if self.__client is None:
+            with self.__lock:
+                if self.__client is None:
+                    import boto3
+
+                    self.__client = boto3.client("s3", endpoint_url=self.__endpoint_url)
+        return self.__client
+
+    def get(self, key: str):
+        try:
+            response = self.__get_client().get_object(
+                Bucket=self.__bucket, Key=self.__prefix + key
+            )
+            return response["Body"].read()
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in ("NoSuchKey", "404"):
+                print(f"Could not read artifact {key} from S3: {e!r}")
+            return None
+        except BotoCoreError as e:
+            print(f"Could not read artifact {key} from S3: {e!r}")
+            return None
+
+    def put(self, key: str, content: bytes, content_type: str) -> None:
+        try:
+            self.__get_client().put_object(
+                Bucket=self.__bucket,
+                Key=self.__prefix + key,
+                Body=content,
+                ContentType=content_type,
+            )
+        except (ClientError, BotoCoreError) as e:
+            print(f"Could not write artifact {key} to S3: {e!r}")
+
+
+def create_artifact_store(backend: str, **options):
+    """
+    params:
+        backend: "disk", "s3", or "none"/"" to disable caching
+        options: `directory` and `max_bytes` for disk; `bucket`, `prefix` and
+            `endpoint_url` for s3
+
+    Returns None when caching is disabled.
+    """
+    if not backend or backend == "none":
+        return None
+    if backend == "disk":
+        return DiskArtifactStore(options["directory"], options["max_bytes"])
+    if backend == "s3":
+        return S3ArtifactStore(
+            options["bucket"],
+            prefix=options.get("prefix", ""),
+            endpoint_url=options.get("endpoint_url"),
+        )
+    raise ValueError(f"Unknown artifact store backend: {backend}")
@@ -0,0 +1,79 @@
+import threading
+import time
+
+
+class ClientRegistry:
+    """
+    Registry of backend clients that are built on first use and then reused for
+    the lifetime of the process (i.e. across warm Lambda invocations).
+    """
+
+    def __init__(self) -> None:
+        self.__factories = {}
+        self.__locks = {}
+        self.__clients = {}
+        self.__timings = {}
+
+    def register(self, name, factory):
+        """
+        Registers (or replaces) the factory used to build a client.
+        params:
+            name: The name the client is looked up by
+            factory: Zero-argument callable returning the client
+        """
+        self.__factories[name] = factory
+        self.__locks[name] = threading.Lock()
+        self.__clients.pop(name, None)
+        self.__timings.pop(name, None)
+
+    def get(self, name):
+        """
+        Returns the client registered under `name`, building it on first use.
+        Sync endpoints run in a threadpool, so initialization is guarded by a
+        per-client lock (a slow BigQuery init never blocks DynamoDB users).
+        """
+        if name in self.__clients:
+            return self.__clients[name]
+
+        with self.__locks[name]:
+            if name not in self.__clients:
+                start = time.perf_counter()
+                client = self.__factories[name]()
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                self.__timings[name] = elapsed_ms
+                self.__clients[name] = client
+                print(f"Initialized {name} client in {elapsed_ms:.1f} ms")
+        return self.__clients[name]
+
+    def lazy(self, name):
+        """
+        Returns a proxy for the client that is only built when first used.
+        """
+        return LazyClient(self, name)
+
+    def is_initialized(self, name):
+        return name in self.__clients
+
+    @property
+    def timings(self):
+        """
+        Init time (in ms) of every client built so far in this process.
+        """
+        return dict(self.__timings)
+
+
+class LazyClient:
+    """
+    Stand-in for a registry client. DB wrappers and routers hold on to this
+    object; the real client is built on the first attribute access.
+    """
+
+    def __init__(self, registry: ClientRegistry, name: str) -> None:
+        self._registry = registry
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._registry.get(self._name), attr)
+
+    def __repr__(self):
+        return f"<LazyClient {self._name}>"
@@ -0,0 +1,167 @@
+"""
+Response compression (brotli or gzip, whichever the client prefers and is
+available) for text responses such as rendered reports and JSON.
+"""
+import gzip
+import os
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Responses smaller than this aren't worth the CPU (or the extra headers)
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES") or 1024)
+
+COMPRESSIBLE_MEDIA_TYPES = {
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+    "image/vnd.microsoft.icon",
+    "image/x-icon",
+    "text/css",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+}
+
+# Levels for compressing responses on the fly; static assets are compressed once per
+# process, so they get the strongest settings
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def is_compressible(media_type) -> bool:
+    if not media_type:
+        return False
+    return media_type.split(";", 1)[0].strip().lower() in COMPRESSIBLE_MEDIA_TYPES
+
+
+def choose_encoding(accept_encoding: str):
+    """
+    Returns the preferred encoding of SUPPORTED_ENCODINGS that the Accept-Encoding
+    header allows, or None for an uncompressed response.
+    """
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    best = None
+    for encoding in SUPPORTED_ENCODINGS:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > 0 and (best is None or quality > qualities.get(best, 0.0)):
+            best = encoding
+    return best
+
+
+def compress(content: bytes, encoding: str, static: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(
+            content, quality=STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY
+        )
+    return gzip.compress(
+        content, compresslevel=STATIC_GZIP_LEVEL if static else GZIP_LEVEL, mtime=0
+    )
+
+
+def representation_etag(etag: str, encoding) -> str:
+    """
+    Returns the ETag of the `encoding` representation of a response: a strong
+    ETag has to differ between byte-wise different representations.
+    """
+    if not encoding or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def strip_representation(etag: str) -> str:
+    """
+    Reverses `representation_etag`, so an If-None-Match sent for a compressed
+    representation matches the ETag of the content.
+    """
+    for encoding in SUPPORTED_ENCODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[: -len(suffix)] + '"'
+    return etag
+
+
+def _add_vary(headers: MutableHeaders) -> None:
+    vary = headers.get("vary")
+    if not vary:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+class CompressionMiddleware:
+    """
+    Compresses complete (single-message) text responses of at least
+    `minimum_size` bytes. Streamed responses (PDFs, zips), responses that already
+    carry a Content-Encoding, and non-text media types are passed through.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start_message = None
+
+        async def send_compressed(message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if start_message is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            if not is_compressible(headers.get("content-type")) or (
+                "content-encoding" in headers
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            _add_vary(headers)
+            if (
+                encoding is None
+                or message.get("more_body", False)
+                or len(body) < self.minimum_size
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            if "etag" in headers:
+                headers["ETag"] = representation_etag(headers["etag"], encoding)
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,10 +1,6 @@
-import boto3
 from dotenv import load_dotenv
 import os
-from pymongo import MongoClient
 import json
-from google.oauth2 import service_account
-from google.cloud import bigquery
 
 # when running app locally -- use load_dotenv
 # when running app via gh actions -- variables already exist via secrets
@@ -26,7 +22,13 @@ if not all(
     load_dotenv("../.env.local")
 
 
+# SDKs are imported inside each initializer, so a cold start only loads the
+# SDKs of the clients the first request actually builds (see ClientRegistry).
+
+
 def initialize_reports_db():
+    import boto3
+
     ddb = boto3.resource(
         "dynamodb",
         endpoint_url=os.getenv("DYNAMODB_URL"),
@@ -39,11 +41,17 @@ def initialize_reports_db():
 
 
 def initialize_quiz_db():
+    from pymongo import MongoClient
+
     quiz_db = MongoClient(os.getenv("MONGO_AUTH_CREDENTIALS"))
     return quiz_db
 
 
 def initialize_bigquery():
+    import boto3
+    from google.oauth2 import service_account
+    from google.cloud import bigquery
+
     secret_name = os.environ.get("BQ_CREDENTIALS_SECRET_NAME")
     client = boto3.client(
         "secretsmanager"
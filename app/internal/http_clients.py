@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+import httpx
+
+
+class HttpClientPool:
+    """
+    Keep-alive httpx clients shared across requests to one upstream service.
+
+    Sync endpoints run in FastAPI's threadpool and use the shared `httpx.Client`;
+    async endpoints use an `httpx.AsyncClient`. An AsyncClient is bound to the
+    event loop it was first used on, so one is kept per running loop (Mangum and
+    uvicorn both reuse a single loop, so in practice there is exactly one).
+
+    An AsyncClient can only be closed on its own loop: when another loop takes
+    over, the previous client is closed there if that loop is still open. Code
+    that runs its own short-lived loop (e.g. `asyncio.run` in a Lambda handler)
+    must `await aclose()` before the loop ends, or the client's connections are
+    only released by garbage collection.
+    """
+
+    def __init__(self, **client_kwargs) -> None:
+        self.__client_kwargs = client_kwargs
+        self.__lock = threading.Lock()
+        self.__client = None
+        self.__async_client = None
+        self.__async_client_loop = None
+
+    def get_client(self) -> httpx.Client:
+        if self.__client is None:
+            with self.__lock:
+                if self.__client is None:
+                    self.__client = httpx.Client(**self.__client_kwargs)
+        return self.__client
+
+    def get_async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self.__async_client is None or self.__async_client_loop is not loop:
+            self.__discard_async_client()
+            self.__async_client = httpx.AsyncClient(**self.__client_kwargs)
+            self.__async_client_loop = loop
+        return self.__async_client
+
+    def __discard_async_client(self) -> None:
+        client, loop = self.__async_client, self.__async_client_loop
+        self.__async_client = None
+        self.__async_client_loop = None
+        if client is not None and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    async def aclose(self) -> None:
+        """
+        Closes the running loop's AsyncClient (a later call opens a new one).
+        """
+        if self.__async_client_loop is asyncio.get_running_loop():
+            client = self.__async_client
+            self.__async_client = None
+            self.__async_client_loop = None
+            await client.aclose()
@@ -3,9 +3,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from mangum import Mangum
 from db.sessions_db import SessionsDB
 from db.quiz_db import QuizDB
-from db.bq_db import BigQueryDB
+from db.bq_db import QUALIFICATION_STORE, BigQueryDB
+from db.qualifications_db import QualificationsDB
 from routers.session_quiz_reports import SessionQuizReportsRouter
 
+from internal.clients import ClientRegistry
 from internal.db import initialize_quiz_db, initialize_reports_db, initialize_bigquery
 
 from db.reports_db import ReportsDB
@@ -13,15 +15,22 @@ from db.form_responses_db import FormResponsesDB
 from routers.student_quiz_reports import StudentQuizReportsRouter
 from routers.form_responses import FormResponsesRouter
 
-from fastapi.staticfiles import StaticFiles
+from internal.compression import CompressionMiddleware
+from utils.static_assets import StaticAssetFiles
+from utils.metrics import metrics
+from utils.templates import TEMPLATE_WARMUP, warm_up_templates
 
 app = FastAPI()
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", StaticAssetFiles(), name="static")
 
-reports_db = initialize_reports_db()
-quiz_db = initialize_quiz_db()
-bq_db = initialize_bigquery()
+# Backend clients are built on first use (and reused across warm invocations),
+# so a cold start only pays for the backends the first request actually needs.
+clients = ClientRegistry()
+clients.register("dynamodb", initialize_reports_db)
+clients.register("mongo", initialize_quiz_db)
+clients.register("bigquery", initialize_bigquery)
+clients.register("sessions_db", SessionsDB)
 
 origins = [
     "http://localhost:3000",  # gurukul localhost
@@ -36,13 +45,22 @@ app.add_middleware(
     allow_origins=origins,
     allow_methods=["*"],
     allow_headers=["*"],
+    # The PDF export links its next batch in the Link header
+    expose_headers=["Link"],
 )
+# Added last so it wraps everything: compresses the final HTML/JSON response
+app.add_middleware(CompressionMiddleware)
 
-student_quiz_reports_db = ReportsDB(reports_db)
-form_responses_db = FormResponsesDB(reports_db)
-quiz_db = QuizDB(quiz_db)
-bq_db = BigQueryDB(bq_db)
-sessions_db = SessionsDB()
+student_quiz_reports_db = ReportsDB(clients.lazy("dynamodb"))
+form_responses_db = FormResponsesDB(clients.lazy("dynamodb"))
+quiz_db = QuizDB(clients.lazy("mongo"))
+qualifications_db = (
+    QualificationsDB(clients.lazy("dynamodb"))
+    if QUALIFICATION_STORE == "dynamodb"
+    else None
+)
+bq_db = BigQueryDB(clients.lazy("bigquery"), qualifications_db=qualifications_db)
+sessions_db = clients.lazy("sessions_db")
 
 student_quiz_reports_router = StudentQuizReportsRouter(
     reports_db=student_quiz_reports_db, bq_db=bq_db
@@ -54,10 +72,25 @@ app.include_router(student_quiz_reports_router.router)
 app.include_router(form_responses_router.router)
 app.include_router(quiz_reports_router.router)
 
+# Compile the report templates during container init rather than on first use
+if TEMPLATE_WARMUP:
+    warm_up_templates()
+
 
 @app.get("/")
 def index():
     return "Hello World! Welcome to Reporting Engine!"
 
 
+@app.get("/metrics")
+def get_metrics():
+    """
+    Counters and gauges of this container (PDF render gate and circuit breaker,
+    backend client init times).
+    """
+    snapshot = metrics.snapshot()
+    snapshot["client_init_ms"] = clients.timings
+    return snapshot
+
+
 handler = Mangum(app)
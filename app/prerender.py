@@ -0,0 +1,154 @@
+"""
+Pre-renders v2 student quiz reports for whole sessions ahead of time, so the
+rush of students opening their reports right after results are published is
+served from the pre-render store (and the PDF cache) instead of DynamoDB +
+Jinja + the PDF service.
+
+For every student in a session this stores the display page (with and without
+the quiz review link), the print page, and the PDF of the print page. PDFs are
+only pre-rendered with PDF_CACHE_BACKEND=s3: any other PDF cache is local to the
+worker, where the report endpoint would never find them.
+
+Lambda: `prerender.handler` with {"session_id": "..."} or {"session_ids": [...]}
+(and optionally "skip_pdf": true).
+CLI (from `app/`): python prerender.py <session_id> [<session_id> ...] [--skip-pdf]
+"""
+import argparse
+import asyncio
+import copy
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from db.reports_db import ReportsDB
+from internal.db import initialize_reports_db
+from routers.student_quiz_reports import prepare_v2_report
+from utils.concurrency import iterate_pages, map_bounded
+from utils.pdf_converter import (
+    PDF_CACHE_BACKEND,
+    close_pdf_service_clients,
+    fetch_pdf,
+    inline_static_assets,
+)
+from utils.prerendered_reports import (
+    DISPLAY,
+    DISPLAY_WITH_REVIEW_LINK,
+    LAUNCH_TOKEN_PLACEHOLDER,
+    PRINT,
+    VARIANT_TEMPLATES,
+    prerendered_reports,
+)
+from utils.templates import templates
+
+# Students rendered at once (each may be waiting on the PDF service)
+PRERENDER_CONCURRENCY = 8
+
+
+def _build_request(session_id: str, launch_token=None) -> Request:
+    """
+    Stand-in for the incoming request the report templates are rendered with.
+    """
+    request = Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": f"/reports/student_quiz_report/{session_id}",
+            "headers": [],
+            "query_string": b"",
+        }
+    )
+    request.state.report_launch_token = launch_token
+    return request
+
+
+def _render_variant(session_id: str, report: dict, variant: str) -> str:
+    launch_token = (
+        LAUNCH_TOKEN_PLACEHOLDER if variant == DISPLAY_WITH_REVIEW_LINK else None
+    )
+    request = _build_request(session_id, launch_token)
+    report = prepare_v2_report(request, session_id, copy.deepcopy(report))
+    template_response = templates.TemplateResponse(
+        VARIANT_TEMPLATES[variant], {"request": request, "report": report}
+    )
+    return template_response.body.decode("utf-8")
+
+
+def _render_and_store(session_id: str, report: dict) -> str:
+    """
+    Renders and stores every HTML variant; returns the print page.
+    """
+    for variant in (DISPLAY, DISPLAY_WITH_REVIEW_LINK, PRINT):
+        html_content = _render_variant(session_id, report, variant)
+        prerendered_reports.put(session_id, report, variant, html_content)
+    return html_content
+
+
+async def prerender_session(reports_db: ReportsDB, session_id: str, skip_pdf=False):
+    """
+    Pre-renders every v2 report of a session.
+
+    Returns:
+        dict: Number of reports rendered and the user IDs whose PDF failed.
+    """
+    reports = iterate_pages(reports_db.get_session_quiz_report_pages_v2(session_id))
+
+    async def prerender_report(report):
+        print_html = await run_in_threadpool(_render_and_store, session_id, report)
+        if skip_pdf:
+            return report, True
+        # The PDF lands in the PDF cache, keyed by the same HTML the endpoint produces
+        pdf = await fetch_pdf(inline_static_assets(print_html))
+        return report, pdf is not None
+
+    rendered = 0
+    failed_pdfs = []
+    async for report, pdf_ok in map_bounded(
+        prerender_report, reports, PRERENDER_CONCURRENCY
+    ):
+        rendered += 1
+        if not pdf_ok:
+            failed_pdfs.append(report["user_id"])
+
+    print(
+        f"Pre-rendered {rendered} reports for session {session_id} "
+        f"({len(failed_pdfs)} PDFs failed)"
+    )
+    return {"reports": rendered, "failed_pdfs": failed_pdfs}
+
+
+async def prerender_sessions(session_ids, skip_pdf=False):
+    if prerendered_reports is None:
+        raise RuntimeError("Pre-rendering is disabled; set PRERENDER_STORE_BACKEND")
+    if not skip_pdf and PDF_CACHE_BACKEND != "s3":
+        print(f"Skipping PDFs: the {PDF_CACHE_BACKEND} PDF cache isn't shared")
+        skip_pdf = True
+    reports_db = ReportsDB(initialize_reports_db())
+    results = {}
+    try:
+        for session_id in session_ids:
+            results[session_id] = await prerender_session(
+                reports_db, session_id, skip_pdf=skip_pdf
+            )
+    finally:
+        # Runs in its own asyncio.run loop, which ends on return
+        await close_pdf_service_clients()
+    return results
+
+
+def handler(event, context):
+    session_ids = event.get("session_ids") or [event["session_id"]]
+    return asyncio.run(
+        prerender_sessions(session_ids, skip_pdf=event.get("skip_pdf", False))
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Pre-render v2 student quiz reports for sessions"
+    )
+    parser.add_argument("session_ids", nargs="+")
+    parser.add_argument(
+        "--skip-pdf", action="store_true", help="Only pre-render the HTML pages"
+    )
+    args = parser.parse_args()
+    print(asyncio.run(prerender_sessions(args.session_ids, skip_pdf=args.skip_pdf)))
@@ -0,0 +1,65 @@
+"""
+Copies the `overall` rows of BigQuery's student_profile_al into the
+student_qualifications DynamoDB table (create it with
+`python generate_table create-qualifications-table`), so v3 reports read
+qualification data without BigQuery when QUALIFICATION_STORE=dynamodb.
+
+Run it for a test once its student_profile_al rows are computed (and again if
+they are recomputed: rows of students no longer in BigQuery are deleted); each
+test gets a synced marker after its last row, and until then its reports keep
+using BigQuery.
+
+Lambda: `qualification_sync.handler` with {"test_id": "..."}, {"test_ids": [...]}
+or {"all": true}.
+CLI (from `app/`): python qualification_sync.py <test_id> [<test_id> ...] | --all
+"""
+import argparse
+import itertools
+
+from db.bq_db import BigQueryDB
+from db.qualifications_db import QualificationsDB
+from internal.db import initialize_bigquery, initialize_reports_db
+
+
+def sync_qualifications(
+    bq_db: BigQueryDB, qualifications_db: QualificationsDB, test_ids=None
+):
+    """
+    Copies the qualification rows of the given tests (default: every test) from
+    BigQuery to the qualifications store, one BigQuery query for all of them.
+    Returns {test_id: number of rows written}; tests without rows are left
+    unsynced.
+    """
+    results = {}
+    rows = bq_db.get_qualification_rows(test_ids)
+    for test_id, test_rows in itertools.groupby(rows, key=lambda row: row["test_id"]):
+        results[test_id] = qualifications_db.put_test_qualifications(
+            test_id,
+            ({k: v for k, v in row.items() if k != "test_id"} for row in test_rows),
+        )
+        print(f"Synced {results[test_id]} qualification rows of {test_id}")
+    return results
+
+
+def _sync(test_ids=None):
+    bq_db = BigQueryDB(initialize_bigquery())
+    qualifications_db = QualificationsDB(initialize_reports_db())
+    return sync_qualifications(bq_db, qualifications_db, test_ids)
+
+
+def handler(event, context):
+    if event.get("all"):
+        return _sync()
+    return _sync(event.get("test_ids") or [event["test_id"]])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Copy student_profile_al qualification rows to DynamoDB"
+    )
+    parser.add_argument("test_ids", nargs="*")
+    parser.add_argument("--all", action="store_true", help="Sync every test")
+    args = parser.parse_args()
+    if not args.all and not args.test_ids:
+        parser.error("give test IDs or --all")
+    print(_sync(None if args.all else args.test_ids))
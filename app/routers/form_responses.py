@@ -1,14 +1,14 @@
 from fastapi import APIRouter, Request, HTTPException
-from fastapi.templating import Jinja2Templates
 from typing import Optional
 import asyncio
 from db.form_responses_db import FormResponsesDB
-from utils.pdf_converter import convert_template_to_pdf
+from utils.pdf_converter import convert_template_to_pdf_async
+from utils.templates import templates
 from utils.llm_summary import generate_theme_summary
 from utils.report_launch import (
     get_report_launch_token,
-    redirect_with_launch_cookie,
-    resolve_report_user_id,
+    redirect_with_launch_cookie_async,
+    resolve_report_user_id_async,
 )
 
 
@@ -19,7 +19,7 @@ class FormResponsesRouter:
 
     def __init__(self, form_responses_db: FormResponsesDB) -> None:
         self.__form_responses_db = form_responses_db
-        self._templates = Jinja2Templates(directory="templates")
+        self._templates = templates
 
     @property
     def router(self):
@@ -34,7 +34,7 @@ class FormResponsesRouter:
             debug: bool = False,
         ):
             if launchToken:
-                return redirect_with_launch_cookie(
+                return await redirect_with_launch_cookie_async(
                     request=request,
                     session_id=session_id,
                     launch_token=launchToken,
@@ -42,7 +42,7 @@ class FormResponsesRouter:
                     clean_path=f"/reports/form_responses/{session_id}",
                 )
 
-            resolved_user_id = resolve_report_user_id(
+            resolved_user_id = await resolve_report_user_id_async(
                 None,
                 get_report_launch_token(
                     request=request,
@@ -98,7 +98,9 @@ class FormResponsesRouter:
                         "error.html", {"request": request, "error_data": error_data}
                     )
                     if format == "pdf":
-                        return convert_template_to_pdf(template_response, debug=debug)
+                        return await convert_template_to_pdf_async(
+                            template_response, debug=debug
+                        )
                     return template_response
 
                 # Process and group form responses by theme
@@ -199,7 +201,9 @@ class FormResponsesRouter:
                 )
 
                 if format == "pdf":
-                    return convert_template_to_pdf(template_response, debug=debug)
+                    return await convert_template_to_pdf_async(
+                        template_response, debug=debug
+                    )
 
                 return template_response
 
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.templating import Jinja2Templates
 from db.sessions_db import SessionsDB
 from db.quiz_db import QuizDB
 from typing import Optional
 from utils.pdf_converter import convert_template_to_pdf
+from utils.templates import templates
 
 
 class SessionQuizReportsRouter:
@@ -14,12 +14,11 @@ class SessionQuizReportsRouter:
     def __init__(self, quiz_db: QuizDB, sessions_db: SessionsDB) -> None:
         self.__quiz_db = quiz_db
         self.__sessions_db = sessions_db
-        self._templates = Jinja2Templates(directory="templates")
+        self._templates = templates
 
     @property
     def router(self):
         api_router = APIRouter(prefix="/reports", tags=["reports"])
-        self._templates = Jinja2Templates(directory="templates")
 
         @api_router.get("/live_session_report/{session_id}")
         def get_live_session_report(
@@ -1,15 +1,43 @@
-import json
+import os
+import re
 from collections import OrderedDict
 from typing import Union, Optional
 from urllib.parse import unquote, quote
 
 from fastapi import APIRouter, Request
-from fastapi.templating import Jinja2Templates
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi import HTTPException, Depends
+from starlette.concurrency import run_in_threadpool
+from auth import verify_staff_token
 from db.reports_db import ReportsDB
 from db.bq_db import BigQueryDB
 from fastapi.security.api_key import APIKeyHeader
-from utils.pdf_converter import convert_template_to_pdf
+from utils.cache import ExpiringCache
+from utils.chapter_links import (
+    DEFAULT_PRIORITY,
+    PRIORITY_RANKS,
+    chapter_code,
+    chapter_links,
+)
+from utils.concurrency import call_concurrently, map_bounded
+from utils.etags import ReportValidators, fingerprint_files
+from utils.pdf_converter import (
+    convert_template_to_pdf,
+    fetch_pdf,
+    inline_static_assets,
+)
+from utils.prerendered_reports import (
+    DISPLAY,
+    DISPLAY_WITH_REVIEW_LINK,
+    PRINT,
+    fill_launch_token,
+    prerendered_reports,
+)
+from utils.report_locations import NOT_FOUND, V1, V2, ReportLocations
+from utils.static_assets import STATIC_DIR
+from utils.templates import TEMPLATE_DIR, templates
+from utils.zip_stream import ZipStreamWriter
 from utils.report_launch import (
     get_report_launch_token,
     redirect_with_launch_cookie,
@@ -51,9 +79,83 @@ QUIZ_AF_API_KEY = "6qOO8UdF1EGxLgzwIbQN"
 # https://reports.avantifellows.org/reports/student_quiz_report/Homework_Quiz_2022-08-03_62ea813210de4e9677c8ce2d/1403899102
 STUDENT_QUIZ_REPORT_URL = "https://reports.avantifellows.org/reports/student_quiz_report/{session_id}/{user_id}"
 
+# Number of PDFs rendered at once by the session-wide PDF export
+BULK_EXPORT_CONCURRENCY = 4
+
+# Students per response of the session-wide PDF export. API Gateway buffers the
+# whole response and caps it at 6 MB and 29 s, so a session is exported in batches
+# that fit; each response links the next batch in its Link header
+BULK_EXPORT_BATCH_SIZE = int(os.getenv("BULK_EXPORT_BATCH_SIZE") or 10)
+
+# How long the test ID of a session's v1 reports is remembered (it never changes)
+SESSION_TEST_TTL = 24 * 60 * 60
+SESSION_TEST_MAX_SIZE = 10000
+
+# Part of every report ETag: a deploy that changes this module, the templates or the
+# static files (chapter links used by v3 reports, fingerprinted asset URLs) changes
+# every ETag
+RENDER_VERSION = fingerprint_files([__file__, TEMPLATE_DIR, STATIC_DIR])
+
 api_key_header = APIKeyHeader(name="Authorization", auto_error=False)
 
 
+def build_quiz_review_link(
+    request: Request,
+    quiz_id: str,
+) -> Optional[str]:
+    launch_token = getattr(request.state, "report_launch_token", None)
+    if not launch_token:
+        return None
+
+    # Direct report -> quiz review handoff reuses the verified report token.
+    # Quiz resolves canonical identity from the token and strips it from the URL after boot.
+    return QUIZ_REVIEW_URL.format(
+        quiz_id=quote(str(quiz_id), safe=""),
+        api_key=quote(QUIZ_AF_API_KEY, safe=""),
+        launch_token=quote(launch_token, safe=""),
+    )
+
+
+def prepare_v2_report(request: Request, session_id: str, report: dict):
+    """
+    Fills in the fields the v2 templates rely on (in place) and returns the report.
+    """
+    # Use top-level student_id for report_header.student_id
+    if "report_header" in report and "student_id" in report:
+        report["report_header"]["student_id"] = report["student_id"]
+
+    # Upstream stores accuracy as DynamoDB NULL when a subject is fully skipped (0/0 undefined); templates `%.Nf|format` would crash on None.
+    _NUMERIC_FIELDS = ("percentage", "accuracy")
+    if isinstance(report.get("overall_performance"), dict):
+        for f in _NUMERIC_FIELDS:
+            if report["overall_performance"].get(f) is None:
+                report["overall_performance"][f] = 0
+    if isinstance(report.get("subject_performance"), list):
+        for subject in report["subject_performance"]:
+            if not isinstance(subject, dict):
+                continue
+            for f in _NUMERIC_FIELDS:
+                if subject.get(f) is None:
+                    subject[f] = 0
+
+    quiz_id = (
+        report.get("quiz_id")
+        or report.get("test_id")
+        or report.get("report_header", {}).get("quiz_id")
+        or report.get("report_header", {}).get("test_id")
+    )
+    if not quiz_id and "_" in session_id:
+        quiz_id = session_id.rsplit("_", 1)[-1]
+    if quiz_id:
+        review_quiz_link = build_quiz_review_link(
+            request=request,
+            quiz_id=quiz_id,
+        )
+        if review_quiz_link:
+            report["test_link"] = review_quiz_link
+    return report
+
+
 class StudentQuizReportsRouter:
     """
     Router class for handling Student Reports related endpoints.
@@ -62,7 +164,12 @@ class StudentQuizReportsRouter:
     def __init__(self, reports_db: ReportsDB, bq_db: BigQueryDB) -> None:
         self.__reports_db = reports_db
         self.__bq_db = bq_db
-        self._templates = Jinja2Templates(directory="templates")
+        self._templates = templates
+        self.__validators = ReportValidators(RENDER_VERSION)
+        self.__report_locations = ReportLocations()
+        # {session_id: test_id of its v1 reports}, to start the v3 qualification
+        # lookup before the reports are read
+        self.__session_tests = ExpiringCache(maxsize=SESSION_TEST_MAX_SIZE)
 
     @property
     def router(self):
@@ -96,63 +203,37 @@ class StudentQuizReportsRouter:
             section_report["table_data"] = table_data
             return section_report
 
-        def _get_chapter_priority_ordering(
-            section_reports, chapter_to_link_map, stream
-        ):
-            """order chapterwise section reports based on priority"""
-            updated_reports = []
+        def _get_chapter_priority_ordering(section_reports, chapter_index):
+            """
+            order chapterwise section reports (in place) based on priority, from
+            a `chapter_links.for_stream` index
+            """
             for section_report in section_reports:
-                updated_section = section_report.copy()
-
-                if (
-                    "table_data" in updated_section
-                    and "chapter_level_data" in updated_section["table_data"]
-                    and updated_section["table_data"]["chapter_level_data"]
-                ):
-
-                    chapter_data = updated_section["table_data"]["chapter_level_data"]
-                    updated_chapters = []
-
-                    for chapter in chapter_data:
-                        updated_chapter = chapter.copy()
-                        chapter_name = chapter.get("chapter_name", "")
+                chapter_data = section_report.get("table_data", {}).get(
+                    "chapter_level_data"
+                )
+                if not chapter_data:
+                    continue
 
-                        if "-" in chapter_name:
-                            chapter_code = chapter_name.split("-")[0].strip()
-                        else:
-                            chapter_code = chapter_name.strip()
-
-                        if chapter_code in chapter_to_link_map:
-                            if stream == "JEE":
-                                priority = chapter_to_link_map[chapter_code].get(
-                                    "Priority_J", "Low"
-                                )
-                            elif stream == "NEET":
-                                priority = chapter_to_link_map[chapter_code].get(
-                                    "Priority_N", "Low"
-                                )
-                            updated_chapter["priority"] = priority
-                        else:
-                            updated_chapter["priority"] = "Low"
-
-                        updated_chapters.append(updated_chapter)
-
-                    # Sort chapters by priority (High > Medium > Low)
-                    priority_order = {"High": 3, "Medium": 2, "Low": 1}
-                    updated_chapters.sort(
-                        key=lambda x: priority_order.get(x.get("priority"), 0),
-                        reverse=True,
+                ranked = []
+                for chapter in chapter_data:
+                    entry = chapter_index.get(
+                        chapter_code(chapter.get("chapter_name", ""))
                     )
+                    if entry is None:
+                        chapter["priority"] = DEFAULT_PRIORITY
+                        ranked.append((PRIORITY_RANKS[DEFAULT_PRIORITY], chapter))
+                    else:
+                        chapter["priority"] = entry.priority
+                        ranked.append((entry.rank, chapter))
 
-                    updated_section["table_data"][
-                        "chapter_level_data"
-                    ] = updated_chapters
-
-                updated_reports.append(updated_section)
+                # Sort chapters by priority (High > Medium > Low)
+                ranked.sort(key=lambda pair: pair[0], reverse=True)
+                chapter_data[:] = [chapter for _, chapter in ranked]
 
-            return updated_reports
+            return section_reports
 
-        def _get_chapter_for_revision(section_reports, chapter_to_link_map, stream):
+        def _get_chapter_for_revision(section_reports, chapter_index):
             """Determine which chapter needs revision based on performance metrics."""
             revision_candidates = []
 
@@ -170,20 +251,18 @@ class StudentQuizReportsRouter:
                         accuracy = float(chapter_data.get("accuracy", 0))
                         attempt_rate = float(chapter_data.get("attempt_percentage", 0))
 
+                        code = chapter_code(chapter_name)
                         if "-" in chapter_name:
-                            chapter_code = chapter_name.split("-")[0].strip()
                             chapter_name = chapter_name.split("-")[1].strip()
-                        else:
-                            chapter_code = chapter_name.strip()
 
                         if (
                             accuracy <= 75 or attempt_rate <= 50
-                        ) and chapter_code in chapter_to_link_map:
+                        ) and code in chapter_index:
                             performance_score = accuracy + attempt_rate
                             revision_candidates.append(
                                 {
                                     "chapter_name": chapter_name,
-                                    "chapter_code": chapter_code,
+                                    "chapter_code": code,
                                     "accuracy": accuracy,
                                     "attempt_rate": attempt_rate,
                                     "performance_score": performance_score,
@@ -192,39 +271,103 @@ class StudentQuizReportsRouter:
 
             if revision_candidates:
                 revision_candidates.sort(key=lambda x: x["performance_score"])
-                selected_chapter_code = revision_candidates[0]["chapter_code"]
-                selected_chapter_name = revision_candidates[0]["chapter_name"]
-                chapter_link = chapter_to_link_map.get(selected_chapter_code, "")
-                if selected_chapter_code in chapter_to_link_map:
-                    if stream == "JEE":
-                        chapter_link = chapter_to_link_map[selected_chapter_code].get(
-                            "Link_J", ""
-                        )
-                    elif stream == "NEET":
-                        chapter_link = chapter_to_link_map[selected_chapter_code].get(
-                            "Link_N", ""
-                        )
-                else:
-                    chapter_link = ""
-                return selected_chapter_name, chapter_link
+                selected = revision_candidates[0]
+                chapter_link = chapter_index[selected["chapter_code"]].link
+                return selected["chapter_name"], chapter_link
 
             return "", ""  # selected chapter name, chapter link
 
-        def _build_quiz_review_link(
-            request: Request,
-            quiz_id: str,
-        ) -> Optional[str]:
+        def _read_report(table, session_id, key):
+            if table == V2:
+                return self.__reports_db.get_student_quiz_report_v2(key, session_id)
+            return self.__reports_db.get_student_quiz_report(key, session_id)
+
+        def _locate_report(session_id, user_id):
+            """
+            Finds the report for a report URL, first where the same URL's report
+            was last found (see utils/report_locations.py), else by trying in turn:
+            1. the v2 table by user_id (primary key lookup)
+            2. the v2 table by student_id or apaar_id
+            3. the v1 table
+            Returns (V2, item), (V1, section items) or (NOT_FOUND, None).
+            """
+            location = self.__report_locations.get(session_id, user_id)
+            if location is not None:
+                table, key = location
+                if table == NOT_FOUND:
+                    return NOT_FOUND, None
+                try:
+                    found = _read_report(table, session_id, key)
+                except ValueError:
+                    found = None
+                if found:
+                    return table, found
+                self.__report_locations.forget(session_id, user_id)
+
+            # Lookup errors are treated as misses, but "not found" is then not cached
+            failed = False
+            try:
+                v2_report = self.__reports_db.get_student_quiz_report_v2(
+                    user_id, session_id
+                )
+                if v2_report:
+                    self.__report_locations.found(session_id, user_id, V2, user_id)
+                    return V2, v2_report
+            except ValueError:
+                failed = True
+
+            try:
+                v2_report = self.__reports_db.get_student_quiz_report_v2_by_alt_id(
+                    user_id, session_id
+                )
+                if v2_report:
+                    self.__report_locations.found(
+                        session_id, user_id, V2, v2_report["user_id"]
+                    )
+                    return V2, v2_report
+            except ValueError:
+                failed = True
+
+            try:
+                data = self.__reports_db.get_student_quiz_report(user_id, session_id)
+                if data:
+                    self.__report_locations.found(session_id, user_id, V1, user_id)
+                    return V1, data
+            except (KeyError, ValueError):
+                failed = True
+
+            if not failed:
+                self.__report_locations.not_found(session_id, user_id)
+            return NOT_FOUND, None
+
+        def _get_prerendered_report(request, session_id, report, format, debug):
+            """
+            Serves a v2 report from the pre-render store, or returns None on a miss
+            (when pre-rendering is disabled, or the item or rendering code changed
+            since the page was pre-rendered) so the caller renders it live.
+            """
+            if prerendered_reports is None:
+                return None
+
+            use_print = format == "pdf" or request.query_params.get("print") == "true"
             launch_token = getattr(request.state, "report_launch_token", None)
-            if not launch_token:
+            if use_print:
+                variant = PRINT
+            elif launch_token:
+                variant = DISPLAY_WITH_REVIEW_LINK
+            else:
+                variant = DISPLAY
+
+            html_content = prerendered_reports.get(session_id, report, variant)
+            if html_content is None:
                 return None
+            if variant == DISPLAY_WITH_REVIEW_LINK:
+                html_content = fill_launch_token(html_content, launch_token)
 
-            # Direct report -> quiz review handoff reuses the verified report token.
-            # Quiz resolves canonical identity from the token and strips it from the URL after boot.
-            return QUIZ_REVIEW_URL.format(
-                quiz_id=quote(str(quiz_id), safe=""),
-                api_key=quote(QUIZ_AF_API_KEY, safe=""),
-                launch_token=quote(launch_token, safe=""),
-            )
+            template_response = HTMLResponse(content=html_content)
+            if format == "pdf":
+                return convert_template_to_pdf(template_response, debug=debug)
+            return template_response
 
         @api_router.get("/student_reports/{user_id}")
         def get_student_reports(
@@ -261,9 +404,22 @@ class StudentQuizReportsRouter:
 
             print("Getting student reports for user ID: ", user_id)
 
-            # Query both v1 and v2 tables. Prefer v2 for duplicate sessions.
-            v1_data = self.__reports_db.get_student_reports(user_id)
-            v2_data = self.__reports_db.get_student_reports_v2(user_id)
+            not_modified = self.__validators.check_cached(request)
+            if not_modified is not None:
+                return not_modified
+
+            # Query both v1 and v2 tables at once (listing takes as long as the
+            # slower index query), reading only the fields listed below.
+            # Prefer v2 for duplicate sessions.
+            v1_data, v2_data = call_concurrently(
+                lambda: self.__reports_db.get_student_report_summaries(user_id),
+                lambda: self.__reports_db.get_student_report_summaries_v2(user_id),
+            )
+            etag = self.__validators.etag_for(request, (v1_data, v2_data))
+            not_modified = self.__validators.not_modified(request, etag)
+            if not_modified is not None:
+                return not_modified
+
             v2_session_ids = {doc["session_id"] for doc in v2_data}
 
             student_reports = []
@@ -302,7 +458,9 @@ class StudentQuizReportsRouter:
             # Return JSON response if format=json
             if format is not None and format == "json":
                 response = {"student_id": user_id, "reports": student_reports}
-                return response
+                return self.__validators.with_etag(
+                    request, JSONResponse(jsonable_encoder(response)), etag
+                )
 
             # Return HTML or PDF response
             template_response = self._templates.TemplateResponse(
@@ -311,9 +469,11 @@ class StudentQuizReportsRouter:
             )
 
             if format == "pdf":
-                return convert_template_to_pdf(template_response, debug=debug)
+                template_response = convert_template_to_pdf(
+                    template_response, debug=debug
+                )
 
-            return template_response
+            return self.__validators.with_etag(request, template_response, etag)
 
         @api_router.get("/student_quiz_report/{session_id}")
         def student_quiz_report_with_token(
@@ -394,41 +554,13 @@ class StudentQuizReportsRouter:
             session_id = unquote(session_id)
             user_id = unquote(user_id)
 
+            not_modified = self.__validators.check_cached(request)
+            if not_modified is not None:
+                return not_modified
+
             # Helper to render v2 template
             def render_v2_report(report):
-                # Use top-level student_id for report_header.student_id
-                if "report_header" in report and "student_id" in report:
-                    report["report_header"]["student_id"] = report["student_id"]
-
-                # Upstream stores accuracy as DynamoDB NULL when a subject is fully skipped (0/0 undefined); templates `%.Nf|format` would crash on None.
-                _NUMERIC_FIELDS = ("percentage", "accuracy")
-                if isinstance(report.get("overall_performance"), dict):
-                    for f in _NUMERIC_FIELDS:
-                        if report["overall_performance"].get(f) is None:
-                            report["overall_performance"][f] = 0
-                if isinstance(report.get("subject_performance"), list):
-                    for subject in report["subject_performance"]:
-                        if not isinstance(subject, dict):
-                            continue
-                        for f in _NUMERIC_FIELDS:
-                            if subject.get(f) is None:
-                                subject[f] = 0
-
-                quiz_id = (
-                    report.get("quiz_id")
-                    or report.get("test_id")
-                    or report.get("report_header", {}).get("quiz_id")
-                    or report.get("report_header", {}).get("test_id")
-                )
-                if not quiz_id and "_" in session_id:
-                    quiz_id = session_id.rsplit("_", 1)[-1]
-                if quiz_id:
-                    review_quiz_link = _build_quiz_review_link(
-                        request=request,
-                        quiz_id=quiz_id,
-                    )
-                    if review_quiz_link:
-                        report["test_link"] = review_quiz_link
+                prepare_v2_report(request, session_id, report)
 
                 use_print = (
                     format == "pdf" or request.query_params.get("print") == "true"
@@ -446,31 +578,19 @@ class StudentQuizReportsRouter:
                     return convert_template_to_pdf(template_response, debug=debug)
                 return template_response
 
-            # Step 1: Try v2 table with user_id (primary key lookup)
-            try:
-                v2_report = self.__reports_db.get_student_quiz_report_v2(
-                    user_id, session_id
-                )
-                if v2_report:
-                    return render_v2_report(v2_report)
-            except ValueError:
-                pass
+            table, found = _locate_report(session_id, user_id)
+            if table == V2:
 
-            # Step 2: Try v2 table by session_id GSI, match student_id or apaar_id
-            try:
-                v2_report = self.__reports_db.get_student_quiz_report_v2_by_alt_id(
-                    user_id, session_id
-                )
-                if v2_report:
-                    return render_v2_report(v2_report)
-            except ValueError:
-                pass
+                def render_report():
+                    prerendered_response = _get_prerendered_report(
+                        request, session_id, found, format, debug
+                    )
+                    if prerendered_response is not None:
+                        return prerendered_response
+                    return render_v2_report(found)
 
-            # Step 3: Fall back to v1 table
-            try:
-                data = self.__reports_db.get_student_quiz_report(user_id, session_id)
-            except (KeyError, ValueError):
-                data = []
+                return self.__validators.respond(request, found, render_report)
+            data = found if table == V1 else []
 
             if len(data) == 0:
                 # no data
@@ -487,6 +607,11 @@ class StudentQuizReportsRouter:
                     return convert_template_to_pdf(template_response, debug=debug)
                 return template_response
 
+            etag = self.__validators.etag_for(request, data)
+            not_modified = self.__validators.not_modified(request, etag)
+            if not_modified is not None:
+                return not_modified
+
             report_data = {}
             report_data["student_name"] = ""
             test_id = data[0]["test_id"]
@@ -494,7 +619,7 @@ class StudentQuizReportsRouter:
 
             report_data["student_id"] = user_id
             if "platform" in data[0] and data[0]["platform"] == "quizengine":
-                review_quiz_link = _build_quiz_review_link(
+                review_quiz_link = build_quiz_review_link(
                     request=request,
                     quiz_id=test_id,
                 )
@@ -523,8 +648,105 @@ class StudentQuizReportsRouter:
             )
 
             if format == "pdf":
-                return convert_template_to_pdf(template_response, debug=debug)
-            return template_response
+                template_response = convert_template_to_pdf(
+                    template_response, debug=debug
+                )
+            return self.__validators.with_etag(request, template_response, etag)
+
+        @api_router.get("/student_quiz_reports_export/{session_id}")
+        async def student_quiz_reports_export(
+            request: Request,
+            session_id: str,
+            after: Optional[str] = None,
+            token_payload: dict = Depends(verify_staff_token),
+        ):
+            """
+            Returns a zip with the PDF reports (print template) of a batch of
+            students in a session, for teachers. Requires a portal Bearer token
+            with a teacher or admin role.
+
+            A response holds at most BULK_EXPORT_BATCH_SIZE students (in user_id
+            order), so that it fits API Gateway's response size and time limits.
+            If more students follow, the response has a `Link: <...>; rel="next"`
+            header with the URL of the next batch (the same URL with `after` set
+            to the last user_id of this batch).
+            PDFs are rendered BULK_EXPORT_CONCURRENCY at a time. Students whose PDF
+            could not be generated are listed in failed.txt.
+
+            Args:
+                request (Request): The request object.
+                session_id (str): The session ID.
+                after (str, optional): Export the students after this user_id.
+                token_payload (dict): The verified Bearer token's payload.
+
+            Raises:
+                HTTPException: If the caller isn't a teacher or admin, or the
+                    session has no v2 reports (after `after`).
+
+            Returns:
+                StreamingResponse: The zip archive.
+            """
+            session_id = unquote(session_id)
+            try:
+                batch, has_more = await run_in_threadpool(
+                    self.__reports_db.get_session_quiz_reports_v2_batch,
+                    session_id,
+                    BULK_EXPORT_BATCH_SIZE,
+                    after,
+                )
+            except ValueError:
+                batch, has_more = [], False
+            if not batch:
+                raise HTTPException(
+                    status_code=404, detail="No reports found for this session"
+                )
+
+            async def reports():
+                for report in batch:
+                    yield report
+
+            def render_html(report):
+                prepare_v2_report(request, session_id, report)
+                template_response = self._templates.TemplateResponse(
+                    "student_quiz_report_v2_print.html",
+                    {"request": request, "report": report},
+                )
+                return inline_static_assets(template_response.body.decode("utf-8"))
+
+            async def render_pdf(report):
+                html_content = await run_in_threadpool(render_html, report)
+                return report, await fetch_pdf(html_content)
+
+            async def stream_zip():
+                zip_writer = ZipStreamWriter()
+                failed_user_ids = []
+                async for report, pdf in map_bounded(
+                    render_pdf, reports(), BULK_EXPORT_CONCURRENCY
+                ):
+                    if pdf is None:
+                        failed_user_ids.append(report["user_id"])
+                        continue
+                    file_name = re.sub(r"[^\w.-]", "_", str(report["user_id"]))
+                    yield zip_writer.add(f"{file_name}.pdf", pdf)
+                if failed_user_ids:
+                    failed_list = "\n".join(failed_user_ids) + "\n"
+                    yield zip_writer.add("failed.txt", failed_list.encode("utf-8"))
+                yield zip_writer.close()
+
+            file_name = re.sub(r"[^\w.-]", "_", session_id)
+            if after is not None or has_more:
+                # One of several batches: name it after the students it holds
+                user_range = f"{batch[0]['user_id']}-{batch[-1]['user_id']}"
+                file_name += "_" + re.sub(r"[^\w.-]", "_", user_range)
+            headers = {
+                "Content-Disposition": f'attachment; filename="{file_name}_reports.zip"'
+            }
+            if has_more:
+                next_url = request.url.include_query_params(after=batch[-1]["user_id"])
+                headers["Link"] = f'<{next_url}>; rel="next"'
+            return StreamingResponse(
+                stream_zip(), media_type="application/zip", headers=headers
+            )
 
         @api_router.get("/student_quiz_report/v3/{session_id}")
         def student_quiz_report_v3_with_token(
@@ -598,13 +820,36 @@ class StudentQuizReportsRouter:
             # it's possible that the strings are URL encoded.
             session_id = unquote(session_id)
             user_id = unquote(user_id)
-            try:
-                data = self.__reports_db.get_student_quiz_report(user_id, session_id)
-            except KeyError:
-                raise HTTPException(
-                    status_code=400,
-                    detail="No student_quiz_report found. Unknown error occurred.",
+
+            not_modified = self.__validators.check_cached(request)
+            if not_modified is not None:
+                return not_modified
+
+            def get_report_sections():
+                try:
+                    return self.__reports_db.get_student_quiz_report(
+                        user_id, session_id
+                    )
+                except KeyError:
+                    raise HTTPException(
+                        status_code=400,
+                        detail="No student_quiz_report found. Unknown error occurred.",
+                    )
+
+            # The qualification lookup only needs the user and test IDs, so when the
+            # session's test is known from an earlier read it runs alongside the
+            # DynamoDB read instead of after it. Unknown sessions (which include
+            # every 404) wait for the read, so they never cost a BigQuery query.
+            predicted_test_id = self.__session_tests.get(session_id)
+            if predicted_test_id:
+                data, student_al_data = call_concurrently(
+                    get_report_sections,
+                    lambda: self.__bq_db.get_student_qualification_data(
+                        user_id, predicted_test_id
+                    ),
                 )
+            else:
+                data, student_al_data = get_report_sections(), None
 
             if len(data) == 0:
                 # no data
@@ -620,27 +865,38 @@ class StudentQuizReportsRouter:
 
             report_data = {}
             report_data["student_name"] = ""
+            requested_user_id = user_id
             test_id = data[0]["test_id"]
             user_id = data[0]["user_id"]
+            self.__session_tests.set(session_id, test_id, SESSION_TEST_TTL)
 
             report_data["student_id"] = user_id
             if "platform" in data[0] and data[0]["platform"] == "quizengine":
-                review_quiz_link = _build_quiz_review_link(
+                review_quiz_link = build_quiz_review_link(
                     request=request,
                     quiz_id=test_id,
                 )
                 if review_quiz_link:
                     report_data["test_link"] = review_quiz_link
 
-            # bigquery
-            student_al_data = self.__bq_db.get_student_qualification_data(
-                user_id, test_id
-            )
+            # bigquery (again, if the prediction was wrong)
+            if student_al_data is None or (test_id, user_id) != (
+                predicted_test_id,
+                requested_user_id,
+            ):
+                student_al_data = self.__bq_db.get_student_qualification_data(
+                    user_id, test_id
+                )
             qualification_status = student_al_data["qualification_status"]
             marks_to_qualify = student_al_data["marks_to_qualify"]
             chapter_for_revision = student_al_data["chapter_curriculum"]
             revision_chapter_link = student_al_data["dpp_recommendation"]
 
+            etag = self.__validators.etag_for(request, (data, student_al_data))
+            not_modified = self.__validators.not_modified(request, etag)
+            if not_modified is not None:
+                return not_modified
+
             section_reports = []
             overall_performance = {}
 
@@ -670,16 +926,16 @@ class StudentQuizReportsRouter:
             report_data["overall_performance"] = overall_performance
             report_data["section_reports"] = section_reports
 
-            chapter_to_link_map = json.load(open("./static/chapter_to_links.json", "r"))
+            chapter_index = chapter_links.for_stream(stream)
 
             report_data["section_reports"] = _get_chapter_priority_ordering(
-                section_reports, chapter_to_link_map, stream
+                section_reports, chapter_index
             )
 
             # (
             #     chapter_for_revision,
             #     report_data["revision_chapter_link"],
-            # ) = _get_chapter_for_revision(section_reports, chapter_to_link_map, stream)
+            # ) = _get_chapter_for_revision(section_reports, chapter_index)
 
             exam = "JEE"
             if stream == "JEE":
@@ -724,7 +980,9 @@ class StudentQuizReportsRouter:
             )
 
             if format == "pdf":
-                return convert_template_to_pdf(template_response, debug=debug)
-            return template_response
+                template_response = convert_template_to_pdf(
+                    template_response, debug=debug
+                )
+            return self.__validators.with_etag(request, template_response, etag)
 
         return api_router
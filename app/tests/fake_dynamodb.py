@@ -0,0 +1,134 @@
+"""
+In-memory stand-in for the parts of the boto3 DynamoDB resource the DB wrappers
+use: Table get/put/delete/query (with boto3 condition objects, paginated by
+`page_size`) and batch_writer, plus batch_get_item. Secondary indexes are
+sparse: an index query only sees items that have the attributes it matches on.
+"""
+import copy
+
+
+def _matches(item, condition) -> bool:
+    expression = condition.get_expression()
+    operator, values = expression["operator"], expression["values"]
+    if operator == "AND":
+        return all(_matches(item, value) for value in values)
+    if operator == "OR":
+        return any(_matches(item, value) for value in values)
+    attribute, value = values
+    if attribute.name not in item:
+        return False
+    if operator == "=":
+        return item[attribute.name] == value
+    if operator == "<>":
+        return item[attribute.name] != value
+    raise NotImplementedError(operator)
+
+
+class FakeBatchWriter:
+    def __init__(self, table, overwrite_by_pkeys=None) -> None:
+        self.__table = table
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def put_item(self, Item):
+        self.__table.put_item(Item=Item)
+
+    def delete_item(self, Key):
+        self.__table.delete_item(Key=Key)
+
+
+class FakeTable:
+    def __init__(self, key_names, page_size=None) -> None:
+        self.key_names = key_names
+        self.page_size = page_size
+        # {key tuple: item}
+        self.items = {}
+        self.queries = []
+
+    def __key(self, item):
+        return tuple(item[name] for name in self.key_names)
+
+    def put_item(self, Item):
+        self.items[self.__key(Item)] = copy.deepcopy(Item)
+
+    def get_item(self, Key):
+        item = self.items.get(self.__key(Key))
+        return {"Item": copy.deepcopy(item)} if item is not None else {}
+
+    def delete_item(self, Key):
+        self.items.pop(self.__key(Key), None)
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        return FakeBatchWriter(self, overwrite_by_pkeys)
+
+    def query(self, KeyConditionExpression, **kwargs):
+        self.queries.append(kwargs)
+        matched = [
+            item
+            for key, item in sorted(self.items.items())
+            if _matches(item, KeyConditionExpression)
+            and (
+                "FilterExpression" not in kwargs
+                or _matches(item, kwargs["FilterExpression"])
+            )
+        ]
+        start = kwargs.get("ExclusiveStartKey")
+        if start is not None:
+            start_key = self.__key(start)
+            matched = [item for item in matched if self.__key(item) > start_key]
+        # A page stops at Limit or, standing in for the 1 MB cap, at page_size
+        limits = [n for n in (kwargs.get("Limit"), self.page_size) if n is not None]
+        limit = min(limits, default=None)
+        response = {}
+        if limit is not None and len(matched) > limit:
+            matched = matched[:limit]
+            last = matched[-1]
+            response["LastEvaluatedKey"] = {name: last[name] for name in self.key_names}
+        if "ProjectionExpression" in kwargs:
+            names = kwargs.get("ExpressionAttributeNames", {})
+            attributes = [
+                names.get(name.strip(), name.strip())
+                for name in kwargs["ProjectionExpression"].split(",")
+            ]
+            matched = [
+                {name: item[name] for name in attributes if name in item}
+                for item in matched
+            ]
+        response["Items"] = copy.deepcopy(matched)
+        return response
+
+
+class FakeDynamoDB:
+    """
+    params:
+        tables: {table name: key attribute names (hash key, range key)}
+        page_size: Items per query page (default: no pagination)
+    """
+
+    def __init__(self, tables, page_size=None) -> None:
+        self.tables = {
+            name: FakeTable(key_names, page_size) for name, key_names in tables.items()
+        }
+        # Keys batch_get_item leaves unprocessed on its next call
+        self.unprocessed_keys = []
+
+    def Table(self, name):
+        return self.tables[name]
+
+    def batch_get_item(self, RequestItems):
+        responses, unprocessed = {}, {}
+        for table_name, request in RequestItems.items():
+            table = self.tables[table_name]
+            for key in request["Keys"]:
+                if key in self.unprocessed_keys:
+                    self.unprocessed_keys.remove(key)
+                    unprocessed.setdefault(table_name, {"Keys": []})["Keys"].append(key)
+                    continue
+                item = table.get_item(Key=key).get("Item")
+                if item is not None:
+                    responses.setdefault(table_name, []).append(item)
+        return {"Responses": responses, "UnprocessedKeys": unprocessed}
@@ -0,0 +1,174 @@
+"""
+Artifact stores (`internal.artifact_store`) on a temporary directory and a stubbed
+S3 client, and the PDF cache key. Run from `app/`: python -m unittest discover tests
+"""
+import contextlib
+import hashlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import boto3
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+
+from internal.artifact_store import (
+    DiskArtifactStore,
+    S3ArtifactStore,
+    create_artifact_store,
+)
+from utils.pdf_converter import pdf_cache_key
+
+
+class DiskArtifactStoreTest(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.directory = temp_dir.name
+        self.store = DiskArtifactStore(self.directory, max_bytes=10)
+
+    def __files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, file_name), self.directory)
+            for root, _, files in os.walk(self.directory)
+            for file_name in files
+        )
+
+    def __set_mtime(self, key, mtime):
+        os.utime(os.path.join(self.directory, key), (mtime, mtime))
+
+    def test_put_then_get(self):
+        self.store.put("ab/cdef", b"pdf", "application/pdf")
+        self.assertEqual(self.store.get("ab/cdef"), b"pdf")
+        self.assertEqual(self.__files(), [os.path.join("ab", "cdef")])
+
+    def test_miss(self):
+        self.assertIsNone(self.store.get("missing"))
+
+    def test_least_recently_used_is_evicted_first(self):
+        self.store.put("a", b"aaaa", "application/pdf")
+        self.store.put("b", b"bbbb", "application/pdf")
+        self.__set_mtime("a", 1000)
+        self.__set_mtime("b", 2000)
+        # Reading "a" makes "b" the least recently used
+        self.assertEqual(self.store.get("a"), b"aaaa")
+        self.store.put("c", b"cccc", "application/pdf")
+        self.assertEqual(self.__files(), ["a", "c"])
+        self.assertIsNone(self.store.get("b"))
+
+    def test_files_from_an_earlier_container_count_towards_the_cap(self):
+        self.store.put("a", b"aaaa", "application/pdf")
+        self.store.put("b", b"bbbb", "application/pdf")
+        self.__set_mtime("a", 1000)
+        self.__set_mtime("b", 2000)
+        store = DiskArtifactStore(self.directory, max_bytes=10)
+        store.put("c", b"cccc", "application/pdf")
+        self.assertEqual(self.__files(), ["b", "c"])
+
+    def test_artifact_larger_than_the_cap_is_not_stored(self):
+        self.store.put("a", b"aaaa", "application/pdf")
+        self.store.put("big", b"x" * 11, "application/pdf")
+        self.assertEqual(self.__files(), ["a"])
+
+    def test_failed_write_keeps_the_previous_artifact(self):
+        self.store.put("a", b"aaaa", "application/pdf")
+        with mock.patch("os.replace", side_effect=OSError("disk full")):
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.store.put("a", b"AAAA", "application/pdf")
+        self.assertEqual(self.store.get("a"), b"aaaa")
+        # No temporary file is left behind
+        self.assertEqual(self.__files(), ["a"])
+
+
+class S3ArtifactStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.client = boto3.client(
+            "s3",
+            region_name="ap-south-1",
+            aws_access_key_id="test",
+            aws_secret_access_key="test",
+        )
+        self.stubber = Stubber(self.client)
+        self.stubber.activate()
+        self.addCleanup(self.stubber.deactivate)
+        patch = mock.patch("boto3.client", return_value=self.client)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.store = S3ArtifactStore("report-cache", prefix="report-pdfs/")
+
+    def test_get(self):
+        self.stubber.add_response(
+            "get_object",
+            {"Body": StreamingBody(io.BytesIO(b"pdf"), 3)},
+            {"Bucket": "report-cache", "Key": "report-pdfs/abc"},
+        )
+        self.assertEqual(self.store.get("abc"), b"pdf")
+        self.stubber.assert_no_pending_responses()
+
+    def test_put(self):
+        self.stubber.add_response(
+            "put_object",
+            {},
+            {
+                "Bucket": "report-cache",
+                "Key": "report-pdfs/abc",
+                "Body": b"pdf",
+                "ContentType": "application/pdf",
+            },
+        )
+        self.store.put("abc", b"pdf", "application/pdf")
+        self.stubber.assert_no_pending_responses()
+
+    def test_miss(self):
+        self.stubber.add_client_error("get_object", service_error_code="NoSuchKey")
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertIsNone(self.store.get("abc"))
+        self.assertEqual(output.getvalue(), "")
+
+    def test_errors_are_treated_as_misses(self):
+        self.stubber.add_client_error("get_object", service_error_code="AccessDenied")
+        self.stubber.add_client_error("put_object", service_error_code="AccessDenied")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertIsNone(self.store.get("abc"))
+            self.store.put("abc", b"pdf", "application/pdf")
+        self.stubber.assert_no_pending_responses()
+
+
+class CreateArtifactStoreTest(unittest.TestCase):
+    def test_backends(self):
+        self.assertIsNone(create_artifact_store("none"))
+        self.assertIsNone(create_artifact_store(""))
+        self.assertIsInstance(
+            create_artifact_store("disk", directory="/tmp/x", max_bytes=1),
+            DiskArtifactStore,
+        )
+        self.assertIsInstance(
+            create_artifact_store("s3", bucket="report-cache"), S3ArtifactStore
+        )
+        with self.assertRaises(ValueError):
+            create_artifact_store("redis")
+
+
+class PdfCacheKeyTest(unittest.TestCase):
+    def test_key_is_the_sha256_of_the_html(self):
+        html = "<html><body>Résumé</body></html>"
+        self.assertEqual(
+            pdf_cache_key(html), hashlib.sha256(html.encode("utf-8")).hexdigest()
+        )
+
+    def test_key_is_stable_across_releases(self):
+        # Changing the key scheme orphans every cached PDF
+        self.assertEqual(
+            pdf_cache_key("<p>report</p>"),
+            "93aeea0c693969439a2849182734bf191b3426ff0c02e0b98618274496fb398d",
+        )
+
+    def test_different_html_gets_a_different_key(self):
+        self.assertNotEqual(pdf_cache_key("<p>a</p>"), pdf_cache_key("<p>b</p>"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Keep-alive client pool (`internal.http_clients.HttpClientPool`). Run from `app/`:
+python -m unittest discover tests
+"""
+import asyncio
+import threading
+import unittest
+
+from internal.http_clients import HttpClientPool
+
+
+class AsyncClientTest(unittest.TestCase):
+    def setUp(self):
+        self.pool = HttpClientPool()
+
+    async def __get_client(self):
+        return self.pool.get_async_client()
+
+    def test_one_client_per_loop(self):
+        async def get_twice():
+            return self.pool.get_async_client(), self.pool.get_async_client()
+
+        first, second = asyncio.run(get_twice())
+        self.assertIs(first, second)
+
+    def test_aclose_closes_the_running_loops_client(self):
+        async def get_and_close():
+            client = self.pool.get_async_client()
+            await self.pool.aclose()
+            return client, self.pool.get_async_client()
+
+        closed, reopened = asyncio.run(get_and_close())
+        self.assertTrue(closed.is_closed)
+        self.assertFalse(reopened.is_closed)
+        self.assertIsNot(closed, reopened)
+
+    def test_client_of_a_replaced_loop_is_closed_on_that_loop(self):
+        old_loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=old_loop.run_forever)
+        thread.start()
+        self.addCleanup(old_loop.close)
+        self.addCleanup(thread.join)
+        self.addCleanup(old_loop.call_soon_threadsafe, old_loop.stop)
+        old_client = asyncio.run_coroutine_threadsafe(
+            self.__get_client(), old_loop
+        ).result()
+
+        new_client = asyncio.run(self.__get_client())
+
+        self.assertIsNot(new_client, old_client)
+        # The old client's aclose() was scheduled on its own loop
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), old_loop).result()
+        self.assertTrue(old_client.is_closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
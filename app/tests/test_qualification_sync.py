@@ -0,0 +1,156 @@
+"""
+Copying BigQuery qualification rows to the student_qualifications table
+(`qualification_sync.sync_qualifications`, `QualificationsDB`) against a fake
+BigQuery client and an in-memory DynamoDB. Run from `app/`:
+python -m unittest discover tests
+"""
+import contextlib
+import io
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+from db.bq_db import BigQueryDB
+from db.qualifications_db import SYNCED_MARKER, QualificationsDB
+from qualification_sync import sync_qualifications
+from tests.fake_dynamodb import FakeDynamoDB
+
+
+def _row(test_id, user_id, status="Qualified", marks=0.0):
+    return {
+        "test_id": test_id,
+        "user_id": user_id,
+        "qualification_status": status,
+        "marks_to_qualify": marks,
+        "chapter_curriculum": "Kinematics",
+        "dpp_recommendation": "DPP 3",
+    }
+
+
+class FakeQueryJob:
+    def __init__(self, rows):
+        self.__rows = rows
+
+    def result(self, timeout=None):
+        # Iterated once, like BigQuery's RowIterator
+        return iter(self.__rows)
+
+
+class FakeBigQueryClient:
+    """
+    Returns `rows` (ordered by test_id, like the real query) for every query,
+    keeping only the tests of the query's test_ids parameter.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def query(self, query_string, job_config=None):
+        rows = self.rows
+        for parameter in job_config.query_parameters:
+            if parameter.name == "test_ids":
+                rows = [row for row in rows if row["test_id"] in parameter.values]
+        return FakeQueryJob(rows)
+
+
+class SyncQualificationsTest(unittest.TestCase):
+    def setUp(self):
+        # One-item query pages, so reading a test's stored user_ids paginates
+        self.db = FakeDynamoDB(
+            {"student_qualifications": ("test_id", "user_id")}, page_size=1
+        )
+        self.table = self.db.Table("student_qualifications")
+        self.qualifications_db = QualificationsDB(self.db)
+
+    def __sync(self, rows, test_ids=None):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return sync_qualifications(
+                BigQueryDB(FakeBigQueryClient(rows)), self.qualifications_db, test_ids
+            )
+
+    def __user_ids(self, test_id):
+        return sorted(user_id for t, user_id in self.table.items if t == test_id)
+
+    def test_rows_are_grouped_by_test(self):
+        rows = [_row("T1", 1), _row("T1", 2), _row("T2", 3)]
+        self.assertEqual(self.__sync(rows), {"T1": 2, "T2": 1})
+        self.assertEqual(self.__user_ids("T1"), [SYNCED_MARKER, "1", "2"])
+        self.assertEqual(self.__user_ids("T2"), [SYNCED_MARKER, "3"])
+        item = self.table.get_item(Key={"test_id": "T2", "user_id": "3"})["Item"]
+        self.assertEqual(item["qualification_status"], "Qualified")
+
+    def test_only_the_given_tests_are_synced(self):
+        rows = [_row("T1", 1), _row("T2", 2)]
+        self.assertEqual(self.__sync(rows, test_ids=["T2", "T3"]), {"T2": 1})
+        self.assertEqual(self.__user_ids("T1"), [])
+        # A test without rows gets no synced marker, so it stays on BigQuery
+        self.assertEqual(
+            self.qualifications_db.get_student_qualification("T3", 2), (False, None)
+        )
+
+    def test_synced_marker_is_written_with_the_row_count(self):
+        self.__sync([_row("T1", 1), _row("T1", 2)])
+        marker = self.table.get_item(Key={"test_id": "T1", "user_id": SYNCED_MARKER})
+        row = self.table.get_item(Key={"test_id": "T1", "user_id": "1"})
+        self.assertEqual(marker["Item"]["row_count"], 2)
+        self.assertEqual(marker["Item"]["synced_at"], row["Item"]["synced_at"])
+
+    def test_resync_deletes_students_no_longer_in_bigquery(self):
+        self.__sync([_row("T1", 1), _row("T1", 2), _row("T1", 3), _row("T2", 4)])
+        self.__sync([_row("T1", 2, status="Not Qualified")], test_ids=["T1"])
+        self.assertEqual(self.__user_ids("T1"), [SYNCED_MARKER, "2"])
+        self.assertEqual(self.__user_ids("T2"), [SYNCED_MARKER, "4"])
+        synced, data = self.qualifications_db.get_student_qualification("T1", 2)
+        self.assertTrue(synced)
+        self.assertEqual(data["qualification_status"], "Not Qualified")
+        self.assertEqual(
+            self.qualifications_db.get_student_qualification("T1", 1), (True, None)
+        )
+
+    def test_non_finite_floats_are_stored_as_null(self):
+        rows = [
+            _row("T1", 1, marks=12.5),
+            _row("T1", 2, marks=float("nan")),
+            _row("T1", 3, marks=float("inf")),
+        ]
+        self.__sync(rows)
+        marks = {}
+        for user_id in (1, 2, 3):
+            _, data = self.qualifications_db.get_student_qualification("T1", user_id)
+            marks[user_id] = data["marks_to_qualify"]
+        self.assertEqual(marks, {1: Decimal("12.5"), 2: None, 3: None})
+
+
+class GetStudentQualificationTest(unittest.TestCase):
+    def setUp(self):
+        self.db = FakeDynamoDB({"student_qualifications": ("test_id", "user_id")})
+        self.qualifications_db = QualificationsDB(self.db)
+        self.qualifications_db.put_test_qualifications(
+            "T1", [{k: v for k, v in _row("T1", 1).items() if k != "test_id"}]
+        )
+
+    def test_unprocessed_keys_are_retried(self):
+        self.db.unprocessed_keys = [
+            {"test_id": "T1", "user_id": "1"},
+            {"test_id": "T1", "user_id": SYNCED_MARKER},
+        ]
+        synced, data = self.qualifications_db.get_student_qualification("T1", 1)
+        self.assertTrue(synced)
+        self.assertEqual(data["chapter_curriculum"], "Kinematics")
+        self.assertNotIn("synced_at", data)
+        self.assertEqual(self.db.unprocessed_keys, [])
+
+    def test_synced_test_is_read_without_bigquery(self):
+        client = FakeBigQueryClient([])
+        client.query = mock.Mock(wraps=client.query)
+        bq_db = BigQueryDB(client, qualifications_db=self.qualifications_db)
+        data = bq_db.get_student_qualification_data(1, "T1")
+        self.assertEqual(data["dpp_recommendation"], "DPP 3")
+        # A synced test's absent student gets the defaults, still without BigQuery
+        data = bq_db.get_student_qualification_data(404, "T1")
+        self.assertEqual(data["qualification_status"], "Qualified")
+        client.query.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+"""
+Remembered report locations (`utils.report_locations`). Run from `app/`:
+python -m unittest discover tests
+"""
+import time
+import unittest
+from unittest import mock
+
+from utils.report_locations import NOT_FOUND, V1, V2, ReportLocations
+
+SESSION_ID = "EnableStudents_2024-01-07_65a0c1f2e4b0a1b2c3d4e5f6"
+
+
+class ReportLocationsTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patch = mock.patch.object(time, "monotonic", side_effect=lambda: self.now)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.locations = ReportLocations(ttl=3600, not_found_ttl=60)
+
+    def test_v2_location_is_remembered_for_the_long_ttl(self):
+        self.locations.found(SESSION_ID, "S1", V2, "u1")
+        self.now += 600
+        self.assertEqual(self.locations.get(SESSION_ID, "S1"), (V2, "u1"))
+
+    def test_v1_location_is_rechecked_as_often_as_a_miss(self):
+        # A v2 report published after the v1 hit must show up within not_found_ttl
+        self.locations.found(SESSION_ID, "u1", V1, "u1")
+        self.locations.not_found(SESSION_ID, "u2")
+        self.assertEqual(self.locations.get(SESSION_ID, "u1"), (V1, "u1"))
+        self.assertEqual(self.locations.get(SESSION_ID, "u2"), (NOT_FOUND, None))
+        self.now += 61
+        self.assertIsNone(self.locations.get(SESSION_ID, "u1"))
+        self.assertIsNone(self.locations.get(SESSION_ID, "u2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
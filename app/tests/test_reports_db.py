@@ -0,0 +1,117 @@
+"""
+v2 report lookups by alternate identifier (`ReportsDB.get_student_quiz_report_v2_by_alt_id`)
+and session export batches (`ReportsDB.get_session_quiz_reports_v2_batch`) against an
+in-memory DynamoDB. Run from `app/`: python -m unittest discover tests
+"""
+import unittest
+from unittest import mock
+
+from db import reports_db
+from db.reports_db import ReportsDB
+from tests.fake_dynamodb import FakeDynamoDB
+
+SESSION_ID = "EnableStudents_2024-01-07_65a0c1f2e4b0a1b2c3d4e5f6"
+
+
+def _report(user_id, student_id="", apaar_id="", backfilled=False):
+    item = {
+        "session_id": SESSION_ID,
+        "user_id": user_id,
+        "student_id": student_id,
+        "apaar_id": apaar_id,
+        "report_header": {"student_name": user_id},
+    }
+    if backfilled:
+        # What `generate_table backfill-alt-ids` sets
+        if student_id:
+            item["lookup_student_id"] = student_id
+        if apaar_id:
+            item["lookup_apaar_id"] = apaar_id
+    return item
+
+
+class AltIdLookupTest(unittest.TestCase):
+    def setUp(self):
+        self.db = FakeDynamoDB(
+            {"student_quiz_reports_v2": ("session_id", "user_id")}, page_size=2
+        )
+        self.table = self.db.Table("student_quiz_reports_v2")
+        for item in (
+            _report("u1", "S1", "", backfilled=True),
+            _report("u2", "S2", "A2", backfilled=True),
+            _report("u3", "S3", "", backfilled=True),
+        ):
+            self.table.put_item(Item=item)
+        self.reports_db = ReportsDB(self.db)
+
+    def __partition_scans(self):
+        return [query for query in self.table.queries if "IndexName" not in query]
+
+    def test_backfilled_items_are_found_through_the_indexes(self):
+        found = self.reports_db.get_student_quiz_report_v2_by_alt_id("S3", SESSION_ID)
+        self.assertEqual(found["user_id"], "u3")
+        found = self.reports_db.get_student_quiz_report_v2_by_alt_id("A2", SESSION_ID)
+        self.assertEqual(found["user_id"], "u2")
+        self.assertEqual(self.__partition_scans(), [])
+
+    def test_fresh_item_without_lookup_attributes_is_found(self):
+        # Published after the backfill: the writers don't set the lookup attributes
+        self.table.put_item(Item=_report("u9", "S9", "A9"))
+        found = self.reports_db.get_student_quiz_report_v2_by_alt_id("S9", SESSION_ID)
+        self.assertEqual(found["user_id"], "u9")
+        found = self.reports_db.get_student_quiz_report_v2_by_alt_id("A9", SESSION_ID)
+        self.assertEqual(found["user_id"], "u9")
+
+    def test_scan_fallback_is_on_by_default(self):
+        self.assertTrue(reports_db.ALT_ID_SCAN_FALLBACK)
+
+    def test_without_scan_fallback_a_miss_costs_only_index_queries(self):
+        self.table.put_item(Item=_report("u9", "S9", "A9"))
+        with mock.patch.object(reports_db, "ALT_ID_SCAN_FALLBACK", False):
+            self.assertIsNone(
+                self.reports_db.get_student_quiz_report_v2_by_alt_id("S9", SESSION_ID)
+            )
+        self.assertEqual(self.__partition_scans(), [])
+
+    def test_empty_apaar_ids_never_match(self):
+        self.table.put_item(Item=_report("u9", "S9", ""))
+        self.assertIsNone(
+            self.reports_db.get_student_quiz_report_v2_by_alt_id("", SESSION_ID)
+        )
+        self.assertIsNone(
+            self.reports_db.get_student_quiz_report_v2_by_alt_id("S404", SESSION_ID)
+        )
+
+
+class SessionBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.db = FakeDynamoDB(
+            {"student_quiz_reports_v2": ("session_id", "user_id")}, page_size=2
+        )
+        table = self.db.Table("student_quiz_reports_v2")
+        for user_id in ("u1", "u2", "u3", "u4", "u5"):
+            table.put_item(Item=_report(user_id))
+        table.put_item(Item=dict(_report("u0"), session_id="another-session"))
+        self.reports_db = ReportsDB(self.db)
+
+    def __user_ids(self, limit, after=None):
+        batch, has_more = self.reports_db.get_session_quiz_reports_v2_batch(
+            SESSION_ID, limit, after
+        )
+        return [report["user_id"] for report in batch], has_more
+
+    def test_batches_cover_the_session_in_order(self):
+        self.assertEqual(self.__user_ids(2), (["u1", "u2"], True))
+        self.assertEqual(self.__user_ids(2, after="u2"), (["u3", "u4"], True))
+        self.assertEqual(self.__user_ids(2, after="u4"), (["u5"], False))
+
+    def test_batch_larger_than_a_query_page(self):
+        self.assertEqual(self.__user_ids(4), (["u1", "u2", "u3", "u4"], True))
+        self.assertEqual(self.__user_ids(5), (["u1", "u2", "u3", "u4", "u5"], False))
+
+    def test_nothing_after_the_last_student(self):
+        self.assertEqual(self.__user_ids(2, after="u5"), ([], False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+"""
+Local launch token verification (`auth.signing_keys`) and the portal fallback in
+`auth`. Run from `app/`: python -m unittest discover tests
+"""
+import asyncio
+import base64
+import json
+import os
+import time
+import unittest
+from unittest import mock
+
+import rsa
+
+os.environ.setdefault("PORTAL_BACKEND_URL", "http://portal.test")
+
+import auth  # noqa: E402
+from auth.signing_keys import (  # noqa: E402
+    InvalidSignedToken,
+    LocalVerificationUnavailable,
+    SigningKeySet,
+    verify_signed_token,
+)
+
+KID = "portal-key-1"
+
+
+def _b64url_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _int_to_b64url(value: int) -> str:
+    return _b64url_encode(value.to_bytes((value.bit_length() + 7) // 8, "big"))
+
+
+def _jwks(public_key: rsa.PublicKey, kid: str = KID) -> dict:
+    return {
+        "keys": [
+            {
+                "kty": "RSA",
+                "use": "sig",
+                "kid": kid,
+                "n": _int_to_b64url(public_key.n),
+                "e": _int_to_b64url(public_key.e),
+            }
+        ]
+    }
+
+
+def _sign(claims: dict, private_key: rsa.PrivateKey, kid: str = KID) -> str:
+    header = _b64url_encode(json.dumps({"alg": "RS256", "kid": kid}).encode())
+    payload = _b64url_encode(json.dumps(claims).encode())
+    signing_input = f"{header}.{payload}".encode("ascii")
+    signature = _b64url_encode(rsa.sign(signing_input, private_key, "SHA-256"))
+    return f"{header}.{payload}.{signature}"
+
+
+class VerifySignedTokenTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.public_key, cls.private_key = rsa.newkeys(1024)
+        _, cls.other_private_key = rsa.newkeys(1024)
+
+    def setUp(self):
+        self.key_set = SigningKeySet(fetch_keys=lambda: _jwks(self.public_key))
+
+    def test_valid_token_returns_claims(self):
+        claims = {"sub": "student-1", "exp": time.time() + 60}
+        token = _sign(claims, self.private_key)
+        self.assertEqual(verify_signed_token(token, self.key_set), claims)
+
+    def test_expiry_within_leeway_is_accepted(self):
+        token = _sign({"sub": "student-1", "exp": time.time() - 10}, self.private_key)
+        verify_signed_token(token, self.key_set, leeway=30)
+
+    def test_expired_token_is_rejected(self):
+        token = _sign({"sub": "student-1", "exp": time.time() - 60}, self.private_key)
+        with self.assertRaises(InvalidSignedToken):
+            verify_signed_token(token, self.key_set, leeway=30)
+
+    def test_not_before_within_leeway_is_accepted(self):
+        token = _sign({"sub": "student-1", "nbf": time.time() + 10}, self.private_key)
+        verify_signed_token(token, self.key_set, leeway=30)
+
+    def test_token_not_yet_valid_is_rejected(self):
+        token = _sign({"sub": "student-1", "nbf": time.time() + 60}, self.private_key)
+        with self.assertRaises(InvalidSignedToken):
+            verify_signed_token(token, self.key_set, leeway=30)
+
+    def test_unknown_kid_is_left_to_the_portal(self):
+        token = _sign({"sub": "student-1"}, self.private_key, kid="rotated-key")
+        with self.assertRaises(LocalVerificationUnavailable):
+            verify_signed_token(token, self.key_set)
+
+    def test_token_signed_with_another_key_is_rejected(self):
+        token = _sign({"sub": "student-1"}, self.other_private_key)
+        with self.assertRaises(InvalidSignedToken):
+            verify_signed_token(token, self.key_set)
+
+    def test_tampered_claims_are_rejected(self):
+        header, _, signature = _sign({"sub": "student-1"}, self.private_key).split(".")
+        claims = _b64url_encode(json.dumps({"sub": "teacher-1"}).encode())
+        with self.assertRaises(InvalidSignedToken):
+            verify_signed_token(f"{header}.{claims}.{signature}", self.key_set)
+
+    def test_tampered_signature_is_rejected(self):
+        token = _sign({"sub": "student-1"}, self.private_key)
+        header, claims, signature = token.split(".")
+        tampered = bytearray(base64.urlsafe_b64decode(signature + "=="))
+        tampered[-1] ^= 0x01
+        token = f"{header}.{claims}.{_b64url_encode(bytes(tampered))}"
+        with self.assertRaises(InvalidSignedToken):
+            verify_signed_token(token, self.key_set)
+
+    def test_opaque_token_is_left_to_the_portal(self):
+        with self.assertRaises(LocalVerificationUnavailable):
+            verify_signed_token("not-a-jwt", self.key_set)
+
+
+class PortalFallbackTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.public_key, cls.private_key = rsa.newkeys(1024)
+
+    def setUp(self):
+        key_set = SigningKeySet(fetch_keys=lambda: _jwks(self.public_key))
+        portal_response = mock.Mock(status_code=200)
+        portal_response.json.return_value = {"id": "from-portal"}
+        patches = [
+            mock.patch.object(auth, "VERIFICATION_MODE", "local"),
+            mock.patch.object(auth, "_signing_keys", key_set),
+            mock.patch.object(
+                auth, "_request_verification", return_value=portal_response
+            ),
+            mock.patch.object(
+                auth,
+                "_request_verification_async",
+                new=mock.AsyncMock(return_value=portal_response),
+            ),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_verified_locally_without_the_portal(self):
+        token = _sign({"sub": "student-1", "exp": time.time() + 60}, self.private_key)
+        self.assertEqual(auth._verify_token_value(token)["id"], "student-1")
+        auth._request_verification.assert_not_called()
+
+    def test_unknown_kid_falls_back_to_the_portal(self):
+        token = _sign({"sub": "student-2"}, self.private_key, kid="rotated-key")
+        self.assertEqual(auth._verify_token_value(token)["id"], "from-portal")
+        auth._request_verification.assert_called_once_with(token)
+
+    def test_opaque_token_falls_back_to_the_portal_async(self):
+        payload = asyncio.run(auth._verify_token_value_async("opaque-token"))
+        self.assertEqual(payload["id"], "from-portal")
+        auth._request_verification_async.assert_awaited_once_with("opaque-token")
+
+    def test_invalid_signature_is_rejected_without_the_portal(self):
+        token = _sign({"sub": "student-3"}, self.private_key)
+        header, claims, _ = token.split(".")
+        token = f"{header}.{claims}.{_b64url_encode(b'bad-signature')}"
+        with self.assertRaises(auth.HTTPException) as raised:
+            auth._verify_token_value(token)
+        self.assertEqual(raised.exception.status_code, 401)
+        auth._request_verification.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
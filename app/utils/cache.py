@@ -0,0 +1,57 @@
+import threading
+import time
+
+from cachetools import TLRUCache
+
+
+def _entry_expiry(key, entry, now):
+    ttl, _ = entry
+    return now + ttl
+
+
+class ExpiringCache:
+    """
+    Bounded, thread-safe in-process cache where every entry carries its own TTL.
+    Entries live for the lifetime of the process (i.e. across warm Lambda
+    invocations); once `maxsize` is reached the entries closest to expiry are
+    evicted first.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.__cache = TLRUCache(
+            maxsize=maxsize, ttu=_entry_expiry, timer=time.monotonic
+        )
+        self.__lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value for `key`, or `default` if missing or expired.
+        `None` is a valid cached value.
+        """
+        with self.__lock:
+            entry = self.__cache.get(key)
+        if entry is None:
+            return default
+        return entry[1]
+
+    def set(self, key, value, ttl: float) -> None:
+        """
+        Caches `value` under `key` for `ttl` seconds. Non-positive TTLs are ignored.
+        """
+        if ttl <= 0:
+            return
+        with self.__lock:
+            self.__cache[key] = (ttl, value)
+
+    def pop(self, key) -> None:
+        with self.__lock:
+            self.__cache.pop(key, None)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__cache.clear()
+
+    def __len__(self) -> int:
+        with self.__lock:
+            self.__cache.expire()
+            return len(self.__cache)
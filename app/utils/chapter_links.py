@@ -0,0 +1,100 @@
+"""
+Chapter priorities and revision links from `app/static/chapter_to_links.json`,
+indexed per stream.
+
+The file maps a chapter code to its JEE / NEET priority and link. It is read once
+per process into one index per stream (chapter code -> ChapterEntry), and read
+again only when its modification time or size changes.
+"""
+import json
+import os
+import threading
+from typing import Dict, NamedTuple, Optional
+
+from utils.static_assets import STATIC_DIR
+
+CHAPTER_LINKS_PATH = os.path.join(STATIC_DIR, "chapter_to_links.json")
+
+# {stream: (priority column, link column)}
+STREAM_COLUMNS = {
+    "JEE": ("Priority_J", "Link_J"),
+    "NEET": ("Priority_N", "Link_N"),
+}
+DEFAULT_PRIORITY = "Low"
+# Chapters are ordered by rank, highest first; any other priority ("None") ranks 0
+PRIORITY_RANKS = {"High": 3, "Medium": 2, "Low": 1}
+
+
+class ChapterEntry(NamedTuple):
+    priority: Optional[str]
+    rank: int
+    link: Optional[str]
+
+
+def chapter_code(chapter_name: str) -> str:
+    """
+    Returns the code of a chapter from its report name, e.g. "11B10 - Cell Cycle"
+    -> "11B10".
+    """
+    return chapter_name.partition("-")[0].strip()
+
+
+def _build_index(chapters: dict, stream: str) -> Dict[str, ChapterEntry]:
+    priority_column, link_column = STREAM_COLUMNS.get(stream, (None, None))
+    index = {}
+    for code, row in chapters.items():
+        if priority_column is None:
+            # Streams without priorities (CA, CLAT) rank every chapter the same
+            index[code] = ChapterEntry(DEFAULT_PRIORITY, PRIORITY_RANKS["Low"], "")
+            continue
+        priority = row.get(priority_column, DEFAULT_PRIORITY)
+        index[code] = ChapterEntry(
+            priority, PRIORITY_RANKS.get(priority, 0), row.get(link_column, "")
+        )
+    return index
+
+
+class ChapterLinks:
+    """
+    Per-stream chapter index over a chapter_to_links.json file, reloaded when the
+    file changes.
+    """
+
+    def __init__(self, path: str = CHAPTER_LINKS_PATH) -> None:
+        self.__path = path
+        self.__lock = threading.Lock()
+        self.__signature = None
+        self.__chapters = {}
+        # {stream: {chapter code: ChapterEntry}}, built on first use per stream
+        self.__indexes = {}
+
+    def __reload_if_changed(self) -> None:
+        stat = os.stat(self.__path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self.__signature:
+            return
+        with self.__lock:
+            if signature == self.__signature:
+                return
+            with open(self.__path, "r") as f:
+                self.__chapters = json.load(f)
+            self.__indexes = {}
+            self.__signature = signature
+
+    def for_stream(self, stream: str) -> Dict[str, ChapterEntry]:
+        """
+        Returns the chapter code -> ChapterEntry index for a stream ("JEE",
+        "NEET", ...). Chapters missing from it have the default priority.
+        """
+        self.__reload_if_changed()
+        index = self.__indexes.get(stream)
+        if index is None:
+            with self.__lock:
+                index = self.__indexes.get(stream)
+                if index is None:
+                    index = _build_index(self.__chapters, stream)
+                    self.__indexes[stream] = index
+        return index
+
+
+chapter_links = ChapterLinks()
@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stops calling a struggling dependency for a while instead of piling more load
+    on it.
+
+    The outcome of the last `window_size` calls is tracked. Once at least
+    `min_calls` are recorded and either the failure rate or the rate of calls
+    slower than `slow_call_seconds` reaches its threshold, the breaker opens and
+    `allow_request` refuses calls for `open_seconds`. After that a single probe
+    call is let through (half-open): success closes the breaker, failure opens it
+    again.
+
+    Thread-safe; usable from sync code and from the event loop.
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 10.0,
+        slow_call_rate_threshold: float = 0.5,
+        window_size: int = 20,
+        min_calls: int = 5,
+        open_seconds: float = 30.0,
+    ) -> None:
+        self.__failure_rate_threshold = failure_rate_threshold
+        self.__slow_call_seconds = slow_call_seconds
+        self.__slow_call_rate_threshold = slow_call_rate_threshold
+        self.__min_calls = min_calls
+        self.__open_seconds = open_seconds
+        # (failed, slow) per call
+        self.__outcomes = deque(maxlen=window_size)
+        self.__state = CLOSED
+        self.__opened_at = 0.0
+        self.__probe_started_at = None
+        self.__times_opened = 0
+        self.__lock = threading.Lock()
+
+    def __open(self, now: float) -> None:
+        self.__state = OPEN
+        self.__opened_at = now
+        self.__probe_started_at = None
+        self.__times_opened += 1
+
+    def __rates(self):
+        if not self.__outcomes:
+            return 0.0, 0.0
+        failures = sum(1 for failed, _ in self.__outcomes if failed)
+        slow_calls = sum(1 for _, slow in self.__outcomes if slow)
+        return failures / len(self.__outcomes), slow_calls / len(self.__outcomes)
+
+    @property
+    def retry_after(self) -> int:
+        """
+        Seconds until the breaker lets a call through again (0 if it does now).
+        """
+        with self.__lock:
+            if self.__state == CLOSED:
+                return 0
+            remaining = self.__opened_at + self.__open_seconds - time.monotonic()
+            return max(int(remaining + 0.999), 1)
+
+    @property
+    def is_open(self) -> bool:
+        """
+        True while calls are refused outright (open and still cooling down).
+        """
+        with self.__lock:
+            return (
+                self.__state == OPEN
+                and time.monotonic() < self.__opened_at + self.__open_seconds
+            )
+
+    def allow_request(self) -> bool:
+        """
+        Whether a call may go ahead. A call that was allowed must be followed by
+        `record_success` or `record_failure`.
+        """
+        now = time.monotonic()
+        with self.__lock:
+            if self.__state == CLOSED:
+                return True
+            if self.__state == OPEN:
+                if now < self.__opened_at + self.__open_seconds:
+                    return False
+                self.__state = HALF_OPEN
+                self.__probe_started_at = None
+            # Half-open: one probe at a time. A probe that never reported back
+            # (e.g. cancelled) stops blocking after another cool-down period.
+            if (
+                self.__probe_started_at is not None
+                and now < self.__probe_started_at + self.__open_seconds
+            ):
+                return False
+            self.__probe_started_at = now
+            return True
+
+    def __record(self, failed: bool, duration: float) -> None:
+        now = time.monotonic()
+        slow = duration >= self.__slow_call_seconds
+        with self.__lock:
+            if self.__state == HALF_OPEN:
+                if failed or slow:
+                    self.__open(now)
+                else:
+                    self.__state = CLOSED
+                    self.__outcomes.clear()
+                return
+            self.__outcomes.append((failed, slow))
+            if self.__state != CLOSED or len(self.__outcomes) < self.__min_calls:
+                return
+            failure_rate, slow_call_rate = self.__rates()
+            if (
+                failure_rate >= self.__failure_rate_threshold
+                or slow_call_rate >= self.__slow_call_rate_threshold
+            ):
+                self.__open(now)
+                self.__outcomes.clear()
+
+    def record_success(self, duration: float) -> None:
+        self.__record(False, duration)
+
+    def record_failure(self, duration: float) -> None:
+        self.__record(True, duration)
+
+    def snapshot(self) -> dict:
+        with self.__lock:
+            failure_rate, slow_call_rate = self.__rates()
+            return {
+                "state": self.__state,
+                "recent_calls": len(self.__outcomes),
+                "failure_rate": round(failure_rate, 3),
+                "slow_call_rate": round(slow_call_rate, 3),
+                "times_opened": self.__times_opened,
+            }
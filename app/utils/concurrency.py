@@ -0,0 +1,75 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from starlette.concurrency import iterate_in_threadpool
+
+
+async def _iterate(items):
+    for item in items:
+        yield item
+
+
+async def iterate_pages(pages):
+    """
+    Yields the items of a blocking iterable of pages (e.g.
+    `ReportsDB.get_session_quiz_report_pages_v2`), fetching each page in the
+    threadpool when the previous one has been consumed.
+    """
+    async for page in iterate_in_threadpool(pages):
+        for item in page:
+            yield item
+
+
+async def map_bounded(function, items, limit: int):
+    """
+    Runs the coroutine `function(item)` for every item with at most `limit`
+    running at once, and yields the results as they complete (not in input order).
+    `items` may be an iterable or an async iterable; it is read lazily, one item
+    each time a slot frees up, so memory stays bounded to `limit` items and
+    results.
+    """
+    if not hasattr(items, "__aiter__"):
+        items = _iterate(items)
+    pending = set()
+    try:
+        async for item in items:
+            if len(pending) >= limit:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+            pending.add(asyncio.ensure_future(function(item)))
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                yield task.result()
+    finally:
+        # The consumer stopped early (e.g. client disconnected)
+        for task in pending:
+            task.cancel()
+        if hasattr(items, "aclose"):
+            await items.aclose()
+
+
+# For blocking calls (e.g. DynamoDB queries) fanned out from sync endpoints, which
+# already run in a threadpool worker
+_thread_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="concurrent")
+
+
+def call_concurrently(*functions):
+    """
+    Calls the zero-argument callables at the same time, the first one in the
+    calling thread and the rest in a shared thread pool, and returns their results
+    in order once all have finished. The first exception raised (in argument
+    order) is re-raised.
+    """
+    futures = [_thread_pool.submit(function) for function in functions[1:]]
+    try:
+        first_result = functions[0]()
+    finally:
+        # Wait for every call even if the first failed, so none outlives the caller
+        wait(futures)
+    return [first_result] + [future.result() for future in futures]
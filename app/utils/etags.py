@@ -0,0 +1,150 @@
+"""
+Strong ETags and conditional GETs for rendered reports.
+
+A report page is a pure function of the source items it's rendered from, the
+request (path, query and launch token) and the code + templates that render it, so
+its ETag is a hash of exactly those; a matching If-None-Match gets a 304 before
+anything is rendered. The last ETag served for each request is also remembered for
+REPORT_VALIDATOR_TTL seconds, which lets a repeat request be answered with a 304
+before the source items are even read (at the cost of up to that long serving a
+client's copy after the item changed).
+"""
+import hashlib
+import json
+import os
+
+from fastapi import Request, Response
+
+from internal.compression import strip_representation
+from utils.cache import ExpiringCache
+
+REPORT_VALIDATOR_TTL = float(os.getenv("REPORT_VALIDATOR_TTL") or 300)
+REPORT_VALIDATOR_MAX_SIZE = 10000
+
+# Reports are per student, and a browser must revalidate before reusing its copy
+REPORT_CACHE_CONTROL = "private, no-cache"
+
+
+def fingerprint_files(paths) -> str:
+    """
+    Returns a hex digest of the contents of the given files (directories are
+    walked), e.g. to version ETags by the code and templates that render a page.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, file_names in os.walk(path):
+                files.extend(os.path.join(root, file_name) for file_name in file_names)
+        else:
+            files.append(path)
+    digest = hashlib.sha256()
+    for file_path in sorted(files):
+        with open(file_path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def make_etag(*parts) -> str:
+    """
+    Returns a strong ETag for JSON-serializable parts (DynamoDB Decimals and
+    other non-JSON values are hashed by their string form).
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return '"' + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Whether the request's If-None-Match covers `etag` (weak comparison, as
+    RFC 9110 specifies for If-None-Match). ETags of compressed representations
+    match the ETag of their content.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return any(
+        strip_representation(candidate.removeprefix("W/")) == etag
+        for candidate in candidates
+    )
+
+
+def _set_validator_headers(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REPORT_CACHE_CONTROL
+    return response
+
+
+class ReportValidators:
+    """
+    Conditional GET handling for one family of report endpoints.
+
+    params:
+        version: Fingerprint of the code and templates rendering the reports;
+            part of every ETag, so a deploy that changes them changes every ETag
+    """
+
+    def __init__(self, version: str, ttl: float = REPORT_VALIDATOR_TTL) -> None:
+        self.__version = version
+        self.__ttl = ttl
+        self.__etags = ExpiringCache(maxsize=REPORT_VALIDATOR_MAX_SIZE)
+
+    @staticmethod
+    def __request_key(request: Request) -> str:
+        launch_token = getattr(request.state, "report_launch_token", None)
+        return make_etag(
+            request.url.path,
+            sorted(request.query_params.multi_items()),
+            launch_token,
+        )
+
+    def check_cached(self, request: Request):
+        """
+        Returns a 304 response if the client's copy matches the ETag recently
+        served for this same request, else None. Call before reading the source.
+        """
+        etag = self.__etags.get(self.__request_key(request))
+        if etag is not None and etag_matches(request, etag):
+            return _set_validator_headers(Response(status_code=304), etag)
+        return None
+
+    def etag_for(self, request: Request, source) -> str:
+        """
+        Returns the ETag of the page rendered for `request` from `source`:
+        everything the page is rendered from besides the request (e.g. the
+        DynamoDB items), JSON-serializable.
+        """
+        return make_etag(self.__version, self.__request_key(request), source)
+
+    def not_modified(self, request: Request, etag: str):
+        """
+        Returns a 304 response if the request's If-None-Match covers `etag`, else
+        None.
+        """
+        if not etag_matches(request, etag):
+            return None
+        self.__etags.set(self.__request_key(request), etag, self.__ttl)
+        return _set_validator_headers(Response(status_code=304), etag)
+
+    def with_etag(self, request: Request, response, etag: str):
+        """
+        Adds the validator headers to a successful response (and remembers the
+        ETag for `check_cached`). Error pages are returned unchanged.
+        """
+        if not isinstance(response, Response) or response.status_code != 200:
+            return response
+        self.__etags.set(self.__request_key(request), etag, self.__ttl)
+        return _set_validator_headers(response, etag)
+
+    def respond(self, request: Request, source, render):
+        """
+        Returns a 304 if the client's copy of the page rendered from `source` is
+        current; otherwise calls `render()` and adds the ETag to its response.
+        """
+        etag = self.etag_for(request, source)
+        not_modified = self.not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+        return self.with_etag(request, render(), etag)
@@ -3,8 +3,6 @@ import os
 from typing import List, Dict, Optional
 import logging
 
-from openai import AsyncOpenAI
-
 logger = logging.getLogger(__name__)
 
 
@@ -12,6 +10,9 @@ class LLMSummaryGenerator:
     """Generate AI-powered summaries for form responses using OpenRouter."""
 
     def __init__(self):
+        # Imported here so that only form responses pay for the OpenAI SDK
+        from openai import AsyncOpenAI
+
         self.client = AsyncOpenAI(
             api_key=os.getenv("OPENROUTER_API_KEY"),
             base_url="https://openrouter.ai/api/v1",
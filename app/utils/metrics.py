@@ -0,0 +1,41 @@
+import threading
+from collections import defaultdict
+
+
+class Metrics:
+    """
+    In-process counters and gauges, reported by GET /metrics.
+
+    Values are per Lambda container (they reset on a cold start); they're meant for
+    spotting trouble on a warm container and in logs, not as a durable time series.
+    """
+
+    def __init__(self) -> None:
+        self.__counters = defaultdict(int)
+        self.__gauges = {}
+        self.__lock = threading.Lock()
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self.__lock:
+            self.__counters[name] += value
+
+    def register_gauge(self, name: str, read_value) -> None:
+        """
+        params:
+            name: The gauge name
+            read_value: Zero-argument callable returning the current value
+        """
+        self.__gauges[name] = read_value
+
+    def snapshot(self) -> dict:
+        with self.__lock:
+            counters = dict(self.__counters)
+        return {
+            "counters": counters,
+            "gauges": {
+                name: read_value() for name, read_value in self.__gauges.items()
+            },
+        }
+
+
+metrics = Metrics()
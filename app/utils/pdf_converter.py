@@ -1,300 +1,681 @@
+import asyncio
+import hashlib
+import html
 import os
-import requests
-import base64
-import mimetypes
-from fastapi.responses import StreamingResponse, HTMLResponse
 import re
-from bs4 import BeautifulSoup
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+from fastapi.responses import Response, StreamingResponse, HTMLResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+
+from internal.artifact_store import create_artifact_store
+from internal.http_clients import HttpClientPool
+from utils.circuit_breaker import CircuitBreaker
+from utils.metrics import metrics
+from utils.static_assets import get_static_assets
+
+# Calls to the PDF service share keep-alive connections. Renders can be slow, so the
+# read timeout is generous; connection failures and 5xx answers are retried (before
+# anything has been sent to the client) up to PDF_SERVICE_MAX_ATTEMPTS times.
+PDF_SERVICE_CONNECT_TIMEOUT = float(os.getenv("PDF_SERVICE_CONNECT_TIMEOUT") or 2.0)
+PDF_SERVICE_READ_TIMEOUT = float(os.getenv("PDF_SERVICE_READ_TIMEOUT") or 30.0)
+PDF_SERVICE_MAX_ATTEMPTS = int(os.getenv("PDF_SERVICE_MAX_ATTEMPTS") or 2)
+
+_pdf_service_clients = HttpClientPool(
+    timeout=httpx.Timeout(
+        PDF_SERVICE_READ_TIMEOUT, connect=PDF_SERVICE_CONNECT_TIMEOUT
+    ),
+    limits=httpx.Limits(
+        max_connections=20, max_keepalive_connections=10, keepalive_expiry=60
+    ),
+)
+
+# Generated PDFs are cached by a hash of the final HTML sent to the PDF service, so
+# repeat downloads of a report skip the service entirely.
+# PDF_CACHE_BACKEND: "disk" (per-container LRU in /tmp), "s3" (shared), or "none".
+PDF_CACHE_BACKEND = os.getenv("PDF_CACHE_BACKEND") or "disk"
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR") or os.path.join(
+    tempfile.gettempdir(), "report-pdf-cache"
+)
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES") or 256 * 1024 * 1024)
+PDF_CACHE_S3_BUCKET = os.getenv("PDF_CACHE_S3_BUCKET")
+PDF_CACHE_S3_PREFIX = os.getenv("PDF_CACHE_S3_PREFIX") or "report-pdfs/"
+PDF_CACHE_S3_ENDPOINT_URL = os.getenv("PDF_CACHE_S3_ENDPOINT_URL") or None
+
+_pdf_cache = create_artifact_store(
+    PDF_CACHE_BACKEND,
+    directory=PDF_CACHE_DIR,
+    max_bytes=PDF_CACHE_MAX_BYTES,
+    bucket=PDF_CACHE_S3_BUCKET,
+    prefix=PDF_CACHE_S3_PREFIX,
+    endpoint_url=PDF_CACHE_S3_ENDPOINT_URL,
+)
+
+# Admission control for the PDF service: at most PDF_RENDER_MAX_CONCURRENCY renders
+# per container at once, and a request that waits longer than
+# PDF_RENDER_QUEUE_TIMEOUT seconds for a slot gets a 503 instead. The circuit breaker
+# opens when too many recent renders failed or took longer than
+# PDF_BREAKER_SLOW_CALL_SECONDS, and then every render gets a 503 (with Retry-After)
+# straight away for PDF_BREAKER_OPEN_SECONDS rather than queueing on a sick service.
+PDF_RENDER_MAX_CONCURRENCY = int(os.getenv("PDF_RENDER_MAX_CONCURRENCY") or 8)
+PDF_RENDER_QUEUE_TIMEOUT = float(os.getenv("PDF_RENDER_QUEUE_TIMEOUT") or 5.0)
+PDF_BREAKER_FAILURE_RATE = float(os.getenv("PDF_BREAKER_FAILURE_RATE") or 0.5)
+PDF_BREAKER_SLOW_CALL_SECONDS = float(
+    os.getenv("PDF_BREAKER_SLOW_CALL_SECONDS") or 20.0
+)
+PDF_BREAKER_OPEN_SECONDS = float(os.getenv("PDF_BREAKER_OPEN_SECONDS") or 30.0)
+
+# Fallback CSS used when the template does not link style.css, or it is missing
+DEFAULT_CSS = """
+html {
+    height: 100%;
+}
+
+body {
+    font-family: "Avenir", Arial, Helvetica, sans-serif;
+    margin-left: auto;
+    margin-right: auto;
+    font-size: 14pt;
+    text-align: center;
+    height: 100%;
+    margin-bottom: 25px;
+}
+
+#name_card,
+#total_stats_card {
+    display: table;
+    margin: 20px auto 0 auto;
+    text-align: center;
+    font-size: 18pt;
+    background-color: #EAEDFD;
+    border-radius: 8px;
+    padding: 8px 25px;
+    box-shadow: none;
+    width: 40%;
+}
+
+#answer_sheet_button {
+    display: table;
+    margin: 30px auto 0 auto;
+    text-align: center;
+    font-size: 18pt;
+    background-color: #29973E;
+    border-radius: 3px;
+    text-decoration: none;
+    color: white;
+    padding: 18px 60px;
+    box-shadow: 1px 1px 5px #535353;
+}
+
+#test_summary_card,
+#report_header_card {
+    display: inline-flex;
+    margin-left: auto;
+    margin-right: auto;
+    margin-top: 30px;
+    font-weight: bold;
+    justify-content: center;
+    background-color: #EBF5FE;
+    border-radius: 8px;
+    padding: 8px 25px;
+    box-shadow: none;
+    width: auto;
+    max-width: 40%;
+}
+
+#test_summary_card .percentage {
+    margin-right: 15px;
+    justify-content: center;
+    align-items: center;
+    background: orange;
+    border-radius: 50%;
+    text-align: center;
+    padding: 5px;
+    aspect-ratio: 1;
+    display: flex;
+    font-size: 18pt;
+}
+
+#section_heading {
+    padding: 8px;
+    font-size: 24pt;
+    font-weight: bold;
+    margin-top: 30px;
+    text-transform: uppercase;
+}
+
+#score_details,
+#daywise_stats {
+    border-collapse: collapse;
+    padding: 0 30px 0 30px;
+    margin-left: auto;
+    margin-right: auto;
+    table-layout: fixed;
+    margin-top: 30px;
+    margin-bottom: 30px;
+    width: 70%;
+}
+
+#score_details td,
+#daywise_stats td {
+    padding: 10px 20px 10px 20px;
+    font-size: 20pt;
+    text-align: center;
+}
+
+#score_details tr:nth-child(even) {
+    background-color: white;
+}
+
+#score_details tr:nth-child(odd) {
+    background-color: orange;
+}
+
+#chapter_details tr:nth-child(even) {
+    background-color: white;
+}
+
+#chapter_details tr:nth-child(odd) {
+    background-color: #FEFBEB;
+}
+
+#chapter_details tr:first-child td {
+    vertical-align: top;
+    background-color: orange;
+    color: black;
+    font-weight: bold;
+}
+
+#message_section {
+    width: 70%;
+    margin: 30px auto;
+    background-color: transparent;
+}
+
+.message {
+    margin: 15px 0;
+    font-size: 16pt;
+    text-align: center;
+}
+
+.buttons_container {
+    display: flex;
+    justify-content: center;
+    align-items: center;
+    flex-wrap: wrap;
+    gap: 30px;
+    margin: 30px 0;
+}
+
+.button_wrapper {
+    display: flex;
+    flex-direction: column;
+    align-items: center;
+    margin: 10px;
+}
+
+.help_text {
+    color: #888;
+    font-size: 14px;
+    margin-top: 8px;
+}
+
+.answer_sheet_button {
+    display: table;
+    text-align: center;
+    font-size: 20pt;
+    background-color: #29973E;
+    border-radius: 3px;
+    text-decoration: none;
+    color: white;
+    padding: 18px 60px;
+    box-shadow: 1px 1px 5px #535353;
+}
+"""
+
+
+# Plain or fingerprinted ("style.<12 hex>.css") stylesheet URL
+_STYLESHEET_HREF = r"/static/style(?:\.[0-9a-f]{12})?\.css"
+_STYLESHEET_LINK_PATTERN = re.compile(
+    r"<link\b[^>]*\bhref\s*=\s*[\"']?[^\"'>]*" + _STYLESHEET_HREF, re.IGNORECASE
+)
+_HEAD_END_PATTERN = re.compile(r"</head\s*>", re.IGNORECASE)
+_IMG_TAG_PATTERN = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+_SRC_ATTRIBUTE_PATTERN = re.compile(
+    r"(\ssrc\s*=\s*)(?:\"([^\"]*)\"|'([^']*)'|([^\s\"'>]+))", re.IGNORECASE
+)
+
+
+def _is_local_src(src):
+    return bool(src) and not src.startswith("http") and not src.startswith("data:")
+
+
+def _get_stylesheet(assets, links_stylesheet):
+    # Inline the linked stylesheet; fall back to the default CSS if there is none
+    css_content = assets.stylesheet if links_stylesheet else None
+    return DEFAULT_CSS if css_content is None else css_content
+
+
+def _get_image_data_uri(assets, src):
+    data_uri = assets.get_data_uri(src)
+    if not data_uri:
+        print(f"Image not found in static assets: {src}")
+    return data_uri
+
+
+def inline_static_assets(html_content: str) -> str:
+    """
+    Inlines the stylesheet and local images into rendered report HTML, ready to
+    be sent to the PDF service. Works on the raw markup with a handful of
+    precompiled patterns instead of building a DOM: the `<style>` tag is
+    inserted right before `</head>` and only `<img>` tags are rewritten, so the
+    rest of the document is passed through untouched.
+
+    Produces the same stylesheet and image sources as `inline_static_assets_with_soup`;
+    `benchmarks/html_rewrite.py` checks this on the real templates.
+    """
+    assets = get_static_assets()
+
+    def inline_image(match):
+        tag = match.group(0)
+        src_match = _SRC_ATTRIBUTE_PATTERN.search(tag)
+        if not src_match:
+            return tag
+        raw_src = next(value for value in src_match.groups()[1:] if value is not None)
+        src = html.unescape(raw_src)
+        if not _is_local_src(src):
+            return tag
+        data_uri = _get_image_data_uri(assets, src)
+        if not data_uri:
+            return tag
+        return f'{tag[: src_match.start()]}{src_match.group(1)}"{data_uri}"{tag[src_match.end() :]}'
+
+    css_content = _get_stylesheet(
+        assets, _STYLESHEET_LINK_PATTERN.search(html_content) is not None
+    )
+    html_content = _IMG_TAG_PATTERN.sub(inline_image, html_content)
+
+    style_tag = f"<style>{css_content}</style>"
+    head_end = _HEAD_END_PATTERN.search(html_content)
+    if head_end is None:
+        return style_tag + html_content
+    return (
+        html_content[: head_end.start()] + style_tag + html_content[head_end.start() :]
+    )
+
+
+def inline_static_assets_with_soup(html_content: str) -> str:
+    """
+    Reference implementation of `inline_static_assets` on a full BeautifulSoup
+    parse. Kept for comparison in `benchmarks/html_rewrite.py`; not used when serving.
+    """
+    from bs4 import BeautifulSoup
 
+    assets = get_static_assets()
 
-def convert_template_to_pdf(template_response, debug=False):
+    soup = BeautifulSoup(html_content, "html.parser")
+
+    css_link = soup.find("link", href=re.compile(_STYLESHEET_HREF))
+    style_tag = soup.new_tag("style")
+    style_tag.string = _get_stylesheet(assets, css_link is not None)
+    soup.head.append(style_tag)
+
+    for img in soup.find_all("img"):
+        src = img.get("src")
+        if _is_local_src(src):
+            data_uri = _get_image_data_uri(assets, src)
+            if data_uri:
+                img["src"] = data_uri
+
+    return str(soup)
+
+
+class PdfServiceUnavailable(Exception):
+    """
+    The PDF render was refused by the render gate (circuit open or no free slot).
     """
-    Convert a TemplateResponse to a PDF using the HTML-to-PDF server.
-    NOTE: This is generated by AI (cursor), but has been tested and works.
 
-    Args:
-        template_response: The TemplateResponse to convert
-        debug (bool): If True, returns the HTML content instead of sending to PDF service
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"PDF service unavailable, retry after {retry_after}s")
+        self.retry_after = retry_after
 
-    Returns:
-        StreamingResponse: The PDF response if successful
-        HTMLResponse: An error response if conversion fails or the HTML content if debug is True
+
+class PdfRenderGate:
     """
-    html_content = template_response.body
-    html_content = html_content.decode("utf-8")  # Decode bytes to string
+    Shared by every caller of the PDF service in this process: caps concurrent
+    renders, bounds how long a render may wait for a slot, and feeds each render's
+    outcome and latency to a circuit breaker that refuses renders while the
+    service is failing or slow.
 
-    # Convert bytes to string if necessary
-    if isinstance(html_content, bytes):
-        html_content = html_content.decode()
+    Like `HttpClientPool`, the semaphore is kept per running event loop.
+    """
 
-    # Use BeautifulSoup to parse the HTML
-    soup = BeautifulSoup(html_content, "html.parser")
+    def __init__(
+        self, max_concurrency: int, queue_timeout: float, breaker: CircuitBreaker
+    ) -> None:
+        self.__max_concurrency = max_concurrency
+        self.__queue_timeout = queue_timeout
+        self.breaker = breaker
+        self.__semaphore = None
+        self.__semaphore_loop = None
+        self.in_flight = 0
+        self.waiting = 0
+
+    def __get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self.__semaphore is None or self.__semaphore_loop is not loop:
+            self.__semaphore = asyncio.Semaphore(self.__max_concurrency)
+            self.__semaphore_loop = loop
+        return self.__semaphore
+
+    def check(self) -> None:
+        """
+        Raises PdfServiceUnavailable while the circuit is open, so callers can
+        refuse before doing any work.
+        """
+        if self.breaker.is_open:
+            metrics.increment("pdf.rejected.circuit_open")
+            raise PdfServiceUnavailable(self.breaker.retry_after)
 
-    # Try to find and inline the CSS from file first
-    css_added = False
-    css_link = soup.find("link", href=re.compile(r"/static/style.css"))
-
-    if css_link:
-        # Define possible CSS file paths to try
-        css_paths = [
-            "static/style.css",
-            "app/static/style.css",
-            "../static/style.css",
-            os.path.join(os.getcwd(), "static", "style.css"),
-            os.path.join(os.getcwd(), "app", "static", "style.css"),
-        ]
-
-        # Print current working directory for debugging
-        print(f"Current working directory: {os.getcwd()}")
-
-        # Try each path until we find one that works
-        for css_path in css_paths:
-            try:
-                print(f"Trying CSS path: {css_path}")
-                with open(css_path, "r") as f:
-                    css_content = f.read()
-
-                # Add the CSS content as a style tag in the HTML
-                style_tag = soup.new_tag("style")
-                style_tag.string = css_content
-                soup.head.append(style_tag)
-                css_added = True
-                print(f"CSS successfully added from file: {css_path}")
-                break
-            except FileNotFoundError:
-                print(f"CSS file not found: {css_path}")
-            except Exception as e:
-                print(f"Error reading CSS file {css_path}: {str(e)}")
-
-    # If we couldn't add CSS from file, add default CSS directly
-    if not css_added:
-        print("Using default inline CSS")
-        # Default CSS that covers important styling for reports
-        default_css = """
-        html {
-            height: 100%;
-        }
-
-        body {
-            font-family: "Avenir", Arial, Helvetica, sans-serif;
-            margin-left: auto;
-            margin-right: auto;
-            font-size: 14pt;
-            text-align: center;
-            height: 100%;
-            margin-bottom: 25px;
-        }
-
-        #name_card,
-        #total_stats_card {
-            display: table;
-            margin: 20px auto 0 auto;
-            text-align: center;
-            font-size: 18pt;
-            background-color: #EAEDFD;
-            border-radius: 8px;
-            padding: 8px 25px;
-            box-shadow: none;
-            width: 40%;
-        }
-
-        #answer_sheet_button {
-            display: table;
-            margin: 30px auto 0 auto;
-            text-align: center;
-            font-size: 18pt;
-            background-color: #29973E;
-            border-radius: 3px;
-            text-decoration: none;
-            color: white;
-            padding: 18px 60px;
-            box-shadow: 1px 1px 5px #535353;
-        }
-
-        #test_summary_card,
-        #report_header_card {
-            display: inline-flex;
-            margin-left: auto;
-            margin-right: auto;
-            margin-top: 30px;
-            font-weight: bold;
-            justify-content: center;
-            background-color: #EBF5FE;
-            border-radius: 8px;
-            padding: 8px 25px;
-            box-shadow: none;
-            width: auto;
-            max-width: 40%;
-        }
-
-        #test_summary_card .percentage {
-            margin-right: 15px;
-            justify-content: center;
-            align-items: center;
-            background: orange;
-            border-radius: 50%;
-            text-align: center;
-            padding: 5px;
-            aspect-ratio: 1;
-            display: flex;
-            font-size: 18pt;
-        }
-
-        #section_heading {
-            padding: 8px;
-            font-size: 24pt;
-            font-weight: bold;
-            margin-top: 30px;
-            text-transform: uppercase;
-        }
-
-        #score_details,
-        #daywise_stats {
-            border-collapse: collapse;
-            padding: 0 30px 0 30px;
-            margin-left: auto;
-            margin-right: auto;
-            table-layout: fixed;
-            margin-top: 30px;
-            margin-bottom: 30px;
-            width: 70%;
-        }
-
-        #score_details td,
-        #daywise_stats td {
-            padding: 10px 20px 10px 20px;
-            font-size: 20pt;
-            text-align: center;
-        }
-
-        #score_details tr:nth-child(even) {
-            background-color: white;
-        }
-
-        #score_details tr:nth-child(odd) {
-            background-color: orange;
-        }
-
-        #chapter_details tr:nth-child(even) {
-            background-color: white;
-        }
-
-        #chapter_details tr:nth-child(odd) {
-            background-color: #FEFBEB;
-        }
-
-        #chapter_details tr:first-child td {
-            vertical-align: top;
-            background-color: orange;
-            color: black;
-            font-weight: bold;
-        }
-
-        #message_section {
-            width: 70%;
-            margin: 30px auto;
-            background-color: transparent;
-        }
-
-        .message {
-            margin: 15px 0;
-            font-size: 16pt;
-            text-align: center;
-        }
-
-        .buttons_container {
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            flex-wrap: wrap;
-            gap: 30px;
-            margin: 30px 0;
-        }
-
-        .button_wrapper {
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            margin: 10px;
-        }
-
-        .help_text {
-            color: #888;
-            font-size: 14px;
-            margin-top: 8px;
-        }
-
-        .answer_sheet_button {
-            display: table;
-            text-align: center;
-            font-size: 20pt;
-            background-color: #29973E;
-            border-radius: 3px;
-            text-decoration: none;
-            color: white;
-            padding: 18px 60px;
-            box-shadow: 1px 1px 5px #535353;
-        }
+    @asynccontextmanager
+    async def slot(self):
         """
+        Holds a render slot for the duration of the block. Raises
+        PdfServiceUnavailable if none frees up within the queue timeout or the
+        circuit breaker refuses the render.
+        """
+        semaphore = self.__get_semaphore()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.__queue_timeout)
+        except asyncio.TimeoutError:
+            metrics.increment("pdf.rejected.queue_timeout")
+            raise PdfServiceUnavailable(max(int(self.__queue_timeout), 1))
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            if not self.breaker.allow_request():
+                metrics.increment("pdf.rejected.circuit_open")
+                raise PdfServiceUnavailable(self.breaker.retry_after)
+            yield
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+
+_pdf_render_gate = PdfRenderGate(
+    PDF_RENDER_MAX_CONCURRENCY,
+    PDF_RENDER_QUEUE_TIMEOUT,
+    CircuitBreaker(
+        failure_rate_threshold=PDF_BREAKER_FAILURE_RATE,
+        slow_call_seconds=PDF_BREAKER_SLOW_CALL_SECONDS,
+        open_seconds=PDF_BREAKER_OPEN_SECONDS,
+    ),
+)
+metrics.register_gauge("pdf.renders_in_flight", lambda: _pdf_render_gate.in_flight)
+metrics.register_gauge("pdf.renders_waiting", lambda: _pdf_render_gate.waiting)
+metrics.register_gauge("pdf.circuit_breaker", _pdf_render_gate.breaker.snapshot)
+
+
+async def close_pdf_service_clients() -> None:
+    """
+    Closes the running loop's connections to the PDF service; call before a loop
+    started with `asyncio.run` ends.
+    """
+    await _pdf_service_clients.aclose()
 
-        style_tag = soup.new_tag("style")
-        style_tag.string = default_css
-        soup.head.append(style_tag)
 
-    # Fix image URLs - convert local images to base64
-    imgs = soup.find_all("img")
-    for img in imgs:
-        src = img.get("src")
-        if src and not src.startswith("http") and not src.startswith("data:"):
-            # Define possible image paths to try
-            img_paths = [
-                os.path.join("static", src.lstrip("/")),
-                os.path.join("app/static", src.lstrip("/")),
-                os.path.join(os.getcwd(), "static", src.lstrip("/")),
-                os.path.join(os.getcwd(), "app/static", src.lstrip("/")),
-            ]
-
-            for img_path in img_paths:
+def pdf_cache_key(html_content: str) -> str:
+    return hashlib.sha256(html_content.encode("utf-8")).hexdigest()
+
+
+async def _open_pdf_service_stream(html_content: str):
+    """
+    POSTs the HTML to the PDF service and returns the streaming `httpx.Response`
+    once its status is known, or None if the service could not be reached.
+    """
+    url = os.getenv("HTML_TO_PDF_SERVER_URL")
+    client = _pdf_service_clients.get_async_client()
+    attempt = 0
+    while True:
+        attempt += 1
+        print(f"Sending HTML to PDF service at: {url}")
+        request = client.build_request("POST", url, json={"html": html_content})
+        try:
+            response = await client.send(request, stream=True)
+        except httpx.TransportError as e:
+            if attempt < PDF_SERVICE_MAX_ATTEMPTS:
+                continue
+            print(f"HTML to PDF service unreachable: {e!r}")
+            return None
+        if response.status_code >= 500 and attempt < PDF_SERVICE_MAX_ATTEMPTS:
+            await response.aclose()
+            continue
+        return response
+
+
+@asynccontextmanager
+async def _pdf_service_call(html_content: str):
+    """
+    Renders through the PDF render gate: yields the streaming `httpx.Response`
+    (or None if the service could not be reached) while holding a render slot,
+    and reports the outcome to the circuit breaker when the block exits. Raises
+    PdfServiceUnavailable if the gate refuses the render.
+    """
+    async with _pdf_render_gate.slot():
+        metrics.increment("pdf.renders")
+        started = time.monotonic()
+        response = await _open_pdf_service_stream(html_content)
+        # The service renders before it answers, so time to headers is render time
+        duration = time.monotonic() - started
+        failed = response is None or response.status_code >= 500
+        try:
+            yield response
+        except httpx.HTTPError:
+            failed = True
+            raise
+        except BaseException:
+            # Cancelled (e.g. the client went away): says nothing about the service
+            failed = None
+            raise
+        finally:
+            if failed:
+                metrics.increment("pdf.render_failures")
+                _pdf_render_gate.breaker.record_failure(duration)
+            elif failed is not None:
+                _pdf_render_gate.breaker.record_success(duration)
+
+
+async def fetch_pdf(html_content: str):
+    """
+    Returns the PDF for HTML that already went through `inline_static_assets`,
+    from the PDF cache when possible, or None if the PDF service fails or the
+    render gate refuses the render. Used where the PDF is needed as bytes rather
+    than streamed to the client.
+    """
+    cache_key = pdf_cache_key(html_content)
+    if _pdf_cache is not None:
+        cached_pdf = await run_in_threadpool(_pdf_cache.get, cache_key)
+        if cached_pdf is not None:
+            metrics.increment("pdf.cache_hits")
+            return cached_pdf
+
+    try:
+        async with _pdf_service_call(html_content) as response:
+            if response is None:
+                return None
+            try:
+                content = await response.aread()
+            except httpx.HTTPError as e:
+                print(f"HTML to PDF service failed mid-response: {e!r}")
+                raise
+            finally:
+                await response.aclose()
+    except PdfServiceUnavailable as e:
+        print(f"PDF render refused: {e}")
+        return None
+    except httpx.HTTPError:
+        return None
+    if response.status_code != 200:
+        print(
+            f"HTML to PDF service error: {response.status_code} - "
+            f"{content.decode('utf-8', 'replace')}"
+        )
+        return None
+
+    if _pdf_cache is not None:
+        await run_in_threadpool(_pdf_cache.put, cache_key, content, "application/pdf")
+    return content
+
+
+def _pdf_error_response() -> HTMLResponse:
+    return HTMLResponse(content="Error generating PDF", status_code=500)
+
+
+def _pdf_unavailable_response(retry_after: int) -> HTMLResponse:
+    return HTMLResponse(
+        content="PDF generation is busy, please try again shortly",
+        status_code=503,
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+class PdfServiceResponse(StreamingResponse):
+    """
+    Streams a PDF from the PDF service straight to the client.
+
+    The service is only called when the response is sent, on the event loop, so
+    sync endpoints return this without waiting for the render and no threadpool
+    worker is held while it runs. The service's status is checked before any
+    headers go out: a failed render still becomes a 500 "Error generating PDF",
+    and a render refused by the render gate a 503 with Retry-After.
+    The complete PDF is stored in the PDF cache once the response is complete.
+    """
+
+    def __init__(self, html_content: str, cache_key: str) -> None:
+        self.__html_content = html_content
+        self.__cache_key = cache_key
+        super().__init__(content=iter(()), media_type="application/pdf")
+
+    async def __send_error(self, send, error_response) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": error_response.status_code,
+                "headers": error_response.raw_headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": error_response.body})
+
+    async def stream_response(self, send) -> None:
+        try:
+            async with _pdf_service_call(self.__html_content) as response:
+                if response is None:
+                    await self.__send_error(send, _pdf_error_response())
+                    return
+
                 try:
-                    print(f"Trying image path: {img_path}")
-                    mime_type, _ = mimetypes.guess_type(img_path)
-                    if not mime_type:
-                        mime_type = (
-                            "image/png"  # Default to PNG if can't determine type
+                    if response.status_code != 200:
+                        error_text = (await response.aread()).decode("utf-8", "replace")
+                        print(
+                            f"HTML to PDF service error: {response.status_code} - {error_text}"
                         )
+                        await self.__send_error(send, _pdf_error_response())
+                        return
+
+                    received = []
+
+                    async def tee():
+                        async for chunk in response.aiter_bytes():
+                            received.append(chunk)
+                            yield chunk
+
+                    self.body_iterator = tee()
+                    await super().stream_response(send)
+                finally:
+                    await response.aclose()
+        except PdfServiceUnavailable as e:
+            print(f"PDF render refused: {e}")
+            await self.__send_error(send, _pdf_unavailable_response(e.retry_after))
+            return
+
+        print("PDF generation successful")
+        if _pdf_cache is not None:
+            # Runs after the response is complete (background tasks are never
+            # cancelled by a client disconnect)
+            self.background = BackgroundTask(
+                _pdf_cache.put, self.__cache_key, b"".join(received), "application/pdf"
+            )
+
+
+def _pdf_response(modified_html: str, cache_key: str, cached_pdf):
+    if cached_pdf is not None:
+        metrics.increment("pdf.cache_hits")
+        return Response(content=cached_pdf, media_type="application/pdf")
+
+    try:
+        _pdf_render_gate.check()
+    except PdfServiceUnavailable as e:
+        return _pdf_unavailable_response(e.retry_after)
+
+    return PdfServiceResponse(modified_html, cache_key)
+
+
+def convert_template_to_pdf(template_response, debug=False):
+    """
+    Convert a TemplateResponse to a PDF using the HTML-to-PDF server.
+    NOTE: This is generated by AI (cursor), but has been tested and works.
+
+    Stylesheet and local images come from the in-memory static asset bundle,
+    so conversion does no filesystem I/O. PDFs are served from the PDF cache when
+    the same HTML was converted before; otherwise, while the PDF service's circuit
+    breaker is open, a 503 is returned without calling it.
 
-                    with open(img_path, "rb") as f:
-                        img_data = f.read()
-                        base64_data = base64.b64encode(img_data).decode("utf-8")
-                        # Update the src attribute with base64 encoded image
-                        img["src"] = f"data:{mime_type};base64,{base64_data}"
-                        print(f"Image successfully converted: {img_path}")
-                        break
-                except (FileNotFoundError, IsADirectoryError):
-                    print(f"Image file not found: {img_path}")
-                except Exception as e:
-                    print(f"Error processing image {img_path}: {str(e)}")
-
-    # Get the modified HTML content
-    modified_html = str(soup)
+    Args:
+        template_response: The TemplateResponse to convert
+        debug (bool): If True, returns the HTML content instead of sending to PDF service
+
+    Returns:
+        PdfServiceResponse: Streams the PDF from the PDF service (or a 500 error
+            page if conversion fails) when the response is sent
+        Response: The cached PDF, if this HTML was converted before
+        HTMLResponse: The HTML content if debug is True, or a 503 while the
+            PDF service's circuit breaker is open
+    """
+    html_content = template_response.body.decode("utf-8")
+    modified_html = inline_static_assets(html_content)
 
     # If debug mode is enabled, return the HTML content instead
     if debug:
         return HTMLResponse(content=modified_html, media_type="text/html")
 
-    # Send the modified HTML to PDF rendering service
-    url = os.getenv("HTML_TO_PDF_SERVER_URL")
-    print(f"Sending HTML to PDF service at: {url}")
-    response = requests.post(url, json={"html": modified_html})
+    cache_key = pdf_cache_key(modified_html)
+    cached_pdf = None
+    if _pdf_cache is not None:
+        cached_pdf = _pdf_cache.get(cache_key)
+    return _pdf_response(modified_html, cache_key, cached_pdf)
 
-    # Check if the request was successful
-    if response.status_code == 200:
-        print("PDF generation successful")
-        # Return the PDF as a streaming response
-        return StreamingResponse(
-            response.iter_content(chunk_size=10240),
-            media_type="application/pdf",
-        )
-    else:
-        print(f"HTML to PDF service error: {response.status_code} - {response.text}")
-        return HTMLResponse(content="Error generating PDF", status_code=500)
+
+async def convert_template_to_pdf_async(template_response, debug=False):
+    """
+    `convert_template_to_pdf` for async endpoints: the PDF cache lookup (a disk
+    read or an S3 request) runs in the threadpool instead of blocking the event
+    loop.
+    """
+    html_content = template_response.body.decode("utf-8")
+    modified_html = inline_static_assets(html_content)
+
+    if debug:
+        return HTMLResponse(content=modified_html, media_type="text/html")
+
+    cache_key = pdf_cache_key(modified_html)
+    cached_pdf = None
+    if _pdf_cache is not None:
+        cached_pdf = await run_in_threadpool(_pdf_cache.get, cache_key)
+    return _pdf_response(modified_html, cache_key, cached_pdf)
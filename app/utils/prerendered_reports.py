@@ -0,0 +1,117 @@
+"""
+Store for v2 report pages rendered ahead of time by the pre-render worker
+(`app/prerender.py`), read by the report endpoint before it falls back to live rendering.
+"""
+import hashlib
+import json
+import os
+from urllib.parse import quote
+
+from internal.artifact_store import create_artifact_store
+from utils.etags import fingerprint_files
+from utils.static_assets import STATIC_DIR
+from utils.templates import APP_DIR, TEMPLATE_DIR
+
+# PRERENDER_STORE_BACKEND: "s3" (shared by the worker and every Lambda container),
+# "disk" (local development only), or "none" (default: pre-rendering disabled).
+PRERENDER_STORE_BACKEND = os.getenv("PRERENDER_STORE_BACKEND") or "none"
+PRERENDER_DIR = os.getenv("PRERENDER_DIR") or "/tmp/prerendered-reports"
+PRERENDER_MAX_BYTES = int(os.getenv("PRERENDER_MAX_BYTES") or 256 * 1024 * 1024)
+PRERENDER_S3_BUCKET = os.getenv("PRERENDER_S3_BUCKET")
+PRERENDER_S3_PREFIX = os.getenv("PRERENDER_S3_PREFIX") or "prerendered-reports/"
+PRERENDER_S3_ENDPOINT_URL = os.getenv("PRERENDER_S3_ENDPOINT_URL") or None
+
+# Variant -> template. The review-link variant is rendered with LAUNCH_TOKEN_PLACEHOLDER
+# as the launch token, which is swapped for the requester's token when served.
+DISPLAY = "display"
+DISPLAY_WITH_REVIEW_LINK = "display_review_link"
+PRINT = "print"
+VARIANT_TEMPLATES = {
+    DISPLAY: "student_quiz_report_v2.html",
+    DISPLAY_WITH_REVIEW_LINK: "student_quiz_report_v2.html",
+    PRINT: "student_quiz_report_v2_print.html",
+}
+
+LAUNCH_TOKEN_PLACEHOLDER = "__REPORT_LAUNCH_TOKEN__"
+
+# What a pre-rendered page is rendered with besides its item: the report router
+# (prepare_v2_report), the templates and the static assets (same as the router's
+# RENDER_VERSION)
+RENDER_SOURCES = (
+    os.path.join(APP_DIR, "routers", "student_quiz_reports.py"),
+    TEMPLATE_DIR,
+    STATIC_DIR,
+)
+
+
+def fill_launch_token(html_content: str, launch_token: str) -> str:
+    # Same encoding as build_quiz_review_link; the quoted token is also HTML-safe
+    return html_content.replace(LAUNCH_TOKEN_PLACEHOLDER, quote(launch_token, safe=""))
+
+
+def report_version(report: dict) -> str:
+    """
+    Returns a hash of a v2 report item's content (DynamoDB Decimals are hashed by
+    their string form).
+    """
+    payload = json.dumps(report, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class PrerenderedReports:
+    """
+    Pre-rendered report HTML by (session ID, v2 report item, variant).
+
+    Keys include a fingerprint of the rendering code, templates and static assets
+    (RENDER_SOURCES) and a hash of the item the page was rendered from, so a
+    deploy that changes rendering or a re-published report turns the older
+    artifacts into misses instead of serving stale pages.
+    """
+
+    def __init__(self, store, render_sources=RENDER_SOURCES) -> None:
+        self.__store = store
+        self.__render_sources = render_sources
+        self.__render_version = None
+
+    @property
+    def render_version(self) -> str:
+        if self.__render_version is None:
+            self.__render_version = fingerprint_files(self.__render_sources)[:16]
+        return self.__render_version
+
+    def __key(self, session_id: str, report: dict, variant: str) -> str:
+        return (
+            f"{self.render_version}/{quote(session_id, safe='')}/"
+            f"{quote(str(report['user_id']), safe='')}/{report_version(report)}/"
+            f"{variant}.html"
+        )
+
+    def get(self, session_id: str, report: dict, variant: str):
+        """
+        Returns the page pre-rendered from this exact `report` item, or None.
+        """
+        content = self.__store.get(self.__key(session_id, report, variant))
+        return content.decode("utf-8") if content is not None else None
+
+    def put(self, session_id: str, report: dict, variant: str, html_content: str):
+        self.__store.put(
+            self.__key(session_id, report, variant),
+            html_content.encode("utf-8"),
+            "text/html; charset=utf-8",
+        )
+
+
+def _create_prerendered_reports():
+    store = create_artifact_store(
+        PRERENDER_STORE_BACKEND,
+        directory=PRERENDER_DIR,
+        max_bytes=PRERENDER_MAX_BYTES,
+        bucket=PRERENDER_S3_BUCKET,
+        prefix=PRERENDER_S3_PREFIX,
+        endpoint_url=PRERENDER_S3_ENDPOINT_URL,
+    )
+    return PrerenderedReports(store) if store is not None else None
+
+
+# None when pre-rendering is disabled
+prerendered_reports = _create_prerendered_reports()
@@ -4,16 +4,12 @@ from urllib.parse import urlencode
 from fastapi import HTTPException, Request
 from fastapi.responses import RedirectResponse
 
-from auth import verify_launch_token
+from auth import verify_launch_token, verify_launch_token_async
 
 REPORT_LAUNCH_COOKIE_MAX_AGE = 15 * 60
 
 
-def resolve_report_user_id(user_id: Optional[str], launch_token: Optional[str]) -> str:
-    if user_id:
-        return user_id
-
-    payload = verify_launch_token(launch_token, expected_audience="report")
+def _get_canonical_user_id(payload: dict) -> str:
     token_data = payload.get("data", {})
     canonical_user_id = token_data.get("user_id") or payload.get("id")
 
@@ -23,6 +19,24 @@ def resolve_report_user_id(user_id: Optional[str], launch_token: Optional[str])
     return str(canonical_user_id)
 
 
+def resolve_report_user_id(user_id: Optional[str], launch_token: Optional[str]) -> str:
+    if user_id:
+        return user_id
+
+    payload = verify_launch_token(launch_token, expected_audience="report")
+    return _get_canonical_user_id(payload)
+
+
+async def resolve_report_user_id_async(
+    user_id: Optional[str], launch_token: Optional[str]
+) -> str:
+    if user_id:
+        return user_id
+
+    payload = await verify_launch_token_async(launch_token, expected_audience="report")
+    return _get_canonical_user_id(payload)
+
+
 def get_launch_cookie_name(prefix: str, session_id: str) -> str:
     safe_session_id = "".join(char if char.isalnum() else "_" for char in session_id)
     return f"{prefix}_{safe_session_id}"
@@ -63,7 +77,31 @@ def redirect_with_launch_cookie(
     clean_path: str,
 ) -> RedirectResponse:
     verify_launch_token(launch_token, expected_audience="report")
+    return _build_launch_redirect(
+        request, session_id, launch_token, cookie_prefix, clean_path
+    )
+
 
+async def redirect_with_launch_cookie_async(
+    request: Request,
+    session_id: str,
+    launch_token: str,
+    cookie_prefix: str,
+    clean_path: str,
+) -> RedirectResponse:
+    await verify_launch_token_async(launch_token, expected_audience="report")
+    return _build_launch_redirect(
+        request, session_id, launch_token, cookie_prefix, clean_path
+    )
+
+
+def _build_launch_redirect(
+    request: Request,
+    session_id: str,
+    launch_token: str,
+    cookie_prefix: str,
+    clean_path: str,
+) -> RedirectResponse:
     redirect_url = clean_path
     query_string = clean_query_string(request)
     if query_string:
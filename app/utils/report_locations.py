@@ -0,0 +1,61 @@
+"""
+Remembers where a student quiz report was found, so repeat views skip the
+v2 → v2 by alt-id → v1 lookup chain.
+
+For each (session_id, user_id) from a report URL, the cache holds the table that
+resolved it and the key the item is stored under there (for alt-id logins, the
+report's own user_id), or that nothing was found. A remembered location is only a
+hint: if the item is gone, the caller forgets it and runs the whole chain again.
+"Not found" is cached briefly, since a report may be published at any moment; so
+is a v1 hit, since a v2 report published later for the same student must take
+over. Only v2 hits, the end of the chain, are cached for long.
+"""
+import os
+
+from utils.cache import ExpiringCache
+
+REPORT_LOCATION_TTL = float(os.getenv("REPORT_LOCATION_TTL") or 3600)
+REPORT_NOT_FOUND_TTL = float(os.getenv("REPORT_NOT_FOUND_TTL") or 60)
+REPORT_LOCATION_MAX_SIZE = 20000
+
+# Tables a report can be found in
+V2 = "v2"
+V1 = "v1"
+NOT_FOUND = "not_found"
+
+
+class ReportLocations:
+    """
+    Bounded cache of (session_id, user_id) -> (table, key user_id) for report
+    lookups; the table is V2, V1 or NOT_FOUND (with a None key).
+    """
+
+    def __init__(
+        self,
+        ttl: float = REPORT_LOCATION_TTL,
+        not_found_ttl: float = REPORT_NOT_FOUND_TTL,
+        maxsize: int = REPORT_LOCATION_MAX_SIZE,
+    ) -> None:
+        self.__ttl = ttl
+        self.__not_found_ttl = not_found_ttl
+        self.__locations = ExpiringCache(maxsize=maxsize)
+
+    def get(self, session_id: str, user_id: str):
+        """
+        Returns the remembered (table, key user_id) for a report, or None.
+        """
+        return self.__locations.get((session_id, user_id))
+
+    def found(self, session_id: str, user_id: str, table: str, key: str) -> None:
+        # A v1 hit would hide a later v2 publication, so it's rechecked as often as
+        # a miss
+        ttl = self.__ttl if table == V2 else self.__not_found_ttl
+        self.__locations.set((session_id, user_id), (table, key), ttl)
+
+    def not_found(self, session_id: str, user_id: str) -> None:
+        self.__locations.set(
+            (session_id, user_id), (NOT_FOUND, None), self.__not_found_ttl
+        )
+
+    def forget(self, session_id: str, user_id: str) -> None:
+        self.__locations.pop((session_id, user_id))
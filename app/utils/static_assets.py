@@ -0,0 +1,184 @@
+"""
+In-memory bundle of everything under `app/static`, built once per process, and the
+`/static` mount that serves it.
+"""
+import base64
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+from fastapi import HTTPException, Request, Response
+from fastapi.staticfiles import StaticFiles
+
+from internal.compression import (
+    choose_encoding,
+    compress,
+    is_compressible,
+    representation_etag,
+)
+from utils.etags import etag_matches
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static")
+STYLESHEET_PATH = "style.css"
+
+# "style.3f2a9c1b0d4e.css" -> ("style", "3f2a9c1b0d4e", ".css")
+_FINGERPRINTED_PATH_PATTERN = re.compile(r"^(.+)\.([0-9a-f]{12})(\.[^./]+)?$")
+
+# Fingerprinted URLs change whenever the content does, so they can be cached forever;
+# plain URLs (old links, favicon.ico) are revalidated against the ETag
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+class StaticAsset:
+    def __init__(self, path: str, content: bytes) -> None:
+        self.path = path
+        self.content = content
+        # Default to PNG if the type can't be determined (same as the old converter)
+        self.media_type = mimetypes.guess_type(path)[0] or "image/png"
+        encoded = base64.b64encode(content).decode("utf-8")
+        self.data_uri = f"data:{self.media_type};base64,{encoded}"
+        self.fingerprint = hashlib.sha256(content).hexdigest()[:12]
+        self.etag = f'"{self.fingerprint}"'
+        stem, extension = os.path.splitext(path)
+        self.fingerprinted_path = f"{stem}.{self.fingerprint}{extension}"
+        self.compressible = is_compressible(self.media_type)
+        # {encoding: compressed content}, filled on first request for each encoding
+        self.__encoded = {}
+
+    def get_content(self, encoding):
+        """
+        Returns the content in `encoding` ("br", "gzip", or None for identity).
+        """
+        if encoding is None:
+            return self.content
+        if encoding not in self.__encoded:
+            self.__encoded[encoding] = compress(self.content, encoding, static=True)
+        return self.__encoded[encoding]
+
+
+class StaticAssetBundle:
+    """
+    Holds the resolved stylesheet text and a pre-encoded data URI for every file
+    under the static directory, so PDF conversion does no filesystem I/O.
+    """
+
+    def __init__(self, directory: str = STATIC_DIR) -> None:
+        self.__assets = {}
+        for root, _, files in os.walk(directory):
+            for file_name in files:
+                full_path = os.path.join(root, file_name)
+                path = os.path.relpath(full_path, directory).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    self.__assets[path] = StaticAsset(path, f.read())
+
+        stylesheet = self.__assets.get(STYLESHEET_PATH)
+        self.stylesheet = stylesheet.content.decode("utf-8") if stylesheet else None
+
+    @staticmethod
+    def normalize_path(src: str) -> str:
+        """
+        Maps an `<img src>` / `href` pointing at a static file to its path in the
+        bundle. Accepts "/static/logo.png", "static/logo.png", "/logo.png" and "logo.png".
+        """
+        path = src.split("?", 1)[0].split("#", 1)[0].lstrip("/")
+        if path.startswith("static/"):
+            path = path[len("static/") :]
+        return path
+
+    def resolve(self, src: str):
+        """
+        Returns (asset, is_fingerprinted) for a static URL or path, which may be
+        fingerprinted (`fingerprinted_path`); (None, False) if there is no such
+        file. A fingerprint that isn't the file's current one (e.g. in a page
+        rendered before a deploy) still resolves, but isn't treated as fingerprinted.
+        """
+        path = self.normalize_path(src)
+        asset = self.__assets.get(path)
+        if asset is not None:
+            return asset, False
+        match = _FINGERPRINTED_PATH_PATTERN.match(path)
+        if match is None:
+            return None, False
+        stem, fingerprint, extension = match.groups()
+        asset = self.__assets.get(stem + (extension or ""))
+        if asset is None:
+            return None, False
+        return asset, asset.fingerprint == fingerprint
+
+    def get(self, src: str):
+        return self.resolve(src)[0]
+
+    def get_fingerprinted_path(self, path: str) -> str:
+        """
+        Returns the fingerprinted path of a static file (unchanged if it doesn't exist).
+        """
+        asset = self.get(path)
+        return asset.fingerprinted_path if asset else self.normalize_path(path)
+
+    def get_data_uri(self, src: str):
+        asset = self.get(src)
+        return asset.data_uri if asset else None
+
+    def __iter__(self):
+        return iter(self.__assets.values())
+
+
+_bundle = None
+_bundle_lock = threading.Lock()
+
+
+def get_static_assets() -> StaticAssetBundle:
+    """
+    Returns the process-wide asset bundle, building it on first use.
+    """
+    global _bundle
+    if _bundle is None:
+        with _bundle_lock:
+            if _bundle is None:
+                _bundle = StaticAssetBundle()
+    return _bundle
+
+
+class StaticAssetFiles(StaticFiles):
+    """
+    `/static` mount serving the in-memory asset bundle: fingerprinted URLs (see
+    the `static_url` template helper) are cached as immutable, and text assets
+    are sent brotli- or gzip-compressed, compressed once per process.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(directory=STATIC_DIR)
+
+    async def get_response(self, path: str, scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+        asset, is_fingerprinted = get_static_assets().resolve(path)
+        if asset is None:
+            raise HTTPException(status_code=404)
+
+        request = Request(scope)
+        encoding = None
+        if asset.compressible:
+            encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+        headers = {
+            "ETag": representation_etag(asset.etag, encoding),
+            "Cache-Control": (
+                IMMUTABLE_CACHE_CONTROL
+                if is_fingerprinted
+                else REVALIDATE_CACHE_CONTROL
+            ),
+        }
+        if asset.compressible:
+            headers["Vary"] = "Accept-Encoding"
+        if etag_matches(request, asset.etag):
+            return Response(status_code=304, headers=headers)
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(
+            content=asset.get_content(encoding),
+            media_type=asset.media_type,
+            headers=headers,
+        )
@@ -0,0 +1,98 @@
+"""
+The one Jinja2 template environment shared by every router and the pre-render
+worker, so each template is compiled once per process.
+
+Compiled templates are also kept in a bytecode cache on disk
+(JINJA_BYTECODE_CACHE_DIR). The deploy workflow fills it before `sam build` so it
+ships inside the Lambda package:
+
+    cd app && python -m utils.templates
+
+Set TEMPLATE_WARMUP=true to load every template while the container initializes
+(from that cache when present), instead of on the first request that uses it.
+"""
+import os
+import time
+
+import jinja2
+from fastapi.templating import Jinja2Templates
+
+from utils.static_assets import get_static_assets
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_DIR = os.path.join(APP_DIR, "templates")
+
+JINJA_BYTECODE_CACHE_DIR = os.getenv("JINJA_BYTECODE_CACHE_DIR") or os.path.join(
+    APP_DIR, ".jinja-bytecode"
+)
+TEMPLATE_WARMUP = (os.getenv("TEMPLATE_WARMUP") or "false").lower() == "true"
+
+
+class PortableBytecodeCache(jinja2.FileSystemBytecodeCache):
+    """
+    `FileSystemBytecodeCache` that can be built in one place and used in another:
+    entries are keyed by template name only (not the absolute path, which differs
+    between the build machine and /var/task), and a read-only cache directory (the
+    deployed Lambda package) just means new entries aren't saved.
+
+    Jinja still checks each entry against a checksum of the template source and the
+    Python version, so a stale or foreign entry is recompiled, never used.
+    """
+
+    def get_cache_key(self, name, filename=None):
+        return super().get_cache_key(name)
+
+    def dump_bytecode(self, bucket) -> None:
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+
+def _create_environment() -> jinja2.Environment:
+    bytecode_cache = None
+    if os.path.isdir(JINJA_BYTECODE_CACHE_DIR):
+        bytecode_cache = PortableBytecodeCache(JINJA_BYTECODE_CACHE_DIR)
+    return jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATE_DIR),
+        autoescape=True,
+        bytecode_cache=bytecode_cache,
+    )
+
+
+@jinja2.pass_context
+def static_url(context, path: str) -> str:
+    """
+    Template helper: URL of a file in `app/static` under its fingerprinted name,
+    which the `/static` mount serves with an immutable Cache-Control.
+    """
+    fingerprinted_path = get_static_assets().get_fingerprinted_path(path)
+    return str(context["request"].url_for("static", path="/" + fingerprinted_path))
+
+
+templates = Jinja2Templates(env=_create_environment())
+templates.env.globals["static_url"] = static_url
+
+
+def warm_up_templates() -> int:
+    """
+    Loads (compiles, or reads from the bytecode cache) every template in
+    `app/templates`.
+
+    Returns:
+        int: Number of templates loaded
+    """
+    start = time.perf_counter()
+    names = templates.env.list_templates(extensions=["html"])
+    for name in names:
+        templates.env.get_template(name)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"Loaded {len(names)} templates in {elapsed_ms:.1f} ms")
+    return len(names)
+
+
+if __name__ == "__main__":
+    # Build step: compile every template into the bytecode cache directory
+    os.makedirs(JINJA_BYTECODE_CACHE_DIR, exist_ok=True)
+    templates.env.bytecode_cache = PortableBytecodeCache(JINJA_BYTECODE_CACHE_DIR)
+    warm_up_templates()
@@ -0,0 +1,49 @@
+import io
+import zipfile
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """
+    Write-only, non-seekable file object that hands out what was written so far.
+    zipfile falls back to data descriptors for non-seekable outputs, so entries
+    never have to be rewritten once they've been sent.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.__chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.__chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.__chunks)
+        self.__chunks.clear()
+        return data
+
+
+class ZipStreamWriter:
+    """
+    Builds a zip archive incrementally: every call returns the bytes that can be
+    sent to the client right away, so only one entry is held in memory at a time.
+
+    Entries are stored uncompressed by default, which suits PDFs (already compressed).
+    """
+
+    def __init__(self, compression=zipfile.ZIP_STORED) -> None:
+        self.__buffer = _ChunkBuffer()
+        self.__zip_file = zipfile.ZipFile(
+            self.__buffer, mode="w", compression=compression
+        )
+
+    def add(self, name: str, content: bytes) -> bytes:
+        self.__zip_file.writestr(name, content)
+        return self.__buffer.drain()
+
+    def close(self) -> bytes:
+        self.__zip_file.close()
+        return self.__buffer.drain()
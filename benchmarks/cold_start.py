@@ -0,0 +1,255 @@
+"""
+Cold-start benchmarks for the Lambda handler (`main.handler`).
+
+Every sample runs in a fresh interpreter, so each number is a true cold start:
+- import time of the heavy SDKs the app depends on (and of `main` itself)
+- time-to-first-response of each router endpoint, invoked through Mangum with
+  an API Gateway (HTTP API) event, with all backends replaced by local stand-ins
+
+Run from the repo root:
+    uv run python benchmarks/cold_start.py [--repeat 5] [--budget benchmarks/budget.json]
+
+Exits with status 1 when a median exceeds its budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(os.path.dirname(BENCHMARKS_DIR), "app")
+DEFAULT_BUDGET_PATH = os.path.join(BENCHMARKS_DIR, "budget.json")
+
+HEAVY_MODULES = [
+    "google.cloud.bigquery",
+    "google.cloud.firestore",
+    "pymongo",
+    "bs4",
+    "openai",
+    "boto3",
+]
+
+# Only used by the benchmark subprocesses; nothing here reaches a real service.
+BENCHMARK_ENV = {
+    "PORTAL_BACKEND_URL": "http://localhost:9",
+    "HTML_TO_PDF_SERVER_URL": "http://localhost:9",
+    "DYNAMODB_URL": "http://localhost:9",
+    "DYNAMODB_REGION": "ap-south-1",
+    "DYNAMODB_ACCESS_KEY": "benchmark",
+    "DYNAMODB_SECRET_KEY": "benchmark",
+    "MONGO_AUTH_CREDENTIALS": "mongodb://localhost:9",
+    "BQ_CREDENTIALS_SECRET_NAME": "benchmark",
+}
+
+
+def _endpoints():
+    from stand_ins import QUIZ_ID, SESSION_ID, USER_ID
+
+    return {
+        "index": ("/", ""),
+        "student_quiz_report": (
+            f"/reports/student_quiz_report/{SESSION_ID}/{USER_ID}",
+            "",
+        ),
+        "student_quiz_report_print": (
+            f"/reports/student_quiz_report/{SESSION_ID}/{USER_ID}",
+            "print=true",
+        ),
+        "student_quiz_report_v3": (
+            f"/reports/student_quiz_report/v3/{SESSION_ID}/{USER_ID}",
+            "",
+        ),
+        "student_reports": (f"/reports/student_reports/{USER_ID}", ""),
+        "student_reports_json": (f"/reports/student_reports/{USER_ID}", "format=json"),
+        "form_responses": (f"/reports/form_responses/{SESSION_ID}/{USER_ID}", ""),
+        "live_session_report": (f"/reports/live_session_report/{SESSION_ID}", ""),
+        "live_quiz_report": (f"/reports/live_quiz_report/{QUIZ_ID}", ""),
+    }
+
+
+def build_event(path, query_string=""):
+    """
+    Minimal API Gateway HTTP API (payload v2.0) event, as Lambda receives it.
+    """
+    return {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": path,
+        "rawQueryString": query_string,
+        "cookies": [],
+        "headers": {"host": "localhost", "accept": "text/html"},
+        "requestContext": {
+            "accountId": "benchmark",
+            "apiId": "benchmark",
+            "domainName": "localhost",
+            "domainPrefix": "localhost",
+            "http": {
+                "method": "GET",
+                "path": path,
+                "protocol": "HTTP/1.1",
+                "sourceIp": "127.0.0.1",
+                "userAgent": "cold-start-benchmark",
+            },
+            "requestId": "benchmark",
+            "routeKey": "$default",
+            "stage": "$default",
+            "time": "07/Jan/2024:00:00:00 +0000",
+            "timeEpoch": 1704585600000,
+        },
+        "isBase64Encoded": False,
+    }
+
+
+def _loaded_heavy_modules():
+    return [module for module in HEAVY_MODULES if module in sys.modules]
+
+
+def _child_import(module):
+    start = time.perf_counter()
+    __import__(module)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return {"elapsed_ms": elapsed_ms, "heavy_modules": _loaded_heavy_modules()}
+
+
+def _child_endpoint(name):
+    path, query_string = _endpoints()[name]
+
+    start = time.perf_counter()
+    import main
+
+    import_ms = (time.perf_counter() - start) * 1000
+
+    from stand_ins import install_stand_ins
+
+    install_stand_ins(main.clients)
+
+    response_start = time.perf_counter()
+    response = main.handler(build_event(path, query_string), None)
+    response_ms = (time.perf_counter() - response_start) * 1000
+
+    return {
+        "status_code": response["statusCode"],
+        "import_ms": import_ms,
+        "first_response_ms": response_ms,
+        "elapsed_ms": import_ms + response_ms,
+        "client_init_ms": main.clients.timings,
+        "heavy_modules": _loaded_heavy_modules(),
+    }
+
+
+def _run_child(*args):
+    env = dict(os.environ)
+    env.update(BENCHMARK_ENV)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [APP_DIR, BENCHMARKS_DIR, env.get("PYTHONPATH", "")]
+    )
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", *args],
+        cwd=APP_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Benchmark child {args} failed:\n{completed.stderr}")
+    # The app prints while serving requests; the result is always the last line.
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _sample(repeat, *args):
+    # One untimed warm-up so every timed sample sees a populated bytecode cache.
+    _run_child(*args)
+    samples = [_run_child(*args) for _ in range(repeat)]
+    result = dict(samples[-1])
+    result["elapsed_ms"] = statistics.median(s["elapsed_ms"] for s in samples)
+    if "first_response_ms" in result:
+        result["first_response_ms"] = statistics.median(
+            s["first_response_ms"] for s in samples
+        )
+        result["import_ms"] = statistics.median(s["import_ms"] for s in samples)
+    return result
+
+
+def run_benchmarks(repeat):
+    results = {"import_ms": {}, "first_response_ms": {}, "details": {}}
+    for module in HEAVY_MODULES + ["main"]:
+        sample = _sample(repeat, "import", module)
+        results["import_ms"][module] = sample["elapsed_ms"]
+        results["details"][f"import {module}"] = sample
+
+    for name in _endpoints():
+        sample = _sample(repeat, "endpoint", name)
+        if sample["status_code"] >= 500:
+            raise RuntimeError(f"Endpoint {name} returned {sample['status_code']}")
+        results["first_response_ms"][name] = sample["elapsed_ms"]
+        results["details"][f"endpoint {name}"] = sample
+    return results
+
+
+def check_budget(results, budget):
+    """
+    Returns a list of human readable budget violations.
+    """
+    violations = []
+    for section in ("import_ms", "first_response_ms"):
+        for name, limit_ms in budget.get(section, {}).items():
+            measured_ms = results[section].get(name)
+            if measured_ms is not None and measured_ms > limit_ms:
+                violations.append(
+                    f"{section}[{name}]: {measured_ms:.1f} ms > budget {limit_ms} ms"
+                )
+    for name, forbidden in budget.get("forbidden_modules", {}).items():
+        details = results["details"].get(name, {})
+        for module in set(forbidden) & set(details.get("heavy_modules", [])):
+            violations.append(f"{name}: loads {module}")
+    return violations
+
+
+def print_report(results):
+    print(f"{'import':<40} {'median ms':>10}")
+    for module, elapsed_ms in results["import_ms"].items():
+        print(f"{module:<40} {elapsed_ms:>10.1f}")
+    print()
+    print(f"{'endpoint (cold: import + first response)':<40} {'median ms':>10}")
+    for name, elapsed_ms in results["first_response_ms"].items():
+        details = results["details"][f"endpoint {name}"]
+        loaded = ", ".join(details["heavy_modules"]) or "-"
+        print(f"{name:<40} {elapsed_ms:>10.1f}   loads: {loaded}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", default=DEFAULT_BUDGET_PATH)
+    parser.add_argument("--output", help="Write the raw results as JSON here")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        kind, target = args.child
+        result = _child_import(target) if kind == "import" else _child_endpoint(target)
+        print(json.dumps(result))
+        return
+
+    results = run_benchmarks(args.repeat)
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    with open(args.budget) as f:
+        budget = json.load(f)
+    violations = check_budget(results, budget)
+    if violations:
+        print("\nCold-start budget exceeded:")
+        for violation in violations:
+            print(f"  - {violation}")
+        sys.exit(1)
+    print("\nAll cold-start budgets met.")
+
+
+if __name__ == "__main__":
+    main()
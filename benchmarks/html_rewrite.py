@@ -0,0 +1,103 @@
+"""
+Compares the two HTML post-processing paths used before a report is sent to the
+PDF service, on the real report templates rendered with stand-in data:
+- `inline_static_assets`: precompiled patterns on the raw markup (used when serving)
+- `inline_static_assets_with_soup`: full BeautifulSoup parse + re-serialization
+
+Before timing, both outputs are checked to carry the same stylesheet and image sources.
+
+Run from the repo root:
+    uv run python benchmarks/html_rewrite.py [--number 20] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import timeit
+
+from cold_start import APP_DIR, BENCHMARK_ENV, _endpoints, build_event
+
+TEMPLATE_ENDPOINTS = [
+    "student_quiz_report",
+    "student_quiz_report_print",
+    "student_quiz_report_v3",
+]
+
+
+def render_reports():
+    """
+    Returns {endpoint name: rendered HTML} for every report in TEMPLATE_ENDPOINTS.
+    """
+    for name, value in BENCHMARK_ENV.items():
+        os.environ.setdefault(name, value)
+    # Templates and static files are resolved relative to the app directory
+    os.chdir(APP_DIR)
+    sys.path.insert(0, APP_DIR)
+
+    import main
+    from stand_ins import install_stand_ins
+
+    install_stand_ins(main.clients)
+
+    endpoints = _endpoints()
+    rendered = {}
+    for name in TEMPLATE_ENDPOINTS:
+        path, query_string = endpoints[name]
+        response = main.handler(build_event(path, query_string), None)
+        if response["statusCode"] != 200:
+            raise RuntimeError(f"Endpoint {name} returned {response['statusCode']}")
+        rendered[name] = response["body"]
+    return rendered
+
+
+def _asset_sources(html_content):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_content, "html.parser")
+    return (
+        [style.string for style in soup.find_all("style")],
+        [img.get("src") for img in soup.find_all("img")],
+    )
+
+
+def _median_ms(function, html_content, number, repeat):
+    timings = timeit.repeat(
+        lambda: function(html_content), number=number, repeat=repeat
+    )
+    return statistics.median(timings) / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=20, help="Calls per sample")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per template")
+    args = parser.parse_args()
+
+    rendered = render_reports()
+
+    from utils.pdf_converter import (
+        inline_static_assets,
+        inline_static_assets_with_soup,
+    )
+
+    print(f"{'template':<30} {'KB':>7} {'soup ms':>9} {'fast ms':>9} {'speedup':>8}")
+    for name, html_content in rendered.items():
+        fast_output = inline_static_assets(html_content)
+        soup_output = inline_static_assets_with_soup(html_content)
+        if _asset_sources(fast_output) != _asset_sources(soup_output):
+            raise RuntimeError(f"Rewrite paths disagree on {name}")
+
+        soup_ms = _median_ms(
+            inline_static_assets_with_soup, html_content, args.number, args.repeat
+        )
+        fast_ms = _median_ms(
+            inline_static_assets, html_content, args.number, args.repeat
+        )
+        print(
+            f"{name:<30} {len(html_content) / 1024:>7.1f} {soup_ms:>9.2f} "
+            f"{fast_ms:>9.2f} {soup_ms / fast_ms:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
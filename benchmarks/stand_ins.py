@@ -0,0 +1,247 @@
+"""
+Local stand-ins for the backends used by the reporting app.
+
+Each stand-in factory imports the SDK that the real factory in
+`app/internal/db.py` would import, so benchmarks still pay the real import
+cost of a backend, but never open a network connection.
+"""
+import importlib
+from decimal import Decimal
+from types import SimpleNamespace
+
+SESSION_ID = "EnableStudents_2024-01-07_65a0c1f2e4b0a1b2c3d4e5f6"
+USER_ID = "1403899102"
+QUIZ_ID = "65a0c1f2e4b0a1b2c3d4e5f6"
+
+
+def _chapter(subject, code, name, priority):
+    return {
+        "subject": subject,
+        "chapter_name": f"{code} - {name}",
+        "marks_scored": Decimal("8"),
+        "max_marks_possible": Decimal("16"),
+        "num_correct": Decimal("2"),
+        "num_wrong": Decimal("1"),
+        "num_skipped": Decimal("1"),
+        "priority": priority,
+    }
+
+
+def _subject(name, marks):
+    return {
+        "subject": name,
+        "marks_scored": Decimal(marks),
+        "max_marks_possible": Decimal("100"),
+        "num_correct": Decimal("20"),
+        "num_wrong": Decimal("5"),
+        "num_skipped": Decimal("0"),
+        "percentage": Decimal(marks),
+        "accuracy": Decimal("80.0"),
+    }
+
+
+V2_REPORT = {
+    "session_id": SESSION_ID,
+    "user_id": USER_ID,
+    "student_id": USER_ID,
+    "apaar_id": "",
+    "test_id": QUIZ_ID,
+    "report_header": {
+        "student_name": "Test Student",
+        "test_name": "JEE Main Full Test 1",
+        "test_date": "2024-01-07",
+        "stream": "engineering",
+        "course": "JEE",
+    },
+    "overall_performance": {
+        "marks_scored": Decimal("182"),
+        "max_marks_possible": Decimal("300"),
+        "num_correct": Decimal("52"),
+        "num_wrong": Decimal("14"),
+        "num_skipped": Decimal("9"),
+        "percentage": Decimal("60.7"),
+        "accuracy": None,
+        "cms_rank": Decimal("12"),
+    },
+    "subject_performance": [
+        _subject("Physics", "62"),
+        _subject("Chemistry", "68"),
+        _subject("Mathematics", "52"),
+    ],
+    "chapter_performance": [
+        _chapter(subject, f"{subject[:1]}{index:02d}", f"Chapter {index}", priority)
+        for subject in ("Physics", "Chemistry", "Mathematics")
+        for index, priority in enumerate(("High", "Medium", "Low", None) * 3)
+    ],
+    "recommendation": {
+        "message": "Revise these chapters before the next test.",
+        "recommended_chapters": [
+            {"subject": "Physics", "chapter_name": "P01 - Chapter 1"},
+            {"subject": "Mathematics", "chapter_name": "M02 - Chapter 2"},
+        ],
+    },
+    "metadata": {"test_incomplete": False},
+}
+
+
+def _v1_section(section, chapter_wise_data=None):
+    item = {
+        "session_id": SESSION_ID,
+        "user_id": USER_ID,
+        "user_id-section": f"{USER_ID}#{section}",
+        "section": section,
+        "test_id": QUIZ_ID,
+        "test_name": "JEE Main Full Test 1",
+        "start_date": "2024-01-07",
+        "platform": "quizengine",
+        "stream": "engineering",
+        "marks_scored": Decimal("60"),
+        "num_skipped": Decimal("3"),
+        "num_wrong": Decimal("5"),
+        "num_correct": Decimal("17"),
+        "percentage": Decimal("60"),
+        "accuracy": Decimal("77.3"),
+        "highest_test_score": Decimal("95"),
+        "percentile": Decimal("88.2"),
+        "rank": Decimal("12"),
+    }
+    if chapter_wise_data is not None:
+        item["chapter_wise_data"] = chapter_wise_data
+    return item
+
+
+V1_REPORT = [_v1_section("overall")] + [
+    _v1_section(
+        subject,
+        [
+            {
+                "chapter_name": f"{code} - Chapter {index}",
+                "marks_scored": Decimal("8"),
+                "max_score": Decimal("16"),
+                "total_questions": Decimal("4"),
+                "accuracy": Decimal("50"),
+                "attempt_percentage": Decimal("75"),
+            }
+            for index, code in enumerate(("8P02", "8P03", "9P01", "10P05"))
+        ],
+    )
+    for subject in ("physics", "chemistry", "maths")
+]
+
+FORM_RESPONSES = [
+    {
+        "session_id": SESSION_ID,
+        "user_id-question_position_index": f"{USER_ID}#{index}",
+        "question_position_index": Decimal(index),
+        "question_set_title": theme,
+        "question_text": f"Question {index}",
+        "priority": "standard",
+        "user_response_labels": "Agree",
+        "is_answered": True,
+        "test_name": "Student Feedback Form",
+        "start_date": "2024-01-07",
+    }
+    for index, theme in enumerate(["Study Habits", "Wellbeing", "Goals"] * 6)
+]
+
+LIVE_QUIZ_STATS = {
+    "totalSessions": 40,
+    "totalFinishedSessions": 31,
+    "daywise_results": [
+        {
+            "date": "2024-01-07",
+            "uniqueSessions": 40,
+            "finishedSessions": 31,
+            "totalUniqueUsers": [],
+        }
+    ],
+}
+
+QUALIFICATION_ROW = {
+    "test_id": QUIZ_ID,
+    "user_id": USER_ID,
+    "qualification_status": "Not Qualified",
+    "marks_to_qualify": 12,
+    "chapter_curriculum": "Rotational Motion",
+    "dpp_recommendation": "https://example.org/dpp",
+}
+
+
+class FakeTable:
+    def __init__(self, items):
+        self.__items = items
+
+    def query(self, **kwargs):
+        return {"Items": list(self.__items)}
+
+    def get_item(self, **kwargs):
+        if not self.__items:
+            return {}
+        return {"Item": dict(self.__items[0])}
+
+
+class FakeDynamoDB:
+    TABLES = {
+        "student_quiz_reports": V1_REPORT,
+        "student_quiz_reports_v2": [V2_REPORT],
+        "form_question_responses": FORM_RESPONSES,
+    }
+
+    def Table(self, name):
+        return FakeTable(self.TABLES.get(name, []))
+
+
+class FakeQueryJob:
+    def __init__(self, rows):
+        self.__rows = rows
+
+    def result(self, *args, **kwargs):
+        return list(self.__rows)
+
+
+class FakeBigQuery:
+    def query(self, *args, **kwargs):
+        return FakeQueryJob([QUALIFICATION_ROW])
+
+
+class FakeSessionsDB:
+    def get_quiz_session(self, session_id):
+        return {
+            "id": session_id,
+            "redirectPlatformParams": {"id": QUIZ_ID},
+            "startDate": "2024-01-07",
+            "endDate": "2024-01-08",
+        }
+
+
+def _fake_mongo():
+    quizzes = SimpleNamespace(
+        find_one=lambda query: {"_id": QUIZ_ID, "title": "JEE Main Full Test 1"}
+    )
+    sessions = SimpleNamespace(aggregate=lambda pipeline: [dict(LIVE_QUIZ_STATS)])
+    return SimpleNamespace(quiz=SimpleNamespace(quizzes=quizzes, sessions=sessions))
+
+
+# registry name -> (SDK the real factory imports, stand-in constructor)
+STAND_INS = {
+    "dynamodb": ("boto3", FakeDynamoDB),
+    "mongo": ("pymongo", _fake_mongo),
+    "bigquery": ("google.cloud.bigquery", FakeBigQuery),
+    "sessions_db": ("google.cloud.firestore", FakeSessionsDB),
+}
+
+
+def _stand_in_factory(sdk_module, constructor):
+    def factory():
+        importlib.import_module(sdk_module)
+        return constructor()
+
+    return factory
+
+
+def install_stand_ins(clients):
+    """
+    Replaces every backend registered on the app's ClientRegistry with a stand-in.
+    """
+    for name, (sdk_module, constructor) in STAND_INS.items():
+        clients.register(name, _stand_in_factory(sdk_module, constructor))
@@ -1,10 +1,21 @@
 from student_quiz_reports import (
+    SUMMARY_INDEX_ATTRIBUTES,
     generate_student_quiz_reports,
+    generate_student_quiz_reports_v2,
     drop_student_quiz_reports,
+    drop_student_quiz_reports_v2,
     add_secondary_index,
+    add_summary_index,
+    add_alt_id_indexes,
+    backfill_alt_ids,
     drop_secondary_index,
 )
+from student_qualifications import (
+    generate_student_qualifications,
+    drop_student_qualifications,
+)
 from dotenv import load_dotenv
+import argparse
 import boto3
 import os
 
@@ -28,10 +39,22 @@ def initialize_db():
 
 def generate_tables():
     """
-    Generates all required dynamodb table (for now only student_quiz_reports)
+    Generates all required dynamodb tables (student_quiz_reports, student_quiz_reports_v2
+    and student_qualifications)
     """
     ddb = initialize_db()
     generate_student_quiz_reports(ddb)
+    generate_student_quiz_reports_v2(ddb)
+    generate_student_qualifications(ddb)
+
+
+def generate_qualifications_table():
+    """
+    Generates the student_qualifications table (qualification data synced from
+    BigQuery by app/qualification_sync.py)
+    """
+    ddb = initialize_db()
+    generate_student_qualifications(ddb)
 
 
 def drop_tables():
@@ -40,6 +63,8 @@ def drop_tables():
     """
     ddb = initialize_db()
     drop_student_quiz_reports(ddb)
+    drop_student_quiz_reports_v2(ddb)
+    drop_student_qualifications(ddb)
 
 
 def add_secondary_ind():
@@ -47,17 +72,111 @@ def add_secondary_ind():
     add_secondary_index(ddb)
 
 
-def drop_secondary_ind(index_name: str):
+def add_summary_indexes(table_names=None):
+    """
+    Creates the student report listing summary index on the given tables (default:
+    both). DynamoDB allows one index creation per table at a time.
+    """
+    ddb = initialize_db()
+    for table_name in table_names or SUMMARY_INDEX_ATTRIBUTES:
+        add_summary_index(ddb, table_name)
+
+
+def add_alt_id_index():
+    """
+    Sets the alt-id lookup attributes on existing v2 reports, then creates the
+    student_id / apaar_id lookup indexes on student_quiz_reports_v2.
+    """
+    ddb = initialize_db()
+    backfill_alt_ids(ddb)
+    add_alt_id_indexes(ddb)
+
+
+def backfill_alt_id(session_id: str = None):
+    """
+    (Re)sets the alt-id lookup attributes on the v2 reports of a session (default:
+    every session)
+    """
+    ddb = initialize_db()
+    backfill_alt_ids(ddb, session_id)
+
+
+def drop_secondary_ind(index_name: str, table_name: str = "student_quiz_reports"):
     """
     Drops a secondary index
     """
     ddb = initialize_db()
-    drop_secondary_index(ddb, index_name)
+    drop_secondary_index(ddb, index_name, table_name)
 
 
-if __name__ == "__main__":
+def setup_local():
     """
-    Creates empty dynamodb table with correct schema for local usage.
+    Creates empty dynamodb tables with correct schema (and every index) for local usage.
+    Each index is waited on until ACTIVE before the next one is created.
     """
     generate_tables()
     add_secondary_ind()
+    add_summary_indexes()
+    add_alt_id_index()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="generate_table",
+        description="Create and maintain the report DynamoDB tables. "
+        "Without a command, sets up empty tables with every index for local usage.",
+    )
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser(
+        "create-tables", help="Create both report tables and student_qualifications"
+    )
+    commands.add_parser("drop-tables", help="Delete every table")
+    commands.add_parser(
+        "create-qualifications-table", help="Create student_qualifications"
+    )
+    commands.add_parser(
+        "add-secondary-index", help="Create gsi_user_id on student_quiz_reports"
+    )
+    summary_parser = commands.add_parser(
+        "add-summary-indexes",
+        help="Create the listing summary index (user_id_summary_index)",
+    )
+    summary_parser.add_argument(
+        "--table",
+        action="append",
+        choices=sorted(SUMMARY_INDEX_ATTRIBUTES),
+        help="Only this table (repeatable; default: both)",
+    )
+    commands.add_parser(
+        "add-alt-id-indexes",
+        help="Backfill the lookup attributes and create the student_id / apaar_id "
+        "indexes on student_quiz_reports_v2",
+    )
+    backfill_parser = commands.add_parser(
+        "backfill-alt-ids",
+        help="(Re)set the student_id / apaar_id lookup attributes on v2 reports",
+    )
+    backfill_parser.add_argument("--session", help="Only this session_id")
+    drop_index_parser = commands.add_parser("drop-index", help="Drop a secondary index")
+    drop_index_parser.add_argument("index_name")
+    drop_index_parser.add_argument("--table", default="student_quiz_reports")
+    args = parser.parse_args()
+
+    if args.command is None:
+        setup_local()
+    elif args.command == "create-tables":
+        generate_tables()
+    elif args.command == "create-qualifications-table":
+        generate_qualifications_table()
+    elif args.command == "drop-tables":
+        drop_tables()
+    elif args.command == "add-secondary-index":
+        add_secondary_ind()
+    elif args.command == "add-summary-indexes":
+        add_summary_indexes(args.table)
+    elif args.command == "add-alt-id-indexes":
+        add_alt_id_index()
+    elif args.command == "backfill-alt-ids":
+        backfill_alt_id(args.session)
+    elif args.command == "drop-index":
+        drop_secondary_ind(args.index_name, args.table)
@@ -0,0 +1,23 @@
+def generate_student_qualifications(ddb):
+    """
+    Creates the table `app/qualification_sync.py` copies BigQuery's
+    student_profile_al qualification rows into.
+    """
+    ddb.create_table(
+        TableName="student_qualifications",
+        AttributeDefinitions=[
+            {"AttributeName": "test_id", "AttributeType": "S"},
+            {"AttributeName": "user_id", "AttributeType": "S"},
+        ],
+        KeySchema=[
+            {"AttributeName": "test_id", "KeyType": "HASH"},
+            {"AttributeName": "user_id", "KeyType": "RANGE"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    print("Successfully created Student Qualifications Table")
+
+
+def drop_student_qualifications(ddb):
+    table = ddb.Table("student_qualifications")
+    table.delete()
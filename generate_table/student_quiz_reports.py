@@ -1,3 +1,9 @@
+import time
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+
 def generate_student_quiz_reports(ddb):
     ddb.create_table(
         TableName="student_quiz_reports",
@@ -14,6 +20,23 @@ def generate_student_quiz_reports(ddb):
     print("Successfully created Student Quiz Reports Table")
 
 
+def _wait_for_index(table, index_name, poll_seconds=10):
+    """
+    Waits until a GSI being created on `table` is ACTIVE (DynamoDB creates one
+    index per table at a time).
+    """
+    while True:
+        table.reload()
+        statuses = {
+            index["IndexName"]: index["IndexStatus"]
+            for index in table.global_secondary_indexes or []
+        }
+        if statuses.get(index_name, "ACTIVE") == "ACTIVE":
+            return
+        print(f"Waiting for {index_name} ({statuses[index_name]})")
+        time.sleep(poll_seconds)
+
+
 def add_secondary_index(ddb):
     table = ddb.Table("student_quiz_reports")
     response = table.update(
@@ -37,10 +60,203 @@ def add_secondary_index(ddb):
         ],
     )
     print(response)
+    _wait_for_index(table, "gsi_user_id")
 
 
-def drop_secondary_index(ddb, index_name):
-    table = ddb.Table("student_quiz_reports")
+def generate_student_quiz_reports_v2(ddb):
+    ddb.create_table(
+        TableName="student_quiz_reports_v2",
+        AttributeDefinitions=[
+            {"AttributeName": "session_id", "AttributeType": "S"},
+            {"AttributeName": "user_id", "AttributeType": "S"},
+        ],
+        KeySchema=[
+            {"AttributeName": "session_id", "KeyType": "HASH"},
+            {"AttributeName": "user_id", "KeyType": "RANGE"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "user_id_index",
+                "KeySchema": [{"AttributeName": "user_id", "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "ALL"},
+            }
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    print("Successfully created Student Quiz Reports v2 Table")
+
+
+# Summary indexes read by the student report listing (`ReportsDB.__query_summaries`);
+# keep the index name and projected attributes in sync with app/db/reports_db.py.
+# Table keys are always projected, so only the other listed attributes are included.
+SUMMARY_INDEX = "user_id_summary_index"
+SUMMARY_INDEX_ATTRIBUTES = {
+    "student_quiz_reports": ["test_name", "percentile", "rank", "start_date"],
+    "student_quiz_reports_v2": ["report_header", "overall_performance"],
+}
+
+
+def _index_throughput(table):
+    """
+    Returns the ProvisionedThroughput argument a new GSI needs on `table`: none for
+    on-demand tables, the table's own capacity for provisioned ones.
+    """
+    billing_mode = (table.billing_mode_summary or {}).get("BillingMode")
+    if billing_mode == "PAY_PER_REQUEST":
+        return {}
+    throughput = table.provisioned_throughput
+    return {
+        "ProvisionedThroughput": {
+            "ReadCapacityUnits": throughput["ReadCapacityUnits"],
+            "WriteCapacityUnits": throughput["WriteCapacityUnits"],
+        }
+    }
+
+
+def add_summary_index(ddb, table_name):
+    """
+    Creates the listing summary index on a table and waits until DynamoDB has
+    backfilled it from the existing items (the app falls back to the full index
+    until then).
+    """
+    table = ddb.Table(table_name)
+    response = table.update(
+        AttributeDefinitions=[{"AttributeName": "user_id", "AttributeType": "S"}],
+        GlobalSecondaryIndexUpdates=[
+            {
+                "Create": {
+                    "IndexName": SUMMARY_INDEX,
+                    "KeySchema": [{"AttributeName": "user_id", "KeyType": "HASH"}],
+                    "Projection": {
+                        "ProjectionType": "INCLUDE",
+                        "NonKeyAttributes": SUMMARY_INDEX_ATTRIBUTES[table_name],
+                    },
+                    **_index_throughput(table),
+                }
+            }
+        ],
+    )
+    print(response)
+    _wait_for_index(table, SUMMARY_INDEX)
+
+
+# Alternate-identifier indexes read by `ReportsDB.get_student_quiz_report_v2_by_alt_id`
+# (keep in sync with ALT_ID_INDEXES in app/db/reports_db.py). They are keyed on
+# copies of student_id / apaar_id that `backfill_alt_ids` sets only when the id is a
+# non-empty string: once an index exists, DynamoDB rejects any write whose index key
+# is empty or of another type, and many items have apaar_id="".
+ALT_ID_INDEXES = {
+    "student_id": ("session_id_student_id_index", "lookup_student_id"),
+    "apaar_id": ("session_id_apaar_id_index", "lookup_apaar_id"),
+}
+
+
+def add_alt_id_indexes(ddb):
+    """
+    Creates the alt-id indexes on student_quiz_reports_v2, one after the other.
+    DynamoDB fills them from items that already have the lookup attributes.
+    """
+    table = ddb.Table("student_quiz_reports_v2")
+    existing = {index["IndexName"] for index in table.global_secondary_indexes or []}
+    for index_name, key_attribute in ALT_ID_INDEXES.values():
+        if index_name in existing:
+            print(f"{index_name} already exists")
+            continue
+        response = table.update(
+            AttributeDefinitions=[
+                {"AttributeName": "session_id", "AttributeType": "S"},
+                {"AttributeName": key_attribute, "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexUpdates=[
+                {
+                    "Create": {
+                        "IndexName": index_name,
+                        "KeySchema": [
+                            {"AttributeName": "session_id", "KeyType": "HASH"},
+                            {"AttributeName": key_attribute, "KeyType": "RANGE"},
+                        ],
+                        "Projection": {"ProjectionType": "KEYS_ONLY"},
+                        **_index_throughput(table),
+                    }
+                }
+            ],
+        )
+        print(response)
+        _wait_for_index(table, index_name)
+
+
+def backfill_alt_ids(ddb, session_id=None):
+    """
+    Sets the alt-id lookup attributes (copies of string, non-empty student_id /
+    apaar_id) on the v2 items of one session, or of the whole table, that lack or
+    disagree with them. Safe to re-run, e.g. after a session's reports are
+    re-published.
+    """
+    table = ddb.Table("student_quiz_reports_v2")
+    attributes = ["session_id", "user_id"]
+    for identifier, (_, key_attribute) in ALT_ID_INDEXES.items():
+        attributes += [identifier, key_attribute]
+    names = {f"#a{i}": attribute for i, attribute in enumerate(attributes)}
+    kwargs = {
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
+    }
+    if session_id is None:
+        read = table.scan
+    else:
+        read = table.query
+        kwargs["KeyConditionExpression"] = Key("session_id").eq(session_id)
+
+    scanned = updated = 0
+    while True:
+        response = read(**kwargs)
+        for item in response.get("Items", []):
+            scanned += 1
+            set_values, remove = {}, []
+            for identifier, (_, key_attribute) in ALT_ID_INDEXES.items():
+                value = item.get(identifier)
+                if not isinstance(value, str) or not value:
+                    value = None
+                if item.get(key_attribute) == value:
+                    continue
+                if value is None:
+                    remove.append(key_attribute)
+                else:
+                    set_values[key_attribute] = value
+            if not set_values and not remove:
+                continue
+            expression = []
+            if set_values:
+                expression.append(
+                    "SET " + ", ".join(f"{name} = :{name}" for name in set_values)
+                )
+            if remove:
+                expression.append("REMOVE " + ", ".join(remove))
+            update = {
+                "Key": {"session_id": item["session_id"], "user_id": item["user_id"]},
+                "UpdateExpression": " ".join(expression),
+                "ConditionExpression": "attribute_exists(session_id)",
+            }
+            if set_values:
+                update["ExpressionAttributeValues"] = {
+                    f":{name}": value for name, value in set_values.items()
+                }
+            try:
+                table.update_item(**update)
+                updated += 1
+            except ClientError as e:
+                # The item was deleted since it was read
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+        lek = response.get("LastEvaluatedKey")
+        if not lek:
+            break
+        kwargs["ExclusiveStartKey"] = lek
+    print(f"Backfilled alt-id lookup attributes on {updated} of {scanned} items")
+
+
+def drop_secondary_index(ddb, index_name, table_name="student_quiz_reports"):
+    table = ddb.Table(table_name)
     response = table.update(
         GlobalSecondaryIndexUpdates=[{"Delete": {"IndexName": index_name}}]
     )
@@ -50,3 +266,8 @@ def drop_secondary_index(ddb, index_name):
 def drop_student_quiz_reports(ddb):
     table = ddb.Table("student_quiz_reports")
     table.delete()
+
+
+def drop_student_quiz_reports_v2(ddb):
+    table = ddb.Table("student_quiz_reports_v2")
+    table.delete()